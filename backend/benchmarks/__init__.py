@@ -0,0 +1,4 @@
+"""
+Benchmarks for WealthHub Backend
+Run from the backend directory, e.g. `python -m benchmarks.bench_merge`
+"""
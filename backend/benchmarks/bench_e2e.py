@@ -0,0 +1,217 @@
+"""
+End-to-end benchmark for /fetch-month against local stub upstreams
+
+Starts the GAS stub (stubs.gas_server) and the price-source stub
+(stubs.upstream_server) on local ports, runs the app under uvicorn in a
+separate process pointed at them, and drives /fetch-month with a fixed
+concurrency. Each request asks for a different month (unless
+--same-month), so lookups mostly miss the price cache the way a backfill
+does. Reports p50/p95 latency, requests per second, prices and errors per
+request, the app's peak memory (VmHWM) and the upstream calls it made.
+
+Usage:
+    python -m benchmarks.bench_e2e
+    python -m benchmarks.bench_e2e --assets 10 100 1000 --requests 20 --concurrency 4
+    python -m benchmarks.bench_e2e --latency 120 --jitter 40 --error-rate 0.02
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import date
+from pathlib import Path
+from typing import List, Optional
+
+import httpx
+
+from stubs import gas_server, upstream_server
+
+BACKEND = Path(__file__).resolve().parent.parent
+
+
+def synthetic_portfolio(size: int, seed: int = 0) -> List[dict]:
+    """One BTC asset, then ~40% funds and ~60% stocks"""
+    rng = random.Random(seed)
+    assets = [{"id": "btc", "name": "Bitcoin", "category": "Crypto", "ticker": "BTC-USD", "baseAmount": 1000}]
+    for i in range(1, size):
+        if rng.random() < 0.4:
+            assets.append({
+                "id": f"fund-{i}", "name": f"Fund {i}", "category": "Funds",
+                "isin": f"IE{rng.randrange(10 ** 10):010d}", "baseAmount": 1000,
+            })
+        else:
+            assets.append({
+                "id": f"stock-{i}", "name": f"Stock {i}", "category": "Stocks",
+                "ticker": f"STK{i:04d}", "baseAmount": 1000,
+            })
+    return assets
+
+
+def months_back(count: int) -> List[tuple]:
+    """The `count` months before the current one, newest first"""
+    year, month = date.today().year, date.today().month
+    months = []
+    for _ in range(count):
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+        months.append((year, month))
+    return months
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def peak_rss_mib(pid: int) -> Optional[float]:
+    """Peak resident memory of a process (Linux only)"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+def start_app(port: int, gas_url: str, upstream_url: str) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "GAS_URL": gas_url,
+        "UPSTREAM_OVERRIDE_URL": upstream_url,
+        "PRICE_CACHE_PATH": "",
+        "HISTORY_STORE_PATH": "",
+        "JOB_STORE_PATH": "",
+        "PREWARM_ENABLED": "False",
+        "HTTP2": "False",
+        "RETRY_BACKOFF_BASE": "0.05",
+        "RETRY_BACKOFF_MAX": "0.5",
+    }
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+async def wait_ready(base_url: str, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(f"{base_url}/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise SystemExit(f"App didn't start at {base_url}")
+
+
+async def drive(base_url: str, months: List[tuple], concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, prices, errors, failed = [], [], [], 0  # errors: every message returned
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=None) as client:
+        async def one(year: int, month: int) -> None:
+            nonlocal failed
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get("/fetch-month", params={"year": year, "month": month})
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    failed += 1
+                    return
+                body = response.json()
+                prices.append(len(body["prices"]))
+                errors.extend(body["errors"])
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(year, month) for year, month in months))
+        elapsed = time.perf_counter() - started
+
+    return {"latencies": latencies, "prices": prices, "errors": errors, "failed": failed, "elapsed": elapsed}
+
+
+def run_size(size: int, args) -> dict:
+    stub = upstream_server.UpstreamStub(args.latency, args.jitter, args.error_rate, seed=args.seed)
+    upstream, upstream_url = upstream_server.start_in_thread(stub)
+    gas = gas_server.GasStub({"assets": synthetic_portfolio(size, args.seed), "history": []})
+    gas_http, gas_url = gas_server.start_in_thread(gas)
+    port = free_port()
+
+    app = start_app(port, gas_url, upstream_url)
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        asyncio.run(wait_ready(base_url))
+        months = months_back(args.requests)
+        if args.same_month:
+            months = [months[0]] * args.requests
+        result = asyncio.run(drive(base_url, months, args.concurrency))
+        result["rss"] = peak_rss_mib(app.pid)
+    finally:
+        app.terminate()
+        try:
+            app.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            # Lookups dropped at FETCH_DEADLINE may still hold worker threads
+            app.kill()
+            app.wait()
+        upstream.shutdown()
+        gas_http.shutdown()
+
+    result["upstream"] = stub.requests
+    result["upstream_errors"] = stub.errors
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--assets", type=int, nargs="+", default=[10, 100, 1000], help="Portfolio sizes")
+    parser.add_argument("--requests", type=int, default=12, help="/fetch-month calls per portfolio size")
+    parser.add_argument("--concurrency", type=int, default=4, help="Requests in flight at once")
+    parser.add_argument("--latency", type=float, default=50.0, help="Stub upstream latency (ms)")
+    parser.add_argument("--jitter", type=float, default=20.0, help="+/- ms around the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of upstream calls answered with 503")
+    parser.add_argument("--same-month", action="store_true", help="Repeat one month (cache-hit path)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(
+        f"upstream latency {args.latency:.0f}±{args.jitter:.0f} ms, error rate {args.error_rate:.1%}, "
+        f"{args.requests} requests per size, concurrency {args.concurrency}"
+    )
+    print(
+        f"{'assets':>6} {'ok':>5} {'p50 (ms)':>9} {'p95 (ms)':>9} {'req/s':>7} "
+        f"{'prices':>7} {'errors':>7} {'RSS MiB':>8} {'upstream':>9}"
+    )
+    for size in args.assets:
+        r = run_size(size, args)
+        ok = len(r["prices"])
+        latencies = [t * 1000 for t in r["latencies"]]
+        rss = f"{r['rss']:.0f}" if r["rss"] else "n/a"
+        print(
+            f"{size:>6} {ok:>2}/{len(latencies):<2} {percentile(latencies, 50):>9.0f} {percentile(latencies, 95):>9.0f} "
+            f"{len(latencies) / r['elapsed']:>7.2f} {sum(r['prices']) / max(ok, 1):>7.1f} "
+            f"{len(r['errors']) / max(ok, 1):>7.1f} {rss:>8} {r['upstream']:>5} ({r['upstream_errors']} 503)"
+        )
+        # Synthetic labels start with the asset kind ("STK0012", "Fund 7 (IE...)", "Bitcoin")
+        kinds = Counter(re.match(r"[A-Za-z]*", message.rsplit(" for ", 1)[-1]).group() for message in r["errors"])
+        if kinds:
+            print(f"{'':>6}   errors by asset kind: " + ", ".join(f"{kind} {count}" for kind, count in kinds.most_common()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark for backend cold start
+
+Imports the app in fresh interpreters and reports import time, peak
+memory (max RSS) and whether the heavy libraries were loaded, for:
+
+- lazy:    `import main` as a worker does at startup
+- warm-up: `import main` plus every registered service (SERVICE_WARMUP=all)
+- eager:   the heavy service modules imported up front, as before the
+           service registry
+
+Usage:
+    python -m benchmarks.bench_import
+    python -m benchmarks.bench_import --repeat 10
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+HEAVY = ("pandas", "numpy", "lxml", "bs4")
+
+SCENARIOS = {
+    "lazy": "import main",
+    "warm-up": "import main; main.service_registry.warm_up()",
+    "eager": (
+        "import services.price_fetcher, services.fund_scraper, services.metrics, "
+        "services.analytics, services.projections; import main"
+    ),
+}
+
+CHILD = """
+import json, logging, resource, sys, time
+logging.disable(logging.CRITICAL)
+started = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - started
+print(json.dumps({{
+    "seconds": elapsed,
+    "max_rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "modules": len(sys.modules),
+    "heavy": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+
+def run(code: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD.format(code=code, heavy=HEAVY)],
+        cwd=BACKEND, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    run(SCENARIOS["eager"])  # Warm the OS file cache and __pycache__
+
+    print(f"{'scenario':<10} {'median (ms)':>12} {'max (ms)':>10} {'RSS (MiB)':>10} {'modules':>8}  heavy libraries")
+    for name, code in SCENARIOS.items():
+        samples = [run(code) for _ in range(args.repeat)]
+        times = [s["seconds"] * 1000 for s in samples]
+        rss = statistics.median(s["max_rss_kib"] for s in samples) / 1024
+        last = samples[-1]
+        print(
+            f"{name:<10} {statistics.median(times):>12.0f} {max(times):>10.0f} {rss:>10.1f} "
+            f"{last['modules']:>8}  {', '.join(last['heavy']) or '-'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
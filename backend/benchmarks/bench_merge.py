@@ -0,0 +1,92 @@
+"""
+Benchmark for merge_price_updates on synthetic histories
+
+Usage:
+    python -m benchmarks.bench_merge                    # 100k/250k/500k rows
+    python -m benchmarks.bench_merge --rows 100000 --updates 5000
+    python -m benchmarks.bench_merge --legacy           # also time the old O(n*m) merge
+"""
+
+import argparse
+import random
+import time
+
+from utils import merge_price_updates
+
+
+def synthetic_history(rows: int, assets: int = 40) -> list:
+    """History with `rows` entries spread over `assets` assets, month by month"""
+    history = []
+    for i in range(rows):
+        month_index, asset = divmod(i, assets)
+        year, month = divmod(month_index, 12)
+        history.append({
+            "month": f"{2000 + year:04d}-{month + 1:02d}",
+            "assetId": f"asset-{asset}",
+            "nav": 1000.0 + i,
+            "contribution": 100.0,
+        })
+    return history
+
+
+def synthetic_updates(history: list, updates: int, new_ratio: float = 0.2) -> list:
+    """Mix of updates to existing rows and brand new (month, assetId) rows"""
+    rng = random.Random(42)
+    existing = iter(rng.sample(range(len(history)), min(updates, len(history))))
+    result = []
+    for i in range(updates):
+        if rng.random() < new_ratio:
+            result.append({"month": f"2999-{i % 12 + 1:02d}", "assetId": f"new-{i}", "nav": 1.0})
+        else:
+            # Each existing key is updated once: the old merge breaks on repeats
+            entry = dict(history[next(existing)])
+            entry["nav"] += 1
+            result.append(entry)
+    return result
+
+
+def legacy_merge(existing_data: list, new_prices: list) -> list:
+    """The previous implementation: a list.index scan per update"""
+    existing_map = {}
+    for entry in existing_data:
+        existing_map[(entry.get("month"), entry.get("assetId"))] = entry
+    result = list(existing_data)
+    for new_price in new_prices:
+        key = (new_price.get("month"), new_price.get("assetId"))
+        if key in existing_map:
+            result[result.index(existing_map[key])] = new_price
+        else:
+            result.append(new_price)
+    return result
+
+
+def timed(fn, *args, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="*", default=[100_000, 250_000, 500_000])
+    parser.add_argument("--updates", type=int, default=5_000)
+    parser.add_argument("--legacy", action="store_true", help="Also time the previous O(n*m) merge (slow)")
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'updates':>8} {'merge (ms)':>11} {'rows/s':>12}" + (f" {'legacy (ms)':>12}" if args.legacy else ""))
+    for rows in args.rows:
+        history = synthetic_history(rows)
+        updates = synthetic_updates(history, args.updates)
+
+        elapsed = timed(merge_price_updates, history, updates)
+        line = f"{rows:>10} {args.updates:>8} {elapsed * 1000:>11.1f} {(rows + args.updates) / elapsed:>12,.0f}"
+        if args.legacy:
+            line += f" {timed(legacy_merge, history, updates, repeat=1) * 1000:>12.1f}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
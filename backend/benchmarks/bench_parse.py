@@ -0,0 +1,51 @@
+"""
+Benchmark for FT tearsheet price extraction
+
+Compares the BeautifulSoup parser with the streaming lxml path over the
+HTML fixtures in benchmarks/fixtures. The fixtures reproduce the layout
+of an FT fund tearsheet (price span, meta price, not found) padded with
+the scripts, navigation and news of a real page.
+
+Usage:
+    python -m benchmarks.bench_parse
+    python -m benchmarks.bench_parse --repeat 50
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+from services.fund_scraper import FundScraper, _extract_price_streaming
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def timed(fn, html: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(html)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'fixture':<32} {'KiB':>6} {'soup (ms)':>10} {'lxml (ms)':>10} {'speedup':>8}  price")
+    for path in sorted(FIXTURES.glob("*.html")):
+        html = path.read_text(encoding="utf-8")
+        soup_price = FundScraper._extract_price_soup(html)
+        fast_price = _extract_price_streaming(html)
+        if soup_price != fast_price:
+            raise SystemExit(f"{path.name}: soup={soup_price!r} lxml={fast_price!r}")
+
+        soup = timed(FundScraper._extract_price_soup, html, args.repeat)
+        fast = timed(_extract_price_streaming, html, args.repeat)
+        print(f"{path.name:<32} {len(html) / 1024:>6.0f} {soup * 1000:>10.2f} {fast * 1000:>10.2f} {soup / fast:>7.1f}x  {fast_price}")
+
+
+if __name__ == "__main__":
+    main()
@@ -19,10 +19,75 @@ class Settings(BaseSettings):
     
     # Google Apps Script
     GAS_URL: Optional[str] = None
+    GAS_DELTA_WRITES: bool = True  # Send only changed history entries when the script supports it
+    GAS_SNAPSHOT_TTL: float = 30.0  # Seconds a loaded GAS document is reused before revalidating
     
     # Price Fetcher Settings
     TIMEOUT: int = 30
-    RETRIES: int = 3
+    RETRIES: int = 3  # Extra attempts after the first for transient errors
+    RETRY_BACKOFF_BASE: float = 0.5  # Seconds, doubled on every retry (with jitter)
+    RETRY_BACKOFF_MAX: float = 8.0
+    BREAKER_FAILURE_THRESHOLD: int = 5  # Consecutive failures that open a source's circuit
+    BREAKER_RESET_TIMEOUT: float = 60.0  # Seconds before an open circuit lets a probe through
+    
+    # HTTP Client Settings (one keep-alive pool per upstream host)
+    HTTP2: bool = True
+    HTTP_CONNECT_TIMEOUT: float = 10.0
+    HTTP_MAX_CONNECTIONS: int = 20
+    HTTP_MAX_KEEPALIVE: int = 10
+    HTTP_KEEPALIVE_EXPIRY: float = 60.0
+    UPSTREAM_OVERRIDE_URL: Optional[str] = None  # Send Yahoo/FT/Binance requests to a stub server (benchmarks)
+    
+    # Fetch Engine Settings
+    FETCH_DEADLINE: float = 90.0  # Total seconds allowed for one /fetch-month
+    FETCH_CONCURRENCY_CRYPTO: int = 2
+    FETCH_CONCURRENCY_FUNDS: int = 8
+    FETCH_CONCURRENCY_STOCKS: int = 4
+    STOCK_BATCH_SIZE: int = 50  # Tickers per stock lookup; each ticker is one Yahoo chart request
+    FETCH_RANGE_MAX_MONTHS: int = 120  # Longest span accepted by /fetch-range
+    
+    # Price Cache Settings
+    PRICE_CACHE_PATH: str = "data/price_cache.sqlite3"  # Empty disables the disk store
+    PRICE_CACHE_MEMORY_SIZE: int = 1024
+    PRICE_CACHE_OPEN_TTL: int = 900  # Seconds to keep prices for today
+    PRICE_CACHE_MAX_ROWS: int = 100000
+    
+    # Background Jobs
+    JOB_WORKERS: int = 2  # Jobs running at the same time
+    JOB_STORE_PATH: str = "data/jobs.sqlite3"  # Empty keeps jobs in memory only
+    JOB_RETENTION: int = 86400  # Seconds finished jobs stay queryable
+    
+    # Local History Store
+    HISTORY_STORE_PATH: str = ""  # e.g. data/history.sqlite3; empty reads and writes GAS directly
+    HISTORY_SYNC_INTERVAL: float = 60  # Seconds between background syncs with GAS
+    
+    # Instrumentation
+    INTERNAL_METRICS_ENABLED: bool = False  # Record latencies and serve them at /internal/metrics
+    INTERNAL_METRICS_TOKEN: Optional[str] = None  # Bearer token scrapers must send; unset leaves the endpoint open
+    
+    # Per-request Profiling
+    PROFILING_TOKEN: Optional[str] = None  # Admin token for ?profile=inline|save; unset disables profiling
+    PROFILE_DIR: str = "data/profiles"  # Where ?profile=save writes its reports
+    PROFILE_SAMPLE_INTERVAL: float = 0.005  # Seconds between stack samples
+    
+    # Service Warm-up
+    SERVICE_WARMUP: str = ""  # "all" or comma-separated services to import at startup; empty loads on first use
+    
+    # List Endpoints (/assets, /history)
+    LIST_PAGE_SIZE: int = 500  # Default /history page size
+    LIST_MAX_PAGE_SIZE: int = 5000
+    
+    # Month-end Pre-warming
+    PREWARM_ENABLED: bool = False  # Off by default: every worker runs its own scheduler
+    PREWARM_CRON: str = "30 22 * * 1-5"  # Server local time; only acts on the month's last business day
+    PREWARM_DRY_RUN: bool = False  # Log what would be fetched without fetching
+    
+    # Monte Carlo Projections
+    PROJECTION_MAX_PATHS: int = 1000000
+    PROJECTION_BATCH_PATHS: int = 10000  # Paths simulated per batch
+    PROJECTION_WORKERS: int = 0  # Process pool size for large runs; 0 keeps everything in-process
+    PROJECTION_PROCESS_THRESHOLD: int = 200000  # Paths above which the process pool is used
+    PROJECTION_LATENCY_BUDGET: float = 2.0  # Seconds; batches not started by then are dropped
     
     class Config:
         env_file = ".env"
@@ -3,25 +3,41 @@ WealthHub Backend API
 Main FastAPI application with endpoints for fetching asset prices
 """
 
+import asyncio
+import json
 import logging
+import secrets
+from contextlib import asynccontextmanager
 from datetime import datetime
 from typing import List, Optional
-from fastapi import FastAPI, Query, HTTPException, status
+from fastapi import FastAPI, Header, Query, HTTPException, Request, Response, status
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-import requests
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 
 from config import settings
 from models import (
-    Asset, PriceData, FetchMonthResponse, HealthResponse,
-    HistoryEntry
+    Asset, PriceData, FetchMonthResponse, FetchRangeResponse,
+    MonthPrices, HealthResponse, HistoryEntry, JobResponse, MetricsResponse,
+    AnalyticsResponse, ProjectionRequest, ProjectionResponse
 )
 from utils import (
     get_last_business_day, validate_month, format_date,
-    format_datetime_iso, merge_price_updates
+    format_datetime_iso, parse_month, iter_months
 )
-from services.price_fetcher import PriceFetcher
-from services.fund_scraper import FundScraper
+from services.fetch_engine import FetchEngine
+from services.price_cache import price_cache
+from services.singleflight import price_flights
+from services.http_client import http_clients
+from services.resilience import breaker_states
+from services.instrumentation import Instrumentation, InstrumentationMiddleware, instrumentation
+from services.profiling import profiler
+from services.gas_client import gas_client
+from services.history_store import history_store, history_sync
+from services.listing import InvalidCursor, Listing
+from services.jobs import Job, job_queue
+from services.scheduler import CronSchedule, Scheduler
+from services.registry import service_registry
 
 # Configure logging
 logging.basicConfig(
@@ -30,11 +46,39 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# pandas/NumPy-backed services, imported on first use (see SERVICE_WARMUP)
+PortfolioMetrics = service_registry.lazy("portfolio_metrics")
+performance_analytics = service_registry.lazy("performance_analytics")
+projection_engine = service_registry.lazy("projection_engine")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """App lifetime: background job workers, the scheduler and the history sync run while the app is up; shared HTTP pools are closed on shutdown"""
+    warmup = asyncio.create_task(_warm_up_services()) if settings.SERVICE_WARMUP else None
+    await job_queue.start()
+    if _history_store_active():
+        history_sync.start()
+    if settings.PREWARM_ENABLED:
+        scheduler.add("prewarm", CronSchedule(settings.PREWARM_CRON), _prewarm_month_end)
+        scheduler.start()
+    yield
+    if warmup is not None:
+        await asyncio.gather(warmup, return_exceptions=True)
+    if service_registry.is_loaded("projection_engine"):
+        projection_engine.shutdown()
+    await scheduler.stop()
+    await job_queue.stop()
+    await history_sync.stop()
+    await http_clients.aclose()
+    logger.info("🔌 HTTP pools closed")
+
+
 # Create FastAPI app
 app = FastAPI(
     title=settings.API_TITLE,
     version=settings.API_VERSION,
-    description="Backend API for WealthHub wealth management application"
+    description="Backend API for WealthHub wealth management application",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -53,6 +97,15 @@ app.add_middleware(
 
 logger.info(f"🔧 CORS configured for: {', '.join(frontend_urls)}")
 
+if settings.INTERNAL_METRICS_ENABLED:
+    app.add_middleware(InstrumentationMiddleware, instrumentation=instrumentation)
+
+# Shared fetch engine (thread pool + per-source concurrency limits)
+fetch_engine = FetchEngine()
+
+# Periodic tasks (month-end pre-warming); workers sharing the job store run each tick once
+scheduler = Scheduler(claim=job_queue.claim)
+
 
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
@@ -67,13 +120,16 @@ async def health_check():
 @app.get("/fetch-month", response_model=FetchMonthResponse)
 async def fetch_month_prices(
     year: int = Query(..., ge=2020, le=2099, description="Year (e.g., 2024)"),
-    month: int = Query(..., ge=1, le=12, description="Month (1-12)")
+    month: int = Query(..., ge=1, le=12, description="Month (1-12)"),
+    profile: Optional[str] = Query(None, include_in_schema=False),
+    x_profile: Optional[str] = Header(None, alias="X-Profile", include_in_schema=False),
+    admin_token: Optional[str] = Header(None, alias="X-Admin-Token", include_in_schema=False)
 ):
     """
     Fetch prices for all assets for the given month.
     
     - Automatically determines the last business day of the month
-    - Fetches prices from appropriate sources (yfinance, Morningstar, etc.)
+    - Fetches prices from appropriate sources (Yahoo Finance, Morningstar, etc.)
     - Returns prices and optionally persists to Google Apps Script
     
     Query Parameters:
@@ -86,8 +142,21 @@ async def fetch_month_prices(
     - lastBusinessDay: The date prices were fetched for
     - prices: List of PriceData objects with fetched prices
     - errors: List of any errors encountered
+    
+    Admins can profile the request with `profile=inline|save` (or the
+    X-Profile header) and the X-Admin-Token header; see PROFILING_TOKEN.
     """
+    mode = _profile_mode(profile or x_profile, admin_token)
+    if mode is None:
+        return await _fetch_month(year, month)
     
+    with profiler.profile(f"fetch-month {year}-{month:02d}") as run:
+        result = await _fetch_month(year, month)
+    return await _profiled_response(run, mode, result)
+
+
+async def _fetch_month(year: int, month: int) -> FetchMonthResponse:
+    """Body of /fetch-month"""
     logger.info(f"📊 Fetch-month request: {year}-{month:02d}")
     
     # Validate input
@@ -106,95 +175,174 @@ async def fetch_month_prices(
         logger.info(f"📅 Last business day: {format_date(last_business_day)}")
         
         # Load assets from GAS (or use sample for now)
-        assets = await _load_assets_from_gas()
+        with profiler.span("load_assets"):
+            assets = await _load_assets_from_gas()
         logger.info(f"📦 Loaded {len(assets)} assets")
         
-        # Organize assets by type
-        crypto_assets = [a for a in assets if "BTC" in str(a.get("ticker", "")).upper()]
-        fund_assets = [a for a in assets if a.get("isin") and len(str(a.get("isin"))) == 12]
-        stock_assets = [a for a in assets if a.get("ticker") and a.get("ticker") != "BTC-USD" and a.get("category") in ["Stock", "Stocks"]]
-        
-        logger.info(f"🔍 Found: {len(crypto_assets)} crypto, {len(fund_assets)} funds, {len(stock_assets)} stocks")
-        
-        # Fetch Bitcoin price
-        if crypto_assets:
-            btc_data = PriceFetcher.fetch_bitcoin_price(last_business_day)
-            if btc_data:
-                prices.append(btc_data)
-            else:
-                errors.append("Failed to fetch Bitcoin price")
-        
-        # Fetch fund prices
-        for fund in fund_assets:
-            if not fund.get("isin"):
-                logger.warning(f"Fund {fund.get('name')} has no ISIN")
-                continue
-            
-            price_data = FundScraper.fetch_fund_price(
-                isin=fund["isin"],
-                asset_name=fund["name"],
-                asset_id=fund["id"]
-            )
-            
-            if price_data:
-                prices.append(price_data)
-            else:
-                errors.append(f"Failed to fetch price for {fund.get('name')} ({fund.get('isin')})")
-        
-        # Fetch stock prices
-        if stock_assets:
-            tickers_map = {
-                a["ticker"]: (a["name"], a["id"])
-                for a in stock_assets if a.get("ticker")
-            }
-            
-            if tickers_map:
-                stock_prices = PriceFetcher.fetch_multiple_stocks(tickers_map, last_business_day)
-                prices.extend(stock_prices)
-                
-                # Log missing stocks
-                fetched_tickers = {p.ticker for p in stock_prices if p.ticker}
-                missing = set(tickers_map.keys()) - fetched_tickers
-                if missing:
-                    errors.extend([f"Failed to fetch price for {t}" for t in missing])
+        # Fetch every asset concurrently, bounded per source and by a total deadline
+        result = await fetch_engine.fetch_month(assets, last_business_day)
+        prices.extend(result.prices)
+        errors.extend(result.errors)
         
-        logger.info(f"✅ Fetched {len(prices)} prices successfully")
+        return await _finish_fetch_month(year, month, last_business_day, prices, errors)
         
-        # Return error if no prices fetched - do NOT use test data
-        if len(prices) == 0:
-            logger.error("❌ No prices could be fetched from any source")
-            return FetchMonthResponse(
+    except Exception as e:
+        logger.error(f"❌ Error in fetch-month: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error fetching prices: {str(e)}"
+        )
+
+
+@app.get("/fetch-month/stream")
+async def stream_month_prices(
+    year: int = Query(..., ge=2020, le=2099, description="Year (e.g., 2024)"),
+    month: int = Query(..., ge=1, le=12, description="Month (1-12)"),
+    format: str = Query("ndjson", pattern="^(ndjson|sse)$", description="ndjson or sse")
+):
+    """
+    Streaming variant of /fetch-month.
+    
+    Emits one record per price or error as soon as its lookup resolves,
+    then a final summary record with the same body as /fetch-month
+    (prices are persisted to GAS before the summary is sent).
+    
+    Records:
+    - {"type": "price", "data": PriceData}
+    - {"type": "error", "data": "message"}
+    - {"type": "summary", "data": FetchMonthResponse}
+    
+    With format=sse each record is a server-sent event named after its
+    type, with `data` as the event payload.
+    """
+    
+    logger.info(f"📡 Fetch-month stream request: {year}-{month:02d} ({format})")
+    
+    if not validate_month(year, month):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid month: {year}-{month:02d}"
+        )
+    
+    last_business_day = get_last_business_day(year, month)
+    assets = await _load_assets_from_gas()
+    logger.info(f"📦 Loaded {len(assets)} assets")
+    
+    async def records():
+        prices: List[PriceData] = []
+        errors: List[str] = []
+        try:
+            async for partial in fetch_engine.stream_month(assets, last_business_day):
+                for price in partial.prices:
+                    prices.append(price)
+                    yield _stream_record("price", price.model_dump(), format)
+                for error in partial.errors:
+                    errors.append(error)
+                    yield _stream_record("error", error, format)
+            summary = await _finish_fetch_month(year, month, last_business_day, prices, errors)
+        except Exception as e:
+            # Headers are already sent, so failures go in the summary
+            logger.error(f"❌ Error in fetch-month stream: {str(e)}", exc_info=True)
+            summary = FetchMonthResponse(
                 success=False,
-                message="No se pudieron obtener precios de ninguna fuente",
+                message=f"Error fetching prices: {str(e)}",
                 year=year,
                 month=month,
                 lastBusinessDay=format_date(last_business_day),
-                prices=[],
-                errors=errors if errors else ["No data available from yfinance, Morningstar, or Financial Times"]
+                prices=prices,
+                errors=errors
             )
-        
-        # Only persist to GAS if we actually fetched prices
-        if prices and settings.GAS_URL:
-            await _persist_prices_to_gas(prices, year, month, last_business_day)
-        
-        return FetchMonthResponse(
-            success=len(prices) > 0,
-            message=f"Successfully fetched {len(prices)} prices" if len(prices) > 0 else "No prices were fetched",
-            year=year,
-            month=month,
-            lastBusinessDay=format_date(last_business_day),
-            prices=prices,
-            errors=errors
-        )
+        yield _stream_record("summary", summary.model_dump(), format)
+    
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(
+        records(),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.get("/fetch-range", response_model=FetchRangeResponse)
+async def fetch_range_prices(
+    start: str = Query(..., pattern=r"^\d{4}-\d{2}$", description="First month (YYYY-MM)"),
+    end: str = Query(..., pattern=r"^\d{4}-\d{2}$", description="Last month (YYYY-MM)")
+):
+    """
+    Backfill prices for every month between start and end (both included).
+    
+    - Downloads each ticker's daily series once for the whole range
+    - Picks each month's close on or before its last business day
+    - Scrapes each fund ISIN once (FT only publishes the latest NAV, so
+      funds are filled for the last month of the range only)
+    - Persists all months to Google Apps Script in a single merged write
+    
+    Query Parameters:
+    - start: First month to fetch (e.g., 2023-01)
+    - end: Last month to fetch (e.g., 2024-12)
+    """
+    
+    logger.info(f"📊 Fetch-range request: {start} → {end}")
+    
+    months = _validate_range(start, end)
+    
+    try:
+        return await _fetch_range(start, end, months)
         
     except Exception as e:
-        logger.error(f"❌ Error in fetch-month: {str(e)}", exc_info=True)
+        logger.error(f"❌ Error in fetch-range: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error fetching prices: {str(e)}"
         )
 
 
+@app.post("/jobs/fetch-month", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def submit_fetch_month_job(
+    year: int = Query(..., ge=2020, le=2099, description="Year (e.g., 2024)"),
+    month: int = Query(..., ge=1, le=12, description="Month (1-12)")
+):
+    """
+    Run /fetch-month in the background and return the job to poll.
+    
+    A request for a month that already has a queued or running job
+    returns that job instead of starting another.
+    """
+    if not validate_month(year, month):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid month: {year}-{month:02d}"
+        )
+    return _job_response(job_queue.submit("fetch-month", {"year": year, "month": month}))
+
+
+@app.post("/jobs/fetch-range", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def submit_fetch_range_job(
+    start: str = Query(..., pattern=r"^\d{4}-\d{2}$", description="First month (YYYY-MM)"),
+    end: str = Query(..., pattern=r"^\d{4}-\d{2}$", description="Last month (YYYY-MM)")
+):
+    """Run /fetch-range in the background and return the job to poll"""
+    _validate_range(start, end)
+    return _job_response(job_queue.submit("fetch-range", {"start": start, "end": end}))
+
+
+@app.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str):
+    """
+    Status of a background job.
+    
+    While running, `prices` and `errors` hold what has been fetched so
+    far. Once done, `result` holds the body the equivalent endpoint
+    would have returned.
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job not found: {job_id}"
+        )
+    return _job_response(job)
+
+
 @app.post("/update-prices")
 async def update_prices(price_data: List[PriceData]):
     """
@@ -229,15 +377,221 @@ async def update_prices(price_data: List[PriceData]):
         )
 
 
+@app.get("/metrics", response_model=MetricsResponse)
+async def get_metrics():
+    """
+    Portfolio totals and per-asset metrics computed from the GAS history.
+    
+    Returns the same totals as the Dashboard (NAV, invested, profit, ROI,
+    liquidity) plus NAV, invested, profit, ROI and allocation vs.
+    targetAllocation for every active asset, so clients don't need to
+    download the full history.
+    """
+    try:
+        data = await _load_data_from_gas()
+        assets = data.get("assets") if data else None
+        history = data.get("history", []) if data else []
+        if not assets:
+            assets = _get_sample_assets()
+        
+        # pandas work is CPU: off the event loop
+        metrics = await asyncio.to_thread(PortfolioMetrics.compute, assets, history)
+        return MetricsResponse(success=True, **metrics)
+    except Exception as e:
+        logger.error(f"❌ Error computing metrics: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error computing metrics: {str(e)}"
+        )
+
+
+@app.get("/analytics", response_model=AnalyticsResponse, response_model_by_alias=True)
+async def get_analytics(
+    window: int = Query(12, ge=1, le=120, description="Months per rolling return"),
+    series: bool = Query(False, description="Include the per-month series")
+):
+    """
+    Performance analytics per asset and for the whole portfolio.
+    
+    - twr: time-weighted return (contributions don't move it)
+    - mwr: money-weighted return (XIRR of contributions vs. latest NAV)
+    - volatility, maxDrawdown, currentDrawdown
+    - rolling: latest, best and worst `window`-month returns
+    
+    All values are percentages. Results are cached per asset and only
+    recomputed when that asset's history changes.
+    """
+    try:
+        data = await _load_data_from_gas()
+        assets = (data.get("assets") if data else None) or _get_sample_assets()
+        history = data.get("history", []) if data else []
+        
+        result = await asyncio.to_thread(performance_analytics.compute, assets, history, window)
+        if not series:
+            result = {
+                "portfolio": {**result["portfolio"], "series": None},
+                "assets": [{**stats, "series": None} for stats in result["assets"]]
+            }
+        return AnalyticsResponse(success=True, **result)
+    except Exception as e:
+        logger.error(f"❌ Error computing analytics: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error computing analytics: {str(e)}"
+        )
+
+
+@app.post("/projections/simulate", response_model=ProjectionResponse)
+async def simulate_projection(request: ProjectionRequest):
+    """
+    Monte Carlo projection of the portfolio.
+    
+    Monthly returns are bootstrapped from the portfolio's stored history
+    (at least 12 months); with less history they are drawn from a normal
+    distribution with `annualRate` and `annualVolatility`. Returns the
+    p5/p50/p95 value for every month and the chance of ending below the
+    invested capital. Large runs are cut at PROJECTION_LATENCY_BUDGET
+    seconds and report how many paths ran.
+    """
+    if request.paths > settings.PROJECTION_MAX_PATHS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many paths: {request.paths} (max {settings.PROJECTION_MAX_PATHS})"
+        )
+    
+    try:
+        data = await _load_data_from_gas()
+        assets = (data.get("assets") if data else None) or _get_sample_assets()
+        history = data.get("history", []) if data else []
+        
+        analytics = await asyncio.to_thread(performance_analytics.compute, assets, history)
+        returns = [
+            point["return"] / 100
+            for point in analytics["portfolio"]["series"]
+            if point["return"] is not None
+        ]
+        initial = request.initialCapital
+        if initial is None:
+            initial = (await asyncio.to_thread(PortfolioMetrics.compute, assets, history))["totalNAV"]
+        
+        result = await asyncio.to_thread(
+            projection_engine.simulate,
+            returns,
+            initial,
+            request.monthlyContribution,
+            request.months,
+            request.paths,
+            request.annualRate,
+            request.annualVolatility,
+            request.seed
+        )
+        return ProjectionResponse(
+            success=True,
+            initialCapital=initial,
+            monthlyContribution=request.monthlyContribution,
+            **result
+        )
+    except Exception as e:
+        logger.error(f"❌ Error simulating projection: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error simulating projection: {str(e)}"
+        )
+
+
+@app.get("/cache/stats")
+async def get_cache_stats():
+    """Price cache hit/miss counters and sizes, plus coalesced lookups"""
+    return {
+        "success": True,
+        "cache": price_cache.stats(),
+        "coalescing": price_flights.stats()
+    }
+
+
+@app.get("/history/status")
+async def get_history_status():
+    """Local history store contents and the state of its sync with GAS"""
+    if not _history_store_active():
+        return {"success": True, "enabled": False}
+    return {
+        "success": True,
+        "enabled": True,
+        "store": history_store.stats(),
+        "lastSync": datetime.fromtimestamp(history_sync.last_sync).isoformat() if history_sync.last_sync else None,
+        "lastError": history_sync.last_error
+    }
+
+
+@app.get("/internal/metrics", include_in_schema=False)
+async def get_internal_metrics(
+    authorization: Optional[str] = Header(None, include_in_schema=False)
+):
+    """Latency histograms, outcome counters and gauges in Prometheus text format"""
+    if not settings.INTERNAL_METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if settings.INTERNAL_METRICS_TOKEN:
+        expected = f"Bearer {settings.INTERNAL_METRICS_TOKEN}"
+        if not authorization or not secrets.compare_digest(authorization.encode(), expected.encode()):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+    return PlainTextResponse(instrumentation.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/sources/status")
+async def get_sources_status():
+    """Circuit breaker state per upstream source"""
+    return {
+        "success": True,
+        "sources": breaker_states()
+    }
+
+
+@app.get("/services/status")
+async def get_services_status():
+    """Lazily imported services and whether (and how fast) they have been loaded"""
+    return {
+        "success": True,
+        "services": service_registry.status()
+    }
+
+
+@app.get("/scheduler/status")
+async def get_scheduler_status():
+    """Scheduled tasks with their next and last run"""
+    return {
+        "success": True,
+        "tasks": scheduler.status()
+    }
+
+
 @app.get("/assets")
-async def get_assets():
-    """Get list of all assets from GAS"""
+async def get_assets(
+    request: Request,
+    category: Optional[str] = Query(None, description="Only assets of this category"),
+    archived: Optional[bool] = Query(None, description="Only archived (true) or active (false) assets"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (default: all)"),
+    cursor: Optional[str] = Query(None, description="nextCursor of the previous page"),
+    limit: Optional[int] = Query(None, ge=1, le=settings.LIST_MAX_PAGE_SIZE, description="Page size (default: all)")
+):
+    """
+    Get the assets from GAS, in document order.
+
+    Supports filters, cursor pagination, field projection and
+    If-None-Match (the response carries an ETag).
+    """
+    after = _decode_cursor(cursor, 1)
     try:
-        assets = await _load_assets_from_gas()
-        return {
-            "success": True,
-            "assets": assets
-        }
+        if await _history_store_ready():
+            rows = history_store.assets_page(
+                category, archived, after[0] if after else None, limit + 1 if limit else None
+            )
+            page, next_key = Listing.page(rows, lambda row: (row[0],), None, limit)
+        else:
+            rows = Listing.filter_assets(await _load_assets_from_gas(), category, archived)
+            page, next_key = Listing.page(rows, lambda row: (row[0],), after, limit)
+            
+        return _list_response(request, "assets", [asset for _, asset in page], next_key, fields)
+        
     except Exception as e:
         logger.error(f"❌ Error loading assets: {str(e)}")
         raise HTTPException(
@@ -246,8 +600,54 @@ async def get_assets():
         )
 
 
+@app.get("/history")
+async def get_history(
+    request: Request,
+    assetId: Optional[List[str]] = Query(None, description="Only these assets (repeatable)"),
+    start: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}$", description="First month (YYYY-MM)"),
+    end: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}$", description="Last month (YYYY-MM)"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (default: all)"),
+    cursor: Optional[str] = Query(None, description="nextCursor of the previous page"),
+    limit: int = Query(settings.LIST_PAGE_SIZE, ge=1, le=settings.LIST_MAX_PAGE_SIZE, description="Page size")
+):
+    """
+    Get the monthly history, ordered by (month, assetId).
+
+    Supports filters, cursor pagination, field projection and
+    If-None-Match (the response carries an ETag).
+    """
+    for value in (start, end):
+        if value:
+            try:
+                parse_month(value)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+    if start and end and start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    
+    after = _decode_cursor(cursor, 2)
+    try:
+        if await _history_store_ready():
+            rows = history_store.history_page(assetId, start, end, after, limit + 1)
+            page, next_key = Listing.page(rows, _history_key, None, limit)
+        else:
+            data = await _load_data_from_gas()
+            rows = Listing.filter_history(data.get("history", []), assetId, start, end)
+            page, next_key = Listing.page(rows, _history_key, after, limit)
+            
+        return _list_response(request, "history", page, next_key, fields)
+        
+    except Exception as e:
+        logger.error(f"❌ Error loading history: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error loading history: {str(e)}"
+        )
+
+
 # Helper functions
 
+@instrumentation.timed("gas_load_assets")
 async def _load_assets_from_gas() -> List[dict]:
     """
     Load assets from Google Apps Script.
@@ -258,12 +658,9 @@ async def _load_assets_from_gas() -> List[dict]:
         return _get_sample_assets()
     
     try:
-        response = requests.get(settings.GAS_URL, timeout=settings.TIMEOUT)
-        response.raise_for_status()
-        
-        data = response.json()
-        if data.get("success") and data.get("data"):
-            assets = data["data"].get("assets", [])
+        data = await _load_data_from_gas()
+        if data:
+            assets = data.get("assets", [])
             logger.info(f"✅ Loaded {len(assets)} assets from GAS")
             return assets
         else:
@@ -275,6 +672,187 @@ async def _load_assets_from_gas() -> List[dict]:
         return _get_sample_assets()
 
 
+def _validate_range(start: str, end: str) -> List[tuple]:
+    """(year, month) pairs between start and end, or HTTP 400 if the range is invalid"""
+    try:
+        start_month = parse_month(start)
+        end_month = parse_month(end)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid range: {start} → {end}"
+        )
+
+    months = iter_months(start_month, end_month)
+    invalid = [m for m in months if not validate_month(*m)]
+    if not months or invalid:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid range: {start} → {end}"
+        )
+    if len(months) > settings.FETCH_RANGE_MAX_MONTHS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Range too long: {len(months)} months (max {settings.FETCH_RANGE_MAX_MONTHS})"
+        )
+    return months
+
+
+async def _fetch_range(start: str, end: str, months: List[tuple]) -> FetchRangeResponse:
+    """Fetch and persist every month of a validated range"""
+    business_days = [get_last_business_day(year, month) for year, month in months]
+
+    assets = await _load_assets_from_gas()
+    logger.info(f"📦 Loaded {len(assets)} assets")
+
+    results = await fetch_engine.fetch_range(assets, business_days)
+
+    month_prices = []
+    history_entries = []
+    for (year, month), day in zip(months, business_days):
+        result = results[format_date(day)]
+        month_prices.append(MonthPrices(
+            year=year,
+            month=month,
+            lastBusinessDay=format_date(day),
+            prices=result.prices,
+            errors=result.errors
+        ))
+        history_entries.extend(_history_entries(result.prices, f"{year:04d}-{month:02d}"))
+
+    total = len(history_entries)
+    logger.info(f"✅ Fetched {total} prices across {len(months)} months")
+
+    # One merged write for the whole range
+    if history_entries and settings.GAS_URL:
+        await _persist_history_entries(history_entries)
+
+    return FetchRangeResponse(
+        success=total > 0,
+        message=f"Successfully fetched {total} prices for {len(months)} months" if total > 0 else "No prices were fetched",
+        start=start,
+        end=end,
+        months=month_prices,
+        errors=results[""].errors
+    )
+
+
+async def _finish_fetch_month(
+    year: int,
+    month: int,
+    last_business_day: datetime,
+    prices: List[PriceData],
+    errors: List[str]
+) -> FetchMonthResponse:
+    """Persist the fetched month to GAS and build the /fetch-month response"""
+    logger.info(f"✅ Fetched {len(prices)} prices successfully")
+
+    # Return error if no prices fetched - do NOT use test data
+    if len(prices) == 0:
+        logger.error("❌ No prices could be fetched from any source")
+        return FetchMonthResponse(
+            success=False,
+            message="No se pudieron obtener precios de ninguna fuente",
+            year=year,
+            month=month,
+            lastBusinessDay=format_date(last_business_day),
+            prices=[],
+            errors=errors if errors else ["No data available from Yahoo Finance, Morningstar, or Financial Times"]
+        )
+
+    # Only persist to GAS if we actually fetched prices
+    if prices and settings.GAS_URL:
+        with profiler.span("persist"):
+            await _persist_prices_to_gas(prices, year, month, last_business_day)
+
+    with profiler.span("build_response"):
+        return FetchMonthResponse(
+            success=len(prices) > 0,
+            message=f"Successfully fetched {len(prices)} prices" if len(prices) > 0 else "No prices were fetched",
+            year=year,
+            month=month,
+            lastBusinessDay=format_date(last_business_day),
+            prices=prices,
+            errors=errors
+        )
+
+
+async def _fetch_month_job(job: Job, params: dict) -> dict:
+    """Background /fetch-month, reporting each price or error as it arrives"""
+    year, month = params["year"], params["month"]
+    last_business_day = get_last_business_day(year, month)
+    assets = await _load_assets_from_gas()
+
+    prices: List[PriceData] = []
+    errors: List[str] = []
+    async for partial in fetch_engine.stream_month(assets, last_business_day):
+        prices.extend(partial.prices)
+        errors.extend(partial.errors)
+        job_queue.report(job, [p.model_dump() for p in partial.prices], partial.errors)
+
+    response = await _finish_fetch_month(year, month, last_business_day, prices, errors)
+    return response.model_dump()
+
+
+async def _fetch_range_job(job: Job, params: dict) -> dict:
+    """Background /fetch-range"""
+    months = _validate_range(params["start"], params["end"])
+    response = await _fetch_range(params["start"], params["end"], months)
+    return response.model_dump()
+
+
+def _job_response(job: Job) -> JobResponse:
+    def timestamp(value: Optional[float]) -> Optional[str]:
+        return format_datetime_iso(datetime.fromtimestamp(value)) if value else None
+
+    return JobResponse(
+        id=job.id,
+        kind=job.kind,
+        status=job.status,
+        params=job.params,
+        createdAt=timestamp(job.created_at),
+        startedAt=timestamp(job.started_at),
+        finishedAt=timestamp(job.finished_at),
+        prices=job.prices,
+        errors=job.errors,
+        result=job.result,
+        error=job.error
+    )
+
+
+job_queue.register("fetch-month", _fetch_month_job)
+job_queue.register("fetch-range", _fetch_range_job)
+
+
+async def _prewarm_month_end() -> str:
+    """
+    Fetch every asset's price for the month that is closing so the first
+    requests of the next month are served from the cache.
+
+    Runs on every tick of PREWARM_CRON but only acts on the month's last
+    business day. That day is sealed in the price cache first, so today's
+    closes are kept like any past date instead of expiring.
+    """
+    today = datetime.now()
+    last_business_day = get_last_business_day(today.year, today.month)
+    if today.date() != last_business_day.date():
+        return f"skipped: last business day is {format_date(last_business_day)}"
+
+    assets = await _load_assets_from_gas()
+    if settings.PREWARM_DRY_RUN:
+        lookups = fetch_engine.build_lookups(assets, last_business_day)
+        summary = f"dry run: would fetch {len(assets)} assets in {len(lookups)} lookups for {format_date(last_business_day)}"
+        logger.info(f"🧪 Prewarm {summary}")
+        return summary
+
+    logger.info(f"🔥 Pre-warming prices for {format_date(last_business_day)}")
+    price_cache.seal(last_business_day)
+    result = await fetch_engine.fetch_month(assets, last_business_day)
+    summary = f"cached {len(result.prices)} prices for {format_date(last_business_day)}, {len(result.errors)} errors"
+    logger.info(f"🔥 Prewarm {summary}")
+    return summary
+
+
 async def _persist_prices_to_gas(
     prices: List[PriceData],
     year: Optional[int] = None,
@@ -289,47 +867,54 @@ async def _persist_prices_to_gas(
         logger.warning("⚠️ GAS URL not configured, cannot persist prices")
         return False
     
-    try:
-        logger.info(f"📤 Persisting {len(prices)} prices to GAS")
-        
-        # Format prices for persistence
-        month_str = f"{year:04d}-{month:02d}" if year and month else datetime.now().strftime("%Y-%m")
-        
-        history_entries = []
-        for price in prices:
-            entry = {
-                "month": month_str,
-                "assetId": price.assetId,
-                "nav": price.price,
-                "contribution": price.price,  # Will be updated by frontend if needed
-                "source": price.source,
-                "date": price.fetchedAt
-            }
-            history_entries.append(entry)
-        
-        # Load current data from GAS
-        current_data = await _load_data_from_gas()
-        
-        # Merge with existing history
-        if current_data:
-            existing_history = current_data.get("history", [])
-            history_entries = merge_price_updates(existing_history, history_entries)
-        
-        # Prepare payload
-        payload = {
-            "action": "updateHistory",
-            "history": history_entries,
-            "timestamp": format_datetime_iso(datetime.now())
+    month_str = f"{year:04d}-{month:02d}" if year and month else datetime.now().strftime("%Y-%m")
+    return await _persist_history_entries(_history_entries(prices, month_str))
+
+
+def _stream_record(record_type: str, data, format: str) -> str:
+    """Encode one streamed record as an NDJSON line or an SSE event"""
+    if format == "sse":
+        return f"event: {record_type}\ndata: {json.dumps(data)}\n\n"
+    return json.dumps({"type": record_type, "data": data}) + "\n"
+
+
+def _history_entries(prices: List[PriceData], month_str: str) -> List[dict]:
+    """Format prices as history entries for the given YYYY-MM month"""
+    return [
+        {
+            "month": month_str,
+            "assetId": price.assetId,
+            "nav": price.price,
+            "contribution": price.price,  # Will be updated by frontend if needed
+            "source": price.source,
+            "date": price.fetchedAt
         }
-        
-        # Send to GAS
-        response = requests.post(
-            settings.GAS_URL,
-            json=payload,
-            timeout=settings.TIMEOUT
-        )
-        response.raise_for_status()
-        
+        for price in prices
+    ]
+
+
+@instrumentation.timed("gas_persist_history", failed=lambda persisted: not persisted)
+async def _persist_history_entries(history_entries: List[dict]) -> bool:
+    """
+    Upsert history entries into GAS in a single write.
+    Entries may span several months.
+
+    With the local history store enabled the entries are written there
+    and pushed to GAS by the background sync.
+    """
+    if not settings.GAS_URL:
+        logger.warning("⚠️ GAS URL not configured, cannot persist prices")
+        return False
+    
+    if _history_store_active():
+        history_store.upsert_history(history_entries)
+        history_sync.kick()
+        logger.info(f"💾 Stored {len(history_entries)} prices locally, GAS sync queued")
+        return True
+    
+    try:
+        logger.info(f"📤 Persisting {len(history_entries)} prices to GAS")
+        await gas_client.write_history(history_entries)
         logger.info("✅ Prices persisted to GAS")
         return True
         
@@ -338,21 +923,132 @@ async def _persist_prices_to_gas(
         return False
 
 
+@instrumentation.timed("gas_load_data")
 async def _load_data_from_gas() -> dict:
-    """Load full data structure from GAS"""
+    """Load full data structure from GAS (through the local history store when enabled)"""
     if not settings.GAS_URL:
         return {}
     
+    if await _history_store_ready():
+        return history_store.document()
+    
     try:
-        response = requests.get(settings.GAS_URL, timeout=settings.TIMEOUT)
-        response.raise_for_status()
-        data = response.json()
-        return data.get("data", {}) if data.get("success") else {}
+        return await gas_client.load()
     except Exception as e:
         logger.error(f"Error loading data from GAS: {str(e)}")
         return {}
 
 
+async def _warm_up_services() -> None:
+    """Import the services listed in SERVICE_WARMUP in a thread while the app starts serving"""
+    names = None if settings.SERVICE_WARMUP == "all" else [
+        name.strip() for name in settings.SERVICE_WARMUP.split(",") if name.strip()
+    ]
+    try:
+        timings = await asyncio.to_thread(service_registry.warm_up, names)
+        logger.info(f"🔥 Services warmed up in {sum(timings.values()) * 1000:.0f} ms: {', '.join(timings)}")
+    except Exception as e:
+        logger.error(f"❌ Service warm-up failed: {str(e)}")
+
+
+def _history_store_active() -> bool:
+    return bool(settings.GAS_URL) and history_store.enabled
+
+
+async def _history_store_ready() -> bool:
+    """Whether reads can be served from the local history store (loading it on first use)"""
+    if not _history_store_active():
+        return False
+    try:
+        await history_sync.ensure_loaded()
+    except Exception as e:
+        logger.error(f"❌ Error loading history store from GAS: {str(e)}")
+    return history_store.is_loaded
+
+
+def _profile_mode(mode: Optional[str], token: Optional[str]) -> Optional[str]:
+    """Validate a profiling request (400 for an unknown mode, 403 without a valid admin token)"""
+    try:
+        return profiler.authorize(mode, token)
+    except PermissionError as e:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+async def _profiled_response(run, mode: str, result) -> JSONResponse:
+    """The response with its profile inline, or with the saved profile's id in X-Profile-Id"""
+    body = jsonable_encoder(result)
+    if mode == "save":
+        profile_id = await asyncio.to_thread(profiler.save, run)
+        return JSONResponse(body, headers={"X-Profile-Id": profile_id})
+    return JSONResponse({**body, "profile": run.report()})
+
+
+def _decode_cursor(cursor: Optional[str], size: int) -> Optional[tuple]:
+    """Sort key carried by a list cursor, or HTTP 400 if it isn't one of ours"""
+    if not cursor:
+        return None
+    try:
+        return Listing.decode_cursor(cursor, size)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _history_key(entry: dict) -> tuple:
+    return str(entry.get("month")), str(entry.get("assetId"))
+
+
+def _list_response(
+    request: Request,
+    name: str,
+    items: List[dict],
+    next_key: Optional[tuple],
+    fields: Optional[str]
+) -> Response:
+    """
+    List body with projected items and the next page's cursor, tagged with
+    an ETag; answers 304 when the client already has this exact body
+    """
+    wanted = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    body = {
+        "success": True,
+        name: Listing.project(items, wanted),
+        "nextCursor": Listing.encode_cursor(next_key) if next_key else None
+    }
+    headers = {"ETag": Listing.etag(body), "Cache-Control": "no-cache"}
+    if Listing.etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return JSONResponse(content=body, headers=headers)
+
+
+def _collect_service_metrics() -> List[str]:
+    """Price cache, coalescing and breaker values for /internal/metrics"""
+    cache = price_cache.stats()
+    flights = price_flights.stats()
+    family = Instrumentation.family
+    return [
+        *family("wealthhub_price_cache_hits_total", "counter", "Price cache hits", [({}, cache["hits"])]),
+        *family("wealthhub_price_cache_misses_total", "counter", "Price cache misses", [({}, cache["misses"])]),
+        *family("wealthhub_price_cache_hit_ratio", "gauge", "Price cache hits over lookups", [({}, cache["hitRatio"])]),
+        *family("wealthhub_price_cache_entries", "gauge", "Cached prices", [
+            ({"tier": "memory"}, cache["memoryEntries"]),
+            ({"tier": "disk"}, cache["diskEntries"]),
+        ]),
+        *family("wealthhub_coalesced_calls_total", "counter", "Price lookups that ran (leader) or joined one in flight (shared)", [
+            ({"role": "leader"}, flights["leaders"]),
+            ({"role": "shared"}, flights["shared"]),
+        ]),
+        *family("wealthhub_coalesced_in_flight", "gauge", "Coalesced price lookups in progress", [({}, flights["inFlight"])]),
+        *family("wealthhub_circuit_open", "gauge", "1 while a source's breaker is open or half-open", [
+            ({"source": source}, int(state["state"] != "closed")) for source, state in breaker_states().items()
+        ]),
+    ]
+
+
+instrumentation.add_collector(_collect_service_metrics)
+
+
 def _get_sample_assets() -> List[dict]:
     """Return sample assets for development/testing"""
     return [
@@ -113,6 +113,210 @@ class FetchMonthResponse(BaseModel):
         }
 
 
+class MonthPrices(BaseModel):
+    """Prices fetched for a single month of a range"""
+    year: int
+    month: int
+    lastBusinessDay: str  # Date in YYYY-MM-DD format
+    prices: List[PriceData]
+    errors: List[str] = []
+
+
+class FetchRangeResponse(BaseModel):
+    """Response model for /fetch-range endpoint"""
+    success: bool
+    message: str
+    start: str  # Format: YYYY-MM
+    end: str  # Format: YYYY-MM
+    months: List[MonthPrices]
+    errors: List[str] = []
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "success": True,
+                "message": "Successfully fetched 48 prices for 24 months",
+                "start": "2023-01",
+                "end": "2024-12",
+                "months": [],
+                "errors": []
+            }
+        }
+
+
+class JobResponse(BaseModel):
+    """Status of a background job (/jobs endpoints)"""
+    id: str
+    kind: str  # "fetch-month" or "fetch-range"
+    status: str  # queued, running, done or failed
+    params: dict
+    createdAt: str
+    startedAt: Optional[str] = None
+    finishedAt: Optional[str] = None
+    prices: List[PriceData] = []  # Partial results, filled while running
+    errors: List[str] = []
+    result: Optional[dict] = None  # Body of the equivalent endpoint once done
+    error: Optional[str] = None
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "id": "3f2c9a7e0b5d4c1e8a6f2d9b7c4e1a05",
+                "kind": "fetch-month",
+                "status": "running",
+                "params": {"year": 2024, "month": 2},
+                "createdAt": "2024-03-01T09:00:00",
+                "startedAt": "2024-03-01T09:00:00",
+                "finishedAt": None,
+                "prices": [],
+                "errors": [],
+                "result": None,
+                "error": None
+            }
+        }
+
+
+class AssetMetrics(BaseModel):
+    """Computed metrics for one asset"""
+    assetId: str
+    name: Optional[str] = None
+    category: Optional[str] = None
+    lastMonth: Optional[str] = None  # Latest month with history (YYYY-MM)
+    nav: float
+    invested: float
+    profit: float
+    roi: float  # Percentage
+    allocation: float  # Percentage of total NAV
+    targetAllocation: Optional[float] = None
+    allocationGap: Optional[float] = None  # allocation - targetAllocation
+
+
+class MetricsResponse(BaseModel):
+    """Response model for /metrics endpoint"""
+    success: bool
+    totalNAV: float
+    totalInv: float
+    totalProfit: float
+    roi: float  # Percentage
+    liquidez: float  # baseAmount of the Cash asset
+    assets: List[AssetMetrics]
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "success": True,
+                "totalNAV": 10500.0,
+                "totalInv": 10000.0,
+                "totalProfit": 500.0,
+                "roi": 5.0,
+                "liquidez": 1500.0,
+                "assets": [
+                    {
+                        "assetId": "asset-1",
+                        "name": "Bitcoin",
+                        "category": "Crypto",
+                        "lastMonth": "2024-02",
+                        "nav": 5300.0,
+                        "invested": 5000.0,
+                        "profit": 300.0,
+                        "roi": 6.0,
+                        "allocation": 50.48,
+                        "targetAllocation": 30,
+                        "allocationGap": 20.48
+                    }
+                ]
+            }
+        }
+
+
+class RollingReturns(BaseModel):
+    """Rolling compounded returns over `window` months (percentages)"""
+    window: int
+    latest: Optional[float] = None
+    best: Optional[float] = None
+    worst: Optional[float] = None
+
+
+class PerformancePoint(BaseModel):
+    """One month of a performance series (percentages)"""
+    month: str  # Format: YYYY-MM
+    return_: Optional[float] = Field(None, alias="return")
+    drawdown: Optional[float] = None
+    rolling: Optional[float] = None
+    
+    class Config:
+        populate_by_name = True
+
+
+class PerformanceStats(BaseModel):
+    """Return analytics for one asset or the whole portfolio (percentages)"""
+    assetId: str
+    name: Optional[str] = None
+    firstMonth: Optional[str] = None
+    lastMonth: Optional[str] = None
+    months: int  # Monthly returns available
+    twr: Optional[float] = None  # Time-weighted, cumulative
+    twrAnnualized: Optional[float] = None  # Only with 12+ months
+    mwr: Optional[float] = None  # Money-weighted (XIRR), annual
+    volatility: Optional[float] = None  # Annualized
+    maxDrawdown: Optional[float] = None
+    currentDrawdown: Optional[float] = None
+    rolling: RollingReturns
+    series: Optional[List[PerformancePoint]] = None
+
+
+class AnalyticsResponse(BaseModel):
+    """Response model for /analytics endpoint"""
+    success: bool
+    portfolio: PerformanceStats
+    assets: List[PerformanceStats]
+
+
+class ProjectionRequest(BaseModel):
+    """Request body for /projections/simulate"""
+    months: int = Field(120, ge=1, le=600)
+    monthlyContribution: float = Field(0.0, ge=0)
+    initialCapital: Optional[float] = Field(None, ge=0)  # Defaults to the current portfolio NAV
+    paths: int = Field(10000, ge=100)
+    annualRate: float = 7.0  # % per year, used only when history is too short
+    annualVolatility: float = Field(15.0, ge=0)  # % per year, same
+    seed: Optional[int] = None
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "months": 120,
+                "monthlyContribution": 500,
+                "initialCapital": 10000,
+                "paths": 10000
+            }
+        }
+
+
+class ProjectionBand(BaseModel):
+    """Percentiles of the simulated value at the end of a month"""
+    monthIndex: int
+    invested: float
+    p5: float
+    p50: float
+    p95: float
+
+
+class ProjectionResponse(BaseModel):
+    """Response model for /projections/simulate endpoint"""
+    success: bool
+    method: str  # "bootstrap" (history) or "normal" (annualRate/annualVolatility)
+    historyMonths: int
+    initialCapital: float
+    monthlyContribution: float
+    requestedPaths: int
+    paths: int  # Paths actually simulated within the latency budget
+    truncated: bool
+    elapsedMs: float
+    probabilityOfLoss: float  # % of paths ending below the invested capital
+    bands: List[ProjectionBand]
+
+
 class HealthResponse(BaseModel):
     """Health check response"""
     status: str
@@ -1,9 +1,58 @@
 """
 Services package for WealthHub Backend
 Contains external API integrations and data fetching logic
+
+Services backed by pandas, NumPy or lxml are resolved on first access,
+so importing the package doesn't import those libraries.
 """
 
-from .price_fetcher import PriceFetcher
-from .fund_scraper import FundScraper
+import importlib
+
+from .fetch_engine import FetchEngine, FetchResult
+from .price_cache import PriceCache, price_cache
+from .series_store import DailySeriesStore
+from .http_client import HttpClients, http_clients
+from .resilience import CircuitBreaker, CircuitOpenError, breaker_states
+from .singleflight import SingleFlight, price_flights
+from .jobs import Job, JobQueue, job_queue
+from .history_store import HistoryStore, HistorySync, history_store, history_sync
+from .listing import InvalidCursor, Listing
+from .scheduler import CronSchedule, Scheduler
+from .registry import LazyService, ServiceRegistry, service_registry
+from .instrumentation import Instrumentation, InstrumentationMiddleware, instrumentation
+from .profiling import Profiler, RequestProfile, profiler
+
+_LAZY_EXPORTS = {
+    "PriceFetcher": ".price_fetcher",
+    "FundScraper": ".fund_scraper",
+    "PortfolioMetrics": ".metrics",
+    "PerformanceAnalytics": ".analytics",
+    "performance_analytics": ".analytics",
+    "MonteCarloEngine": ".projections",
+    "projection_engine": ".projections",
+}
+
+__all__ = [
+    "PriceFetcher", "FundScraper", "FetchEngine", "FetchResult",
+    "PriceCache", "price_cache", "DailySeriesStore",
+    "HttpClients", "http_clients",
+    "CircuitBreaker", "CircuitOpenError", "breaker_states",
+    "SingleFlight", "price_flights",
+    "Job", "JobQueue", "job_queue",
+    "HistoryStore", "HistorySync", "history_store", "history_sync",
+    "InvalidCursor", "Listing",
+    "CronSchedule", "Scheduler",
+    "LazyService", "ServiceRegistry", "service_registry",
+    "Instrumentation", "InstrumentationMiddleware", "instrumentation",
+    "Profiler", "RequestProfile", "profiler",
+    "PortfolioMetrics", "PerformanceAnalytics", "performance_analytics",
+    "MonteCarloEngine", "projection_engine"
+]
+
 
-__all__ = ["PriceFetcher", "FundScraper"]
+def __getattr__(name: str):
+    if name not in _LAZY_EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,269 @@
+"""
+Performance analytics for WealthHub Backend
+Time- and money-weighted returns, volatility, drawdowns and rolling
+returns per asset and for the whole portfolio, computed column-wise over
+the month x asset matrix
+"""
+
+import hashlib
+import logging
+import threading
+import warnings
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils import iter_months, parse_month
+from .metrics import CASH_ASSET_NAME, PortfolioMetrics
+
+logger = logging.getLogger(__name__)
+
+PORTFOLIO_ID = "portfolio"
+
+
+class PerformanceAnalytics:
+    """
+    Return analytics over the monthly history.
+
+    Each history row is an end-of-month `nav` plus the `contribution`
+    made during that month. Contributions are treated as made at the
+    start of the month, so the return of month t is
+
+        (nav[t] - nav[t-1] - contribution[t]) / (nav[t-1] + contribution[t])
+
+    The first NAV of each asset (and of the portfolio) is the opening
+    value the returns are measured from, so that month has no return of
+    its own. Like PortfolioMetrics, only active (not archived), non-cash
+    assets are included.
+
+    - TWR chains those monthly returns (flows don't move it)
+    - MWR is the XIRR of the contributions against the latest NAV
+    - Volatility is the annualized standard deviation of monthly returns
+    - Drawdowns and rolling returns are taken on the TWR growth index
+
+    Results are cached per asset under a fingerprint of that asset's rows,
+    so a request only recomputes the assets whose history changed (and the
+    portfolio, if any did).
+    """
+
+    def __init__(self):
+        self._cache: Dict[Tuple[str, int], Tuple[str, dict]] = {}
+        self._lock = threading.Lock()
+        self.computed = 0
+        self.reused = 0
+
+    def compute(self, assets: List[dict], history: List[dict], window: int = 12) -> dict:
+        """
+        Analytics for every asset with history and for the portfolio.
+
+        Args:
+            assets: Raw asset dicts as stored in GAS (for names; archived
+                assets and the Cash asset are left out)
+            history: Raw history entries as stored in GAS
+            window: Months per rolling return
+
+        Returns:
+            {"portfolio": stats, "assets": [stats, ...]}; every stats dict
+            includes a per-month `series`
+        """
+        names = {
+            str(a.get("id")): a.get("name") for a in assets
+            if not a.get("archived") and a.get("name") != CASH_ASSET_NAME
+        }
+        rows = [h for h in history if str(h.get("assetId")) in names]
+        fingerprints = _fingerprints(rows)
+        portfolio_fingerprint = _digest(sorted(fingerprints.items()))
+
+        with self._lock:
+            stale = [
+                asset_id for asset_id, fingerprint in fingerprints.items()
+                if self._cache.get((asset_id, window), ("",))[0] != fingerprint
+            ]
+            portfolio_stale = self._cache.get((PORTFOLIO_ID, window), ("",))[0] != portfolio_fingerprint
+        self.reused += len(fingerprints) - len(stale)
+
+        if stale or portfolio_stale:
+            matrices = PortfolioMetrics.pivot(rows)
+            nav, contribution = _complete_months(matrices["nav"], matrices["contribution"])
+
+            columns = {}
+            if stale:
+                columns.update(_analyze(nav[stale], contribution[stale], window))
+            if portfolio_stale:
+                portfolio_nav = nav.ffill().sum(axis=1, min_count=1).to_frame(PORTFOLIO_ID)
+                portfolio_contribution = contribution.sum(axis=1).to_frame(PORTFOLIO_ID)
+                columns.update(_analyze(portfolio_nav, portfolio_contribution, window))
+                columns.setdefault(PORTFOLIO_ID, _empty_stats(window))  # No history left
+            self.computed += len(columns)
+
+            with self._lock:
+                for column, stats in columns.items():
+                    fingerprint = portfolio_fingerprint if column == PORTFOLIO_ID else fingerprints[column]
+                    self._cache[(column, window)] = (fingerprint, stats)
+
+        with self._lock:
+            portfolio = self._cache.get((PORTFOLIO_ID, window), (None, _empty_stats(window)))[1]
+            per_asset = [
+                {**self._cache[(asset_id, window)][1], "assetId": asset_id, "name": names.get(asset_id)}
+                for asset_id in sorted(fingerprints)
+            ]
+        return {
+            "portfolio": {**portfolio, "assetId": PORTFOLIO_ID, "name": "Portfolio"},
+            "assets": per_asset,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+
+def _fingerprints(history: List[dict]) -> Dict[str, str]:
+    """Digest of each asset's (month, nav, contribution) rows"""
+    rows: Dict[str, list] = {}
+    for entry in history:
+        rows.setdefault(str(entry.get("assetId")), []).append(
+            (str(entry.get("month")), entry.get("nav"), entry.get("contribution"))
+        )
+    return {asset_id: _digest(sorted(asset_rows, key=repr)) for asset_id, asset_rows in rows.items()}
+
+
+def _digest(value) -> str:
+    return hashlib.sha1(repr(value).encode()).hexdigest()
+
+
+def _complete_months(nav: pd.DataFrame, contribution: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Reindex both matrices to every month between the first and last one"""
+    if nav.empty:
+        return nav, contribution
+    first, last = parse_month(nav.index[0]), parse_month(nav.index[-1])
+    months = [f"{y:04d}-{m:02d}" for y, m in iter_months(first, last)]
+    return (
+        nav.reindex(months),
+        contribution.reindex(index=months, columns=nav.columns, fill_value=0.0),
+    )
+
+
+def _analyze(nav: pd.DataFrame, contribution: pd.DataFrame, window: int) -> Dict[str, dict]:
+    """Stats for every column of the (month x column) matrices at once"""
+    if nav.empty:
+        return {}
+    months = list(nav.index)
+    started = nav.notna().cummax()  # Months since the column's first NAV
+    nav_filled = nav.ffill().to_numpy(dtype="float64")
+    flows = contribution.fillna(0.0).to_numpy(dtype="float64")
+    active = started.to_numpy()
+    opening = active & ~np.vstack([np.zeros((1, active.shape[1]), dtype=bool), active[:-1]])
+
+    previous = np.vstack([np.zeros((1, nav_filled.shape[1])), nav_filled[:-1]])
+    previous = np.nan_to_num(previous)
+    base = previous + flows
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = np.where(active & ~opening & (base > 0), (nav_filled - base) / base, np.nan)
+
+    growth = np.nancumprod(1 + returns, axis=0)
+    growth[~active] = np.nan
+    peaks = np.fmax.accumulate(growth, axis=0)
+    drawdowns = growth / peaks - 1
+
+    rolling = np.full_like(growth, np.nan)
+    if len(months) > window:
+        rolling[window:] = growth[window:] / growth[:-window] - 1
+
+    periods = np.sum(~np.isnan(returns), axis=0)
+    twr = growth[-1] - 1  # nancumprod carries the index through months without a return
+    with np.errstate(invalid="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # nanstd of columns with under two returns
+        twr_annualized = np.where(periods >= 12, (1 + twr) ** (12 / np.maximum(periods, 1)) - 1, np.nan)
+        volatility = np.nanstd(np.where(periods > 1, returns, np.nan), axis=0, ddof=1) * np.sqrt(12)
+    mwr = _xirr(flows, nav_filled, active)
+
+    results = {}
+    for j, column in enumerate(nav.columns):
+        valid = active[:, j]
+        if not valid.any():
+            results[column] = _empty_stats(window)
+            continue
+        column_rolling = rolling[:, j][~np.isnan(rolling[:, j])]
+        results[column] = {
+            "firstMonth": months[int(np.argmax(valid))],
+            "lastMonth": nav.iloc[:, j].last_valid_index(),
+            "months": int(periods[j]),
+            "twr": _pct(twr[j]),
+            "twrAnnualized": _pct(twr_annualized[j]),
+            "mwr": _pct(mwr[j]),
+            "volatility": _pct(volatility[j]),
+            "maxDrawdown": _pct(np.nanmin(drawdowns[:, j])),
+            "currentDrawdown": _pct(drawdowns[-1, j]),
+            "rolling": {
+                "window": window,
+                "latest": _pct(column_rolling[-1]) if len(column_rolling) else None,
+                "best": _pct(column_rolling.max()) if len(column_rolling) else None,
+                "worst": _pct(column_rolling.min()) if len(column_rolling) else None,
+            },
+            "series": [
+                {
+                    "month": months[i],
+                    "return": _pct(returns[i, j]),
+                    "drawdown": _pct(drawdowns[i, j]),
+                    "rolling": _pct(rolling[i, j]),
+                }
+                for i in range(len(months)) if valid[i]
+            ],
+        }
+    return results
+
+
+def _xirr(flows: np.ndarray, nav: np.ndarray, active: np.ndarray, iterations: int = 200) -> np.ndarray:
+    """
+    Annual money-weighted return of every column, by bisection on all
+    columns at once. Contributions are outflows at the start of their
+    month; the last NAV is an inflow at the end of the last month.
+    """
+    months, columns = flows.shape
+    cash_flows = np.zeros((months + 1, columns))
+    cash_flows[:months] = -np.where(active, flows, 0.0)
+    last_nav = np.nan_to_num(nav[-1]) if months else np.zeros(columns)
+    cash_flows[months] += last_nav
+    years = np.arange(months + 1, dtype="float64") / 12
+
+    def npv(rate: np.ndarray) -> np.ndarray:
+        return np.sum(cash_flows * (1 + rate) ** -years[:, None], axis=0)
+
+    low = np.full(columns, -0.9999)
+    high = np.full(columns, 100.0)
+    npv_low = npv(low)
+    solvable = np.sign(npv_low) * np.sign(npv(high)) < 0
+    for _ in range(iterations):
+        mid = (low + high) / 2
+        npv_mid = npv(mid)
+        same_side = np.sign(npv_mid) == np.sign(npv_low)
+        low = np.where(same_side, mid, low)
+        npv_low = np.where(same_side, npv_mid, npv_low)
+        high = np.where(same_side, high, mid)
+    return np.where(solvable, (low + high) / 2, np.nan)
+
+
+def _pct(value) -> Optional[float]:
+    if value is None or not np.isfinite(value):
+        return None
+    return round(float(value) * 100, 2)
+
+
+def _empty_stats(window: int) -> dict:
+    return {
+        "firstMonth": None,
+        "lastMonth": None,
+        "months": 0,
+        "twr": None,
+        "twrAnnualized": None,
+        "mwr": None,
+        "volatility": None,
+        "maxDrawdown": None,
+        "currentDrawdown": None,
+        "rolling": {"window": window, "latest": None, "best": None, "worst": None},
+        "series": [],
+    }
+
+
+performance_analytics = PerformanceAnalytics()
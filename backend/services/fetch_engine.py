@@ -0,0 +1,392 @@
+"""
+Concurrent fetch engine for WealthHub Backend
+Fans out per-asset price lookups with a concurrency limit per source
+and a total deadline for the whole batch
+"""
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from config import settings
+from models import PriceData
+from utils import chunk_list, crypto_base, format_date
+from .instrumentation import instrumentation
+from .profiling import profiler
+from .registry import service_registry
+
+logger = logging.getLogger(__name__)
+
+# bs4/lxml are imported on the first lookup
+PriceFetcher = service_registry.lazy("price_fetcher")
+FundScraper = service_registry.lazy("fund_scraper")
+
+
+@dataclass
+class FetchResult:
+    """Prices and errors collected by one or more lookups"""
+    prices: List[PriceData] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+
+    def extend(self, other: "FetchResult") -> None:
+        self.prices.extend(other.prices)
+        self.errors.extend(other.errors)
+
+
+@dataclass
+class _Lookup:
+    """A single unit of work: one source call for one or more assets"""
+    source: str
+    labels: List[str]
+    call: Callable[[], Any]
+    blocking: bool = True  # Blocking calls run on the thread pool, others are awaited
+
+
+def classify_assets(assets: List[dict]) -> Tuple[List[dict], List[dict], List[dict]]:
+    """
+    Split assets into crypto, fund and stock groups.
+
+    Args:
+        assets: Raw asset dicts as stored in GAS
+
+    Returns:
+        Tuple of (crypto_assets, fund_assets, stock_assets)
+    """
+    crypto_assets = [a for a in assets if is_crypto(a)]
+    fund_assets = [a for a in assets if a.get("isin") and len(str(a.get("isin"))) == 12]
+    stock_assets = [a for a in assets if a.get("ticker") and not is_crypto(a) and a.get("category") in ["Stock", "Stocks"]]
+    return crypto_assets, fund_assets, stock_assets
+
+
+def is_crypto(asset: dict) -> bool:
+    """Crypto assets have category "Crypto" and a ticker; BTC tickers count in any category"""
+    base = crypto_base(asset.get("ticker"))
+    if asset.get("category") == "Crypto":
+        return bool(base)
+    return base == "BTC"
+
+
+class FetchEngine:
+    """
+    Runs every per-asset lookup at the same time.
+
+    HTTP sources (FT, Binance) are awaited directly on the shared async
+    clients. Yahoo downloads are blocking, so stock lookups run on a dedicated
+    thread pool while the event loop stays free. Each source gets its own
+    semaphore so a large fund list can't starve stocks or hammer a single
+    upstream.
+    """
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, int]] = None,
+        deadline: Optional[float] = None
+    ):
+        self.limits = limits or {
+            "crypto": settings.FETCH_CONCURRENCY_CRYPTO,
+            "funds": settings.FETCH_CONCURRENCY_FUNDS,
+            "stocks": settings.FETCH_CONCURRENCY_STOCKS,
+        }
+        self.deadline = deadline if deadline is not None else settings.FETCH_DEADLINE
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, sum(self.limits.values())),
+            thread_name_prefix="fetch"
+        )
+
+    def build_lookups(self, assets: List[dict], date: datetime) -> List[_Lookup]:
+        """Turn the asset list into independent lookups"""
+        with profiler.span("classify"):
+            crypto_assets, fund_assets, stock_assets = classify_assets(assets)
+        logger.info(f"🔍 Found: {len(crypto_assets)} crypto, {len(fund_assets)} funds, {len(stock_assets)} stocks")
+
+        lookups: List[_Lookup] = []
+
+        if crypto_assets:
+            # Every coin in one batched lookup
+            lookups.append(_Lookup(
+                "crypto",
+                [_crypto_label(asset) for asset in crypto_assets],
+                lambda: _fetch_crypto(crypto_assets, date),
+                blocking=False
+            ))
+
+        for fund in fund_assets:
+            lookups.append(_Lookup(
+                "funds",
+                [f"{fund.get('name')} ({fund.get('isin')})"],
+                lambda fund=fund: _fetch_fund(fund, date),
+                blocking=False
+            ))
+
+        tickers_map = {
+            a["ticker"]: (a["name"], a["id"])
+            for a in stock_assets if a.get("ticker")
+        }
+        # Stocks are looked up in batches, one lookup (and thread) per batch
+        for batch in chunk_list(list(tickers_map.keys()), settings.STOCK_BATCH_SIZE):
+            batch_map = {ticker: tickers_map[ticker] for ticker in batch}
+            lookups.append(_Lookup(
+                "stocks",
+                batch,
+                lambda batch_map=batch_map: _fetch_stocks(batch_map, date)
+            ))
+
+        return lookups
+
+    async def fetch_month(self, assets: List[dict], date: datetime) -> FetchResult:
+        """
+        Fetch prices for all assets concurrently.
+
+        Args:
+            assets: Raw asset dicts as stored in GAS
+            date: Date to fetch prices for
+
+        Returns:
+            FetchResult with prices in asset order and one error per failed
+            or timed-out lookup
+        """
+        lookups = self.build_lookups(assets, date)
+        result = FetchResult()
+
+        outcomes = await self._gather(lookups)
+        with profiler.span("merge"):
+            for lookup, outcome, value in outcomes:
+                if outcome == "ok":
+                    result.extend(value)
+                else:
+                    result.errors.extend(_lookup_errors(lookup, outcome))
+
+        return result
+
+    async def fetch_range(self, assets: List[dict], dates: List[datetime]) -> Dict[str, FetchResult]:
+        """
+        Fetch prices for all assets for several dates in one pass.
+
+        Each stock batch (and the crypto batch) downloads its daily series
+        once for the whole span and every date's close is picked out of it.
+        FT only publishes the latest NAV, so each ISIN is scraped once and
+        the price is assigned to the most recent date only.
+
+        Args:
+            assets: Raw asset dicts as stored in GAS
+            dates: Dates to fetch prices for (one per month)
+
+        Returns:
+            Dict of FetchResult keyed by YYYY-MM-DD date, plus an "" entry
+            collecting errors that don't belong to a single date
+        """
+        results: Dict[str, FetchResult] = {format_date(d): FetchResult() for d in dates}
+        results[""] = FetchResult()
+        if not dates:
+            return results
+
+        crypto_assets, fund_assets, stock_assets = classify_assets(assets)
+        logger.info(f"🔍 Found: {len(crypto_assets)} crypto, {len(fund_assets)} funds, {len(stock_assets)} stocks")
+
+        tickers_map = {
+            a["ticker"]: (a["name"], a["id"])
+            for a in stock_assets if a.get("ticker")
+        }
+
+        lookups: List[_Lookup] = []
+        if crypto_assets:
+            lookups.append(_Lookup(
+                "crypto",
+                [_crypto_label(asset) for asset in crypto_assets],
+                lambda: _fetch_crypto_range(crypto_assets, dates),
+                blocking=False
+            ))
+        for batch in chunk_list(list(tickers_map.keys()), settings.STOCK_BATCH_SIZE):
+            batch_map = {ticker: tickers_map[ticker] for ticker in batch}
+            lookups.append(_Lookup(
+                "stocks",
+                batch,
+                lambda batch_map=batch_map: _fetch_stock_range(batch_map, dates)
+            ))
+
+        # One scrape per ISIN, shared by every asset holding it
+        funds_by_isin: Dict[str, List[dict]] = {}
+        for fund in fund_assets:
+            funds_by_isin.setdefault(fund["isin"], []).append(fund)
+        latest = max(dates)
+        for isin, funds in funds_by_isin.items():
+            lookups.append(_Lookup(
+                "funds",
+                [f"{fund.get('name')} ({isin})" for fund in funds],
+                lambda funds=funds: _fetch_fund_range(funds, latest, len(dates) > 1),
+                blocking=False
+            ))
+
+        for lookup, outcome, value in await self._gather(lookups):
+            if outcome != "ok":
+                results[""].errors.extend(_lookup_errors(lookup, outcome))
+                continue
+            for key, partial in value.items():
+                results.setdefault(key, FetchResult()).extend(partial)
+
+        return results
+
+    async def stream_month(self, assets: List[dict], date: datetime) -> AsyncIterator[FetchResult]:
+        """
+        Like fetch_month, but yields each lookup's result as soon as it
+        resolves (timed-out lookups are yielded as errors at the deadline).
+        """
+        lookups = self.build_lookups(assets, date)
+        async for lookup, outcome, value in self._as_completed(lookups):
+            if outcome == "ok":
+                yield value
+            else:
+                yield FetchResult(errors=_lookup_errors(lookup, outcome))
+
+    async def _gather(self, lookups: List[_Lookup]) -> List[Tuple[_Lookup, str, Any]]:
+        """
+        Run lookups concurrently within the per-source limits and deadline.
+
+        Returns:
+            One (lookup, outcome, value) tuple per lookup, in input order.
+            outcome is "ok", "failed" or "timeout"; value is None unless ok.
+        """
+        outcomes: Dict[int, Tuple[_Lookup, str, Any]] = {}
+        async for lookup, outcome, value in self._as_completed(lookups):
+            outcomes[id(lookup)] = (lookup, outcome, value)
+        return [outcomes[id(lookup)] for lookup in lookups]
+
+    async def _as_completed(self, lookups: List[_Lookup]) -> AsyncIterator[Tuple[_Lookup, str, Any]]:
+        """
+        Run lookups concurrently and yield (lookup, outcome, value) in the
+        order they finish. Lookups still running at the deadline are
+        cancelled and yielded as "timeout". Closing the generator early
+        (e.g. a client disconnecting) cancels whatever is still running.
+        """
+        if not lookups:
+            return
+
+        semaphores = {
+            source: asyncio.Semaphore(max(1, limit))
+            for source, limit in self.limits.items()
+        }
+        tasks = {
+            asyncio.create_task(self._run(lookup, semaphores[lookup.source])): lookup
+            for lookup in lookups
+        }
+        pending = set(tasks)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.deadline
+
+        try:
+            while pending:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(
+                    pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    value = task.result()
+                    outcome = "ok" if value is not None else "failed"
+                    instrumentation.lookups.inc(group=tasks[task].source, outcome=outcome)
+                    yield tasks[task], outcome, value
+
+            if pending:
+                logger.warning(f"⏱️ Deadline of {self.deadline}s reached, {len(pending)} lookups still pending")
+            for task in pending:
+                task.cancel()
+            for task in list(pending):
+                pending.discard(task)
+                instrumentation.lookups.inc(group=tasks[task].source, outcome="timeout")
+                yield tasks[task], "timeout", None
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _run(self, lookup: _Lookup, semaphore: asyncio.Semaphore) -> Any:
+        async with semaphore:
+            loop = asyncio.get_running_loop()
+            try:
+                with profiler.span(f"fetch:{lookup.source}"):
+                    if not lookup.blocking:
+                        return await lookup.call()
+                    return await loop.run_in_executor(self._executor, lookup.call)
+            except Exception as e:
+                logger.error(f"❌ Error fetching {', '.join(lookup.labels)}: {e}")
+                return None
+
+
+def _lookup_errors(lookup: _Lookup, outcome: str) -> List[str]:
+    if outcome == "timeout":
+        return [f"Timed out fetching price for {label}" for label in lookup.labels]
+    return [f"Failed to fetch price for {label}" for label in lookup.labels]
+
+
+def _crypto_label(asset: dict) -> str:
+    return f"{asset.get('name')} ({crypto_base(asset.get('ticker'))})"
+
+
+async def _fetch_crypto(assets: List[dict], date: datetime) -> FetchResult:
+    errors: List[str] = []
+    prices_by_date = await PriceFetcher.fetch_crypto_prices(assets, [date], errors=errors)
+    return FetchResult(prices=prices_by_date[format_date(date)], errors=errors)
+
+
+async def _fetch_crypto_range(assets: List[dict], dates: List[datetime]) -> Dict[str, FetchResult]:
+    errors: List[str] = []
+    prices_by_date = await PriceFetcher.fetch_crypto_prices(assets, dates, errors=errors)
+    results = {key: FetchResult(prices=prices) for key, prices in prices_by_date.items()}
+    results.setdefault("", FetchResult()).errors.extend(errors)
+    return results
+
+
+async def _fetch_fund(fund: dict, date: datetime) -> FetchResult:
+    price_data = await FundScraper.fetch_fund_price(
+        isin=fund["isin"],
+        asset_name=fund["name"],
+        asset_id=fund["id"],
+        date=date
+    )
+    if price_data:
+        return FetchResult(prices=[price_data])
+    return FetchResult(errors=[f"Failed to fetch price for {fund.get('name')} ({fund.get('isin')})"])
+
+
+def _fetch_stocks(tickers_map: Dict[str, Tuple[str, str]], date: datetime) -> FetchResult:
+    errors: List[str] = []
+    stock_prices = PriceFetcher.fetch_multiple_stocks(tickers_map, date, errors=errors)
+    return FetchResult(prices=stock_prices, errors=errors)
+
+
+def _fetch_stock_range(tickers_map: Dict[str, Tuple[str, str]], dates: List[datetime]) -> Dict[str, FetchResult]:
+    errors: List[str] = []
+    prices_by_date = PriceFetcher.fetch_stock_range(tickers_map, dates, errors=errors)
+    results = {key: FetchResult(prices=prices) for key, prices in prices_by_date.items()}
+    results.setdefault("", FetchResult()).errors.extend(errors)
+    return results
+
+
+async def _fetch_fund_range(funds: List[dict], latest: datetime, has_history: bool) -> Dict[str, FetchResult]:
+    isin = funds[0]["isin"]
+    price_data = await FundScraper.fetch_fund_price(
+        isin=isin,
+        asset_name=funds[0]["name"],
+        asset_id=funds[0]["id"],
+        date=latest
+    )
+
+    latest_result = FetchResult()
+    other_errors: List[str] = []
+    for fund in funds:
+        if price_data:
+            latest_result.prices.append(
+                price_data.model_copy(update={"assetId": fund["id"], "assetName": fund["name"]})
+            )
+            if has_history:
+                other_errors.append(
+                    f"Historical NAV not available for {fund.get('name')} ({isin}); "
+                    f"only {format_date(latest)} was filled"
+                )
+        else:
+            latest_result.errors.append(f"Failed to fetch price for {fund.get('name')} ({isin})")
+
+    return {format_date(latest): latest_result, "": FetchResult(errors=other_errors)}
@@ -1,48 +1,78 @@
-import requests
+import asyncio
 from bs4 import BeautifulSoup
+from lxml import etree
 from typing import Optional
 from datetime import datetime
 import logging
 from models import PriceData
-from utils import format_datetime_iso
+from utils import format_date, format_datetime_iso
+from .http_client import http_clients
+from .instrumentation import instrumentation
+from .price_cache import price_cache
+from .resilience import call_with_retry, raise_for_retryable
+from .singleflight import price_flights
 
 logger = logging.getLogger(__name__)
 
+FT_TEARSHEET_URL = "https://markets.ft.com/data/funds/tearsheet/summary"
+
 class FundScraper:
     HEADERS = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
     }
 
     @staticmethod
-    def fetch_fund_price(isin: str, asset_name: str, asset_id: str) -> Optional[PriceData]:
+    @instrumentation.timed("fund_price", failed=lambda price: price is None)
+    async def fetch_fund_price(
+        isin: str,
+        asset_name: str,
+        asset_id: str,
+        date: Optional[datetime] = None
+    ) -> Optional[PriceData]:
+        """
+        Latest NAV of a fund from FT Markets.
+
+        FT only publishes the latest NAV, whatever `date` asks for, so the
+        price is cached under the day it was scraped. Caching it under a
+        past `date` would keep today's NAV for that month for good.
+        """
+        scraped_on = datetime.now()
+        cached = price_cache.get("ft_markets", isin, scraped_on)
+        if cached:
+            return cached.model_copy(update={"assetId": asset_id, "assetName": asset_name})
+
+        async def scrape() -> Optional[PriceData]:
+            price_data = await FundScraper._scrape_fund_price(isin, asset_name, asset_id)
+            if price_data:
+                price_cache.set("ft_markets", isin, scraped_on, price_data)
+            return price_data
+
+        # Assets sharing an ISIN, or concurrent requests, share one scrape
+        price_data = await price_flights.do(("ft_markets", isin, format_date(scraped_on)), scrape)
+        if price_data is None:
+            return None
+        return price_data.model_copy(update={"assetId": asset_id, "assetName": asset_name})
+
+    @staticmethod
+    async def _scrape_fund_price(isin: str, asset_name: str, asset_id: str) -> Optional[PriceData]:
         # URL de FT Markets para Fondos
-        url = f"https://markets.ft.com/data/funds/tearsheet/summary?s={isin}:EUR"
+        url = f"{FT_TEARSHEET_URL}?s={isin}:EUR"
         
         try:
             logger.info(f"Scrapeando FT para {asset_name} ({isin})")
-            response = requests.get(url, headers=FundScraper.HEADERS, timeout=20)
+            client = http_clients.get(url)
+            response = await call_with_retry(
+                "ft_markets",
+                lambda: _get_retryable(client, url)
+            )
             
             if response.status_code != 200:
                 logger.error(f"FT respondió con status {response.status_code}")
                 return None
 
-            soup = BeautifulSoup(response.text, "html.parser")
-            
-            # Buscamos en los selectores conocidos de FT
-            price_element = None
-            
-            # Selector 1: El valor principal del Tearsheet
-            price_element = soup.find("span", {"class": "mod-ui-data-list__value"})
-            
-            # Selector 2: Metadatos (a veces el HTML visible cambia pero esto no)
-            if not price_element:
-                meta_price = soup.find("meta", {"itemprop": "price"})
-                if meta_price:
-                    price_val = meta_price.get("content")
-                    return FundScraper._create_price_data(asset_id, asset_name, isin, price_val)
-
-            if price_element:
-                price_text = price_element.text.strip().replace(",", "")
+            # El parseo es CPU: fuera del event loop
+            price_text = await asyncio.to_thread(FundScraper._extract_price, response.text)
+            if price_text is not None:
                 return FundScraper._create_price_data(asset_id, asset_name, isin, price_text)
 
             logger.warning(f"No se encontró precio para {isin} en FT")
@@ -52,6 +82,35 @@ class FundScraper:
             logger.error(f"Error en scraper de {isin}: {e}")
             return None
 
+    @staticmethod
+    def _extract_price(html: str) -> Optional[str]:
+        # Camino rápido: lxml en streaming, para en cuanto aparece el precio
+        try:
+            price_text = _extract_price_streaming(html)
+            if price_text is not None:
+                return price_text
+        except Exception as e:
+            logger.debug(f"Parser rápido falló, usando BeautifulSoup: {e}")
+        return FundScraper._extract_price_soup(html)
+
+    @staticmethod
+    def _extract_price_soup(html: str) -> Optional[str]:
+        soup = BeautifulSoup(html, "html.parser")
+        
+        # Buscamos en los selectores conocidos de FT
+        
+        # Selector 1: El valor principal del Tearsheet
+        price_element = soup.find("span", {"class": "mod-ui-data-list__value"})
+        if price_element:
+            return price_element.text.strip().replace(",", "")
+        
+        # Selector 2: Metadatos (a veces el HTML visible cambia pero esto no)
+        meta_price = soup.find("meta", {"itemprop": "price"})
+        if meta_price:
+            return meta_price.get("content")
+        
+        return None
+
     @staticmethod
     def _create_price_data(asset_id, name, isin, price_str):
         try:
@@ -65,4 +124,65 @@ class FundScraper:
                 source="ft_markets"
             )
         except:
-            return None
\ No newline at end of file
+            return None
+
+
+class _PriceFound(Exception):
+    """Stops the streaming parser once the price span is closed"""
+
+
+class _PriceTarget:
+    """
+    lxml parser target reproducing the two soup lookups in one pass:
+    the first span.mod-ui-data-list__value wins, otherwise the first
+    meta[itemprop=price]. No tree is built.
+    """
+
+    def __init__(self):
+        self.meta_price: Optional[str] = None
+        self.span_text: Optional[str] = None
+        self._depth = 0  # Open spans inside the price span
+        self._parts = []
+
+    def start(self, tag, attrib):
+        if self._depth:
+            if tag == "span":
+                self._depth += 1
+        elif tag == "span" and "mod-ui-data-list__value" in attrib.get("class", "").split():
+            self._depth = 1
+        elif tag == "meta" and self.meta_price is None and attrib.get("itemprop") == "price":
+            self.meta_price = attrib.get("content")
+
+    def data(self, data):
+        if self._depth:
+            self._parts.append(data)
+
+    def end(self, tag):
+        if self._depth and tag == "span":
+            self._depth -= 1
+            if not self._depth:
+                self.span_text = "".join(self._parts)
+                raise _PriceFound()
+
+    def close(self):
+        return None
+
+
+def _extract_price_streaming(html: str, chunk_size: int = 16384) -> Optional[str]:
+    target = _PriceTarget()
+    parser = etree.HTMLParser(target=target)
+    try:
+        for i in range(0, len(html), chunk_size):
+            parser.feed(html[i:i + chunk_size])
+        parser.close()
+    except _PriceFound:
+        pass
+
+    if target.span_text is not None:
+        return target.span_text.strip().replace(",", "")
+    return target.meta_price
+
+
+async def _get_retryable(client, url):
+    response = await client.get(url, headers=FundScraper.HEADERS, timeout=20)
+    return raise_for_retryable(response)
@@ -0,0 +1,237 @@
+"""
+Google Apps Script client for WealthHub Backend
+Loads the data document and persists history, sending only the changed
+entries when the deployed script supports it
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import List, Optional
+
+import httpx
+
+from config import settings
+from utils import HistoryIndex, format_datetime_iso, merge_price_updates
+from .http_client import http_clients
+from .resilience import call_with_retry, raise_for_retryable
+
+logger = logging.getLogger(__name__)
+
+
+class GasError(Exception):
+    """The GAS endpoint answered but rejected the request"""
+
+
+class GasClient:
+    """
+    Client for the GAS data document.
+
+    Scripts deployed from SETUP.md keep a `version` counter in the document
+    and accept an `upsertHistory` action carrying only the changed
+    (month, assetId) entries plus the version they were based on. When the
+    script advertises a version, history writes use that delta path and
+    cost the same no matter how long the history is. Older scripts only
+    understand `updateHistory`, which replaces the whole history, so for
+    those the full document is loaded, merged and written back.
+
+    The document is kept as a short-lived snapshot shared by every
+    endpoint, so one request loads it at most once and back-to-back
+    requests reuse it.
+    """
+
+    def __init__(self):
+        self.version: Optional[int] = None
+        self.supports_delta: Optional[bool] = None
+        self.loads = 0
+        self.revalidations = 0
+        self._snapshot: Optional[dict] = None
+        self._snapshot_at = 0.0
+        self._snapshot_lock: Optional[asyncio.Lock] = None
+
+    @property
+    def url(self) -> Optional[str]:
+        return settings.GAS_URL
+
+    async def request(self, method: str, **kwargs) -> httpx.Response:
+        """Call the GAS endpoint through its breaker, retrying transient errors"""
+        client = http_clients.get(self.url)
+
+        async def send() -> httpx.Response:
+            response = await client.request(method, self.url, **kwargs)
+            raise_for_retryable(response)
+            response.raise_for_status()
+            return response
+
+        return await call_with_retry("gas", send)
+
+    async def load(self, max_age: Optional[float] = None) -> dict:
+        """
+        Data document, served from the snapshot while it is fresh.
+
+        A snapshot older than `max_age` (GAS_SNAPSHOT_TTL by default) is
+        revalidated with the version it was loaded at: scripts that keep a
+        version answer `notModified` without resending the document.
+        Concurrent callers share a single load.
+
+        Returns:
+            The `data` object, or {} if GAS reported a failure
+        """
+        max_age = settings.GAS_SNAPSHOT_TTL if max_age is None else max_age
+        if self._is_fresh(max_age):
+            return self._snapshot
+
+        if self._snapshot_lock is None:
+            self._snapshot_lock = asyncio.Lock()
+        async with self._snapshot_lock:
+            # Someone else may have refreshed it while we waited
+            if self._is_fresh(max_age):
+                return self._snapshot
+            return await self._refresh()
+
+    def invalidate(self) -> None:
+        """Force the next load to revalidate"""
+        self._snapshot_at = 0.0
+
+    async def _refresh(self) -> dict:
+        params = {}
+        headers = {}
+        snapshot_version = (self._snapshot or {}).get("version")
+        if isinstance(snapshot_version, int):
+            params["ifVersion"] = snapshot_version
+            headers["If-None-Match"] = f'"{snapshot_version}"'
+
+        response = await self.request("GET", params=params, headers=headers)
+        if response.status_code == 304:
+            body = {"success": True, "notModified": True}
+        else:
+            body = response.json()
+
+        if body.get("notModified") and self._snapshot is not None:
+            self.revalidations += 1
+            self._snapshot_at = time.monotonic()
+            return self._snapshot
+
+        self.loads += 1
+        if not body.get("success"):
+            return {}
+        data = body.get("data") or {}
+        self._remember_version(data.get("version"))
+        self._snapshot = data
+        self._snapshot_at = time.monotonic()
+        return data
+
+    def _is_fresh(self, max_age: float) -> bool:
+        return (
+            self._snapshot is not None
+            and max_age > 0
+            and time.monotonic() - self._snapshot_at < max_age
+        )
+
+    def _apply_to_snapshot(self, entries: List[dict], base_version: Optional[int]) -> None:
+        """
+        Keep the snapshot in step with our own write. If the snapshot wasn't
+        at the version the write was based on, someone else wrote too and
+        it has to be reloaded instead.
+        """
+        if self._snapshot is None:
+            return
+        if self._snapshot.get("version") != base_version:
+            self.invalidate()
+            return
+        HistoryIndex(self._snapshot.setdefault("history", [])).upsert(entries)
+        self._snapshot["version"] = self.version
+
+    async def write_history(self, entries: List[dict]) -> None:
+        """
+        Upsert history entries keyed by (month, assetId).
+
+        Raises:
+            GasError: If GAS rejects the write
+        """
+        if settings.GAS_DELTA_WRITES:
+            if self.supports_delta is None:
+                await self.load()
+            if self.supports_delta:
+                await self._upsert_history(entries)
+                return
+        await self._replace_history(entries)
+
+    async def _upsert_history(self, entries: List[dict]) -> None:
+        # A conflict means someone else wrote since our version. Their
+        # write may have touched the same (month, assetId) keys, so the
+        # document is reloaded, keys they changed are left to them and only
+        # the rest is retried on the new version.
+        base = await self._base_snapshot()
+        for attempt in range(2):
+            base_version = self.version
+            payload = {
+                "action": "upsertHistory",
+                "entries": entries,
+                "baseVersion": base_version,
+                "timestamp": format_datetime_iso(datetime.now())
+            }
+            body = (await self.request("POST", json=payload)).json()
+            if body.get("success"):
+                self._remember_version(body.get("version"))
+                self._apply_to_snapshot(entries, base_version)
+                logger.info(f"✅ Upserted {len(entries)} history entries (version {self.version})")
+                return
+            if not body.get("conflict"):
+                raise GasError(body.get("error") or "upsertHistory rejected")
+            if attempt:
+                break
+
+            logger.warning(f"⚠️ GAS version conflict (ours {base_version}, theirs {body.get('version')}), reloading")
+            before = HistoryIndex(base.get("history", []))
+            base = await self.load(max_age=0)
+            after = HistoryIndex(base.get("history", []))
+            kept = []
+            for entry in entries:
+                key = (entry.get("month"), entry.get("assetId"))
+                if after.get(*key) != before.get(*key):
+                    logger.warning(f"⚠️ {key[1]} {key[0]} changed in GAS meanwhile, keeping their entry")
+                else:
+                    kept.append(entry)
+            entries = kept
+            if not entries:
+                return
+        raise GasError("GAS kept reporting version conflicts")
+
+    async def _base_snapshot(self) -> dict:
+        """The document at `self.version`, to tell our keys from theirs on a conflict"""
+        if self._snapshot is None or self._snapshot.get("version") != self.version:
+            await self.load(max_age=0)
+        return self._snapshot or {}
+
+    async def _replace_history(self, entries: List[dict]) -> None:
+        # The whole history is written back, so merge against a fresh copy:
+        # the frontend writes to GAS directly and a snapshot up to
+        # GAS_SNAPSHOT_TTL old would drop its edits
+        current_data = await self.load(max_age=0)
+        history = entries
+        if current_data:
+            history = merge_price_updates(current_data.get("history", []), entries)
+
+        payload = {
+            "action": "updateHistory",
+            "history": history,
+            "timestamp": format_datetime_iso(datetime.now())
+        }
+        body = (await self.request("POST", json=payload)).json()
+        if body.get("success") is False:
+            raise GasError(body.get("error") or "updateHistory rejected")
+        self._remember_version(body.get("version"))
+        if self._snapshot is not None:
+            self._snapshot["history"] = history
+
+    def _remember_version(self, version) -> None:
+        if isinstance(version, int):
+            self.version = version
+            self.supports_delta = True
+        elif self.supports_delta is None:
+            self.supports_delta = False
+
+
+gas_client = GasClient()
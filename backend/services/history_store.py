@@ -0,0 +1,396 @@
+"""
+Local history store for WealthHub Backend
+SQLite copy of the GAS data document with indexes on (assetId, month),
+written through locally and synced to GAS in the background
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from config import settings
+from .gas_client import gas_client
+
+logger = logging.getLogger(__name__)
+
+# Top-level keys of the GAS document that get their own tables
+INDEXED_KEYS = ("assets", "history", "version")
+
+
+class HistoryStore:
+    """
+    Indexed local copy of the GAS data document.
+
+    Assets and history rows live in their own tables (history keyed by
+    (assetId, month), with a second index on month), so lookups by asset
+    or month range and upserts are index operations instead of scans of
+    the whole document. Any other top-level key (BTC and stock
+    transactions...) is kept as an opaque JSON document.
+
+    History rows written locally are flagged `pending` until they have
+    been sent to GAS; reloading from GAS never overwrites a pending row.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether a GAS document has been loaded at least once"""
+        return self._meta("loaded_at") is not None
+
+    @property
+    def version(self) -> Optional[int]:
+        value = self._meta("version")
+        return int(value) if value is not None else None
+
+    def replace(self, data: dict) -> None:
+        """Replace the stored document with one loaded from GAS, keeping pending rows"""
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute("DELETE FROM assets")
+                conn.executemany(
+                    "INSERT OR REPLACE INTO assets (id, position, category, archived, payload) VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (str(asset.get("id")), i, asset.get("category"), int(bool(asset.get("archived"))), json.dumps(asset))
+                        for i, asset in enumerate(data.get("assets") or [])
+                    ]
+                )
+                conn.execute("DELETE FROM history WHERE pending = 0")
+                conn.executemany(
+                    "INSERT INTO history (asset_id, month, payload, pending) VALUES (?, ?, ?, 0) "
+                    "ON CONFLICT (asset_id, month) DO NOTHING",
+                    [_history_row(entry) for entry in data.get("history") or []]
+                )
+                conn.execute("DELETE FROM documents")
+                conn.executemany(
+                    "INSERT INTO documents (name, payload) VALUES (?, ?)",
+                    [(key, json.dumps(value)) for key, value in data.items() if key not in INDEXED_KEYS]
+                )
+                self._set_meta(conn, "version", data.get("version"))
+                self._set_meta(conn, "loaded_at", time.time())
+
+    def document(self) -> dict:
+        """The full data document, in the shape GAS returns it"""
+        with self._lock:
+            conn = self._connection()
+            data = {
+                name: json.loads(payload)
+                for name, payload in conn.execute("SELECT name, payload FROM documents")
+            }
+        data["assets"] = self.assets()
+        data["history"] = self.history()
+        version = self.version
+        if version is not None:
+            data["version"] = version
+        return data
+
+    def assets(self, category: Optional[str] = None, archived: Optional[bool] = None) -> List[dict]:
+        """Assets in document order, optionally filtered"""
+        return [asset for _, asset in self.assets_page(category, archived)]
+
+    def assets_page(
+        self,
+        category: Optional[str] = None,
+        archived: Optional[bool] = None,
+        after: Optional[int] = None,
+        limit: Optional[int] = None
+    ) -> List[Tuple[int, dict]]:
+        """
+        (position, asset) pairs in document order.
+
+        Args:
+            category: Only assets of this category
+            archived: Only archived (True) or active (False) assets
+            after: Start after this position
+            limit: At most this many
+        """
+        clauses, params = _filters(category=category, archived=archived)
+        if after is not None:
+            clauses.append("position > ?")
+            params.append(after)
+        with self._lock:
+            rows = self._connection().execute(
+                f"SELECT position, payload FROM assets {_where(clauses)} ORDER BY position {_limit(limit)}",
+                params
+            ).fetchall()
+        return [(position, json.loads(payload)) for position, payload in rows]
+
+    def history(
+        self,
+        asset_ids: Optional[Iterable[str]] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None
+    ) -> List[dict]:
+        """
+        History rows in insertion order, optionally for some assets and a
+        month range.
+
+        Args:
+            asset_ids: Only these assets
+            start: First month included (YYYY-MM)
+            end: Last month included (YYYY-MM)
+        """
+        clauses, params = _filters(asset_ids=asset_ids, start=start, end=end)
+        with self._lock:
+            rows = self._connection().execute(
+                f"SELECT payload FROM history {_where(clauses)} ORDER BY rowid", params
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def history_page(
+        self,
+        asset_ids: Optional[Iterable[str]] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        after: Optional[Tuple[str, str]] = None,
+        limit: Optional[int] = None
+    ) -> List[dict]:
+        """
+        History rows ordered by (month, assetId), filtered like `history`,
+        starting after the (month, assetId) key `after`
+        """
+        clauses, params = _filters(asset_ids=asset_ids, start=start, end=end)
+        if after is not None:
+            clauses.append("(month, asset_id) > (?, ?)")
+            params.extend(after)
+        with self._lock:
+            rows = self._connection().execute(
+                f"SELECT payload FROM history {_where(clauses)} ORDER BY month, asset_id {_limit(limit)}",
+                params
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def upsert_history(self, entries: List[dict], pending: bool = True) -> int:
+        """
+        Insert or update history rows keyed by (assetId, month).
+
+        Returns:
+            Number of rows written
+        """
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.executemany(
+                    "INSERT INTO history (asset_id, month, payload, pending) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (asset_id, month) DO UPDATE SET payload = excluded.payload, pending = excluded.pending",
+                    [(*_history_row(entry), int(pending)) for entry in entries]
+                )
+        return len(entries)
+
+    def pending_history(self) -> List[dict]:
+        """Rows written locally that GAS doesn't have yet"""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT payload FROM history WHERE pending = 1 ORDER BY rowid"
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def mark_synced(self, entries: List[dict], version: Optional[int]) -> None:
+        """
+        Clear the pending flag of rows that were sent to GAS. A row changed
+        again while the sync was running keeps its flag.
+        """
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.executemany(
+                    "UPDATE history SET pending = 0 WHERE asset_id = ? AND month = ? AND payload = ?",
+                    [_history_row(entry) for entry in entries]
+                )
+                if version is not None:
+                    self._set_meta(conn, "version", version)
+
+    def stats(self) -> Dict[str, Optional[int]]:
+        with self._lock:
+            conn = self._connection()
+            assets = conn.execute("SELECT COUNT(*) FROM assets").fetchone()[0]
+            history = conn.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+            pending = conn.execute("SELECT COUNT(*) FROM history WHERE pending = 1").fetchone()[0]
+        return {"assets": assets, "history": history, "pending": pending, "version": self.version}
+
+    # Internal helpers
+
+    def _meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._connection().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _set_meta(conn: sqlite3.Connection, key: str, value) -> None:
+        if value is None:
+            conn.execute("DELETE FROM meta WHERE key = ?", (key,))
+        else:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.executescript(
+                "CREATE TABLE IF NOT EXISTS assets ("
+                "id TEXT PRIMARY KEY, position INTEGER NOT NULL, category TEXT, "
+                "archived INTEGER NOT NULL DEFAULT 0, payload TEXT NOT NULL);"
+                "CREATE INDEX IF NOT EXISTS idx_assets_category ON assets (category, archived);"
+                "CREATE TABLE IF NOT EXISTS history ("
+                "asset_id TEXT NOT NULL, month TEXT NOT NULL, payload TEXT NOT NULL, "
+                "pending INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (asset_id, month));"
+                "CREATE INDEX IF NOT EXISTS idx_history_month ON history (month, asset_id);"
+                "CREATE INDEX IF NOT EXISTS idx_history_pending ON history (pending) WHERE pending = 1;"
+                "CREATE TABLE IF NOT EXISTS documents (name TEXT PRIMARY KEY, payload TEXT NOT NULL);"
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);"
+            )
+        return self._conn
+
+
+class HistorySync:
+    """
+    Keeps the local store and GAS in step.
+
+    Every `interval` seconds (or right away after a local write) pending
+    rows are pushed to GAS as one history write, then the GAS document is
+    revalidated and reloaded into the store if its version moved (someone
+    edited it from the frontend). A failed push leaves the rows pending
+    for the next round.
+    """
+
+    def __init__(self, store: HistoryStore, interval: float = 60):
+        self.store = store
+        self.interval = interval
+        self.last_sync: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the loop after one last push so local writes aren't left behind"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        try:
+            await self.push()
+        except Exception as e:
+            logger.warning(f"⚠️ Final history push failed, rows stay pending: {e}")
+
+    def kick(self) -> None:
+        """Sync as soon as possible (after a local write)"""
+        if self._wake is not None:
+            self._wake.set()
+
+    async def ensure_loaded(self) -> None:
+        """Load the GAS document into the store if it has never been loaded"""
+        if not self.store.is_loaded:
+            await self.pull()
+
+    async def sync(self) -> None:
+        await self.push()
+        await self.pull()
+        self.last_sync = time.time()
+        self.last_error = None
+
+    async def push(self) -> int:
+        """Send pending rows to GAS; returns how many were sent"""
+        async with self._get_lock():
+            entries = self.store.pending_history()
+            if not entries:
+                return 0
+            await gas_client.write_history(entries)
+            self.store.mark_synced(entries, gas_client.version)
+            logger.info(f"🔄 Synced {len(entries)} history rows to GAS")
+            return len(entries)
+
+    async def pull(self) -> bool:
+        """Reload the store from GAS if the document changed; returns whether it did"""
+        async with self._get_lock():
+            data = await gas_client.load(max_age=0)
+            if not data:
+                return False
+            version = data.get("version")
+            if self.store.is_loaded and version is not None and version == self.store.version:
+                return False
+            self.store.replace(data)
+            logger.info(f"📥 History store loaded from GAS (version {version})")
+            return True
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.sync()
+            except Exception as e:
+                self.last_error = str(e)
+                logger.warning(f"⚠️ History sync failed: {e}")
+
+    def _get_lock(self) -> asyncio.Lock:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+
+def _filters(
+    category: Optional[str] = None,
+    archived: Optional[bool] = None,
+    asset_ids: Optional[Iterable[str]] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None
+) -> Tuple[List[str], list]:
+    """WHERE clauses and parameters for the given filters"""
+    clauses, params = [], []
+    if category is not None:
+        clauses.append("category = ?")
+        params.append(category)
+    if archived is not None:
+        clauses.append("archived = ?")
+        params.append(int(archived))
+    if asset_ids is not None:
+        asset_ids = list(asset_ids)
+        clauses.append(f"asset_id IN ({', '.join('?' * len(asset_ids))})")
+        params.extend(asset_ids)
+    if start is not None:
+        clauses.append("month >= ?")
+        params.append(start)
+    if end is not None:
+        clauses.append("month <= ?")
+        params.append(end)
+    return clauses, params
+
+
+def _where(clauses: List[str]) -> str:
+    return f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+
+def _limit(limit: Optional[int]) -> str:
+    return f"LIMIT {int(limit)}" if limit is not None else ""
+
+
+def _history_row(entry: dict) -> tuple:
+    return str(entry.get("assetId")), str(entry.get("month")), json.dumps(entry)
+
+
+history_store = HistoryStore(path=settings.HISTORY_STORE_PATH)
+history_sync = HistorySync(history_store, interval=settings.HISTORY_SYNC_INTERVAL)
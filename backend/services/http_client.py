@@ -0,0 +1,128 @@
+"""
+HTTP client layer for WealthHub Backend
+App-lifetime connection pools shared by every outbound call
+"""
+
+import logging
+import threading
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Hosts of the price sources, redirected by UPSTREAM_OVERRIDE_URL (GAS has GAS_URL)
+PRICE_SOURCE_DOMAINS = ("yahoo.com", "ft.com", "binance.com")
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class HttpClients:
+    """
+    One `httpx.AsyncClient` per host, kept open for the life of the app.
+
+    A client per host gives every upstream (FT, Binance, GAS...) its own
+    keep-alive pool, so a slow host can't exhaust connections for the
+    others. HTTP/2 is negotiated through ALPN when `h2` is installed and
+    the host supports it.
+
+    Yahoo downloads run on worker threads, so they share a single pooled
+    `requests` session instead.
+
+    With UPSTREAM_OVERRIDE_URL set, requests to Yahoo, FT and Binance are
+    sent to `<override>/<original host>/<path>` instead (the stub
+    upstreams used by the benchmarks).
+    """
+
+    def __init__(self):
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._session: Optional[requests.Session] = None
+        self._session_lock = threading.Lock()
+
+    def get(self, url: str) -> httpx.AsyncClient:
+        """
+        Client for the host of `url`, created on first use.
+
+        Args:
+            url: Any URL on the target host
+
+        Returns:
+            Shared AsyncClient for that host
+        """
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+        client = self._clients.get(host)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                http2=settings.HTTP2 and HTTP2_AVAILABLE,
+                follow_redirects=True,
+                event_hooks={"request": [_redirect_request]} if settings.UPSTREAM_OVERRIDE_URL else None,
+                timeout=httpx.Timeout(settings.TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=settings.HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE,
+                    keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+                )
+            )
+            self._clients[host] = client
+            logger.info(f"🔌 HTTP pool opened for {host}")
+        return client
+
+    def session(self) -> requests.Session:
+        """Pooled requests session for blocking callers (Yahoo downloads)"""
+        with self._session_lock:
+            if self._session is None:
+                session = requests.Session()
+                adapter_class = _RedirectAdapter if settings.UPSTREAM_OVERRIDE_URL else HTTPAdapter
+                adapter = adapter_class(
+                    pool_connections=4,
+                    pool_maxsize=settings.HTTP_MAX_CONNECTIONS
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._session = session
+            return self._session
+
+    async def aclose(self) -> None:
+        """Close every pool (called on app shutdown)"""
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+        with self._session_lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+
+def redirect_url(url: str) -> str:
+    """`url` rewritten onto UPSTREAM_OVERRIDE_URL if it targets a price source"""
+    parts = urlsplit(url)
+    host = parts.hostname or ""
+    if not settings.UPSTREAM_OVERRIDE_URL or not any(
+        host == domain or host.endswith(f".{domain}") for domain in PRICE_SOURCE_DOMAINS
+    ):
+        return url
+    query = f"?{parts.query}" if parts.query else ""
+    return f"{settings.UPSTREAM_OVERRIDE_URL.rstrip('/')}/{host}{parts.path or '/'}{query}"
+
+
+async def _redirect_request(request: httpx.Request) -> None:
+    request.url = httpx.URL(redirect_url(str(request.url)))
+
+
+class _RedirectAdapter(HTTPAdapter):
+    def send(self, request, **kwargs):
+        request.url = redirect_url(request.url)
+        return super().send(request, **kwargs)
+
+
+http_clients = HttpClients()
@@ -0,0 +1,326 @@
+"""
+Instrumentation for WealthHub Backend
+Latency histograms, outcome counters and in-flight gauges per upstream
+source, per service operation and per endpoint, rendered in the
+Prometheus text format
+"""
+
+import asyncio
+import functools
+import inspect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Seconds; upstream calls range from a cached FT page to a retried Yahoo download
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Labels = Tuple[str, ...]
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Labels:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _format_labels(self, key: Labels, extra: Optional[Dict[str, str]] = None) -> str:
+        pairs = list(zip(self.labelnames, key)) + list((extra or {}).items())
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}", *self._samples()]
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{self._format_labels(key)} {_number(value)}" for key, value in values]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{self._format_labels(key)} {_number(value)}" for key, value in values]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = LATENCY_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[Labels, Tuple[List[int], float, int]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, total, count = self._values.get(key) or ([0] * len(self.buckets), 0.0, 0)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value, count + 1)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = sorted((key, (list(c), t, n)) for key, (c, t, n) in self._values.items())
+        lines = []
+        for key, (counts, total, count) in values:
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f"{self.name}_bucket{self._format_labels(key, {'le': _number(bound)})} {bucket_count}")
+            lines.append(f"{self.name}_bucket{self._format_labels(key, {'le': '+Inf'})} {count}")
+            lines.append(f"{self.name}_sum{self._format_labels(key)} {_number(total)}")
+            lines.append(f"{self.name}_count{self._format_labels(key)} {count}")
+        return lines
+
+
+class Instrumentation:
+    """
+    In-process metrics registry.
+
+    - Upstream sources (yfinance, binance_api, ft_markets, gas) are
+      recorded by the retry layer every call goes through: one observation
+      per call including its retries, with outcome success, failure,
+      timeout or circuit_open
+    - Service operations (PriceFetcher, FundScraper, the GAS helpers) are
+      recorded with the `timed` decorator and include cache hits; the fetch
+      engine counts each lookup as ok, failed or timeout (past the deadline)
+    - Endpoints are recorded by `InstrumentationMiddleware`, until the last
+      byte of the response (so streams count in full)
+    - Values owned by other services (price cache, coalescing, breakers)
+      are read at scrape time through collectors
+    """
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], List[str]]] = []
+
+        self.source_latency = self.histogram(
+            "wealthhub_source_request_seconds", "Upstream call latency, retries included", ("source",)
+        )
+        self.source_requests = self.counter(
+            "wealthhub_source_requests_total", "Upstream calls by outcome", ("source", "outcome")
+        )
+        self.source_in_flight = self.gauge(
+            "wealthhub_source_in_flight", "Upstream calls in progress", ("source",)
+        )
+        self.operation_latency = self.histogram(
+            "wealthhub_operation_seconds", "Service operation latency, cache hits included", ("operation",)
+        )
+        self.operations = self.counter(
+            "wealthhub_operations_total", "Service operations by outcome", ("operation", "outcome")
+        )
+        self.operations_in_flight = self.gauge(
+            "wealthhub_operations_in_flight", "Service operations in progress", ("operation",)
+        )
+        self.lookups = self.counter(
+            "wealthhub_fetch_lookups_total", "Fetch engine lookups by source group and outcome", ("group", "outcome")
+        )
+        self.http_latency = self.histogram(
+            "wealthhub_http_request_seconds", "Endpoint latency until the last response byte", ("method", "route")
+        )
+        self.http_requests = self.counter(
+            "wealthhub_http_requests_total", "Endpoint requests by status", ("method", "route", "status")
+        )
+        self.http_in_flight = self.gauge(
+            "wealthhub_http_requests_in_flight", "Requests being served", ()
+        )
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames))
+
+    def add_collector(self, collector: Callable[[], List[str]]) -> None:
+        """Register a callable returning exposition lines, run on every scrape"""
+        self._collectors.append(collector)
+
+    @staticmethod
+    def family(name: str, kind: str, help_text: str, samples: List[Tuple[Dict[str, str], float]]) -> List[str]:
+        """Exposition lines for a metric whose values are read at scrape time"""
+        lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        for labels, value in samples:
+            label_text = ",".join(f'{key}="{_escape(str(val))}"' for key, val in labels.items())
+            lines.append(f"{name}{{{label_text}}} {_number(value)}" if label_text else f"{name} {_number(value)}")
+        return lines
+
+    @contextmanager
+    def source_call(self, source: str) -> Iterator[None]:
+        """Record one upstream call (used by the retry layer)"""
+        with self._track(self.source_latency, self.source_requests, self.source_in_flight, source=source):
+            yield
+
+    def timed(self, operation: str, failed: Optional[Callable[[Any], bool]] = None) -> Callable:
+        """
+        Decorator recording a sync or async function as a service operation.
+
+        Args:
+            operation: Value of the `operation` label
+            failed: For functions that report failure in their return value
+                instead of raising (None, False...): returns True when the
+                call failed, so it is counted with outcome `failure`
+        """
+        def decorator(func: Callable) -> Callable:
+            if inspect.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    with self._track(self.operation_latency, self.operations, self.operations_in_flight, operation=operation) as call:
+                        result = await func(*args, **kwargs)
+                        call.failed = failed is not None and failed(result)
+                        return result
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self._track(self.operation_latency, self.operations, self.operations_in_flight, operation=operation) as call:
+                    result = func(*args, **kwargs)
+                    call.failed = failed is not None and failed(result)
+                    return result
+            return wrapper
+        return decorator
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            try:
+                lines.extend(collector())
+            except Exception as e:
+                logger.warning(f"⚠️ Metrics collector failed: {e}")
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    @contextmanager
+    def _track(self, latency: Histogram, outcomes: Counter, in_flight: Gauge, **labels: str) -> Iterator["_Call"]:
+        started = time.perf_counter()
+        in_flight.inc(**labels)
+        call = _Call()
+        outcome = "success"
+        try:
+            yield call
+            if call.failed:
+                outcome = "failure"
+        except BaseException as e:
+            outcome = _outcome(e)
+            raise
+        finally:
+            in_flight.dec(**labels)
+            latency.observe(time.perf_counter() - started, **labels)
+            outcomes.inc(outcome=outcome, **labels)
+
+
+class InstrumentationMiddleware:
+    """ASGI middleware recording every HTTP request under its route template"""
+
+    def __init__(self, app, instrumentation: Instrumentation):
+        self.app = app
+        self.instrumentation = instrumentation
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = self.instrumentation
+        started = time.perf_counter()
+        status = ["500"]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = str(message["status"])
+            await send(message)
+
+        metrics.http_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            metrics.http_in_flight.dec()
+            route = scope.get("route")
+            labels = {"method": scope["method"], "route": getattr(route, "path", "unmatched")}
+            metrics.http_latency.observe(time.perf_counter() - started, **labels)
+            metrics.http_requests.inc(status=status[0], **labels)
+
+
+class _Call:
+    """Lets the tracked block report a failure it didn't raise"""
+    __slots__ = ("failed",)
+
+    def __init__(self):
+        self.failed = False
+
+
+def _outcome(error: BaseException) -> str:
+    from .resilience import CircuitOpenError
+
+    if isinstance(error, CircuitOpenError):
+        return "circuit_open"
+    if isinstance(error, (asyncio.CancelledError, asyncio.TimeoutError, TimeoutError, httpx.TimeoutException)):
+        return "timeout"
+    return "failure"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+instrumentation = Instrumentation()
@@ -0,0 +1,297 @@
+"""
+Background job queue for WealthHub Backend
+Runs long fetches on a bounded set of workers, deduplicates identical
+jobs and keeps their state in SQLite so it survives restarts
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# Seconds between stored snapshots of a running job's partial results
+REPORT_SAVE_INTERVAL = 1.0
+# Seconds between purges of expired jobs, run as jobs finish
+PURGE_INTERVAL = 60.0
+
+
+@dataclass
+class Job:
+    """A submitted job and everything reported about it so far"""
+    id: str
+    kind: str
+    key: str
+    params: Dict[str, Any]
+    status: str = QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    prices: List[dict] = field(default_factory=list)  # Partial results while running
+    errors: List[str] = field(default_factory=list)
+    result: Optional[dict] = None
+    error: Optional[str] = None
+
+    @property
+    def active(self) -> bool:
+        return self.status in (QUEUED, RUNNING)
+
+
+JobHandler = Callable[[Job, Dict[str, Any]], Awaitable[dict]]
+
+
+class JobQueue:
+    """
+    Queue of background jobs served by `workers` asyncio workers.
+
+    Handlers are registered per job kind. A handler receives the job (to
+    report partial prices and errors through `report`) and its params,
+    and returns the final result as a dict.
+
+    Submitting a job whose kind and params match a queued or running job
+    returns that job instead of creating a new one. Every state change is
+    written to the SQLite store; on start, jobs that were queued or
+    running when the process stopped are queued again. Partial results
+    are written at most every REPORT_SAVE_INTERVAL seconds (they are
+    dropped on restart anyway), and finished jobs older than `retention`
+    are purged as other jobs finish.
+    """
+
+    def __init__(self, path: Optional[str] = None, workers: int = 2, retention: float = 86400):
+        self.path = path
+        self.workers = workers
+        self.retention = retention
+        self._handlers: Dict[str, JobHandler] = {}
+        self._jobs: Dict[str, Job] = {}
+        self._active: Dict[str, str] = {}  # Dedup key -> id of the queued/running job
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._saved_at: Dict[str, float] = {}  # Running job id -> last save of its partial results
+        self._purged_at: Optional[float] = None
+
+    def register(self, kind: str, handler: JobHandler) -> None:
+        """Register the coroutine that runs jobs of `kind`"""
+        self._handlers[kind] = handler
+
+    async def start(self) -> None:
+        """Restore stored jobs and start the workers (called on app startup)"""
+        self._queue = asyncio.Queue()
+        self._purge()
+        for job in self._load_all():
+            self._jobs[job.id] = job
+            if job.active:
+                # Interrupted jobs start over, so drop their partial results
+                job.status = QUEUED
+                job.started_at = None
+                job.prices = []
+                job.errors = []
+                self._active[job.key] = job.id
+                self._save(job)
+                self._queue.put_nowait(job.id)
+        if self._active:
+            logger.info(f"♻️ Re-queued {len(self._active)} unfinished jobs")
+
+        self._tasks = [
+            asyncio.create_task(self._worker(i))
+            for i in range(max(1, self.workers))
+        ]
+
+    async def stop(self) -> None:
+        """Cancel the workers; running jobs stay stored as running and resume on restart"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, kind: str, params: Dict[str, Any]) -> Job:
+        """
+        Queue a job, or return the identical job already in flight.
+
+        Args:
+            kind: Registered job kind (e.g., "fetch-month")
+            params: JSON-serializable job parameters
+
+        Returns:
+            The new or existing Job
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        if self._queue is None:
+            raise RuntimeError("Job queue is not running")
+
+        key = f"{kind}:{json.dumps(params, sort_keys=True)}"
+        existing = self._jobs.get(self._active.get(key, ""))
+        if existing is not None and existing.active:
+            logger.info(f"🔗 Job {existing.id} already in flight for {key}")
+            return existing
+
+        job = Job(id=uuid.uuid4().hex, kind=kind, key=key, params=params)
+        self._jobs[job.id] = job
+        self._active[key] = job.id
+        self._save(job)
+        self._queue.put_nowait(job.id)
+        logger.info(f"📥 Job {job.id} queued: {key}")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Job by id, or None if unknown or already purged"""
+        job = self._jobs.get(job_id)
+        if job is None:
+            job = self._load(job_id)
+        return job
+
+    def claim(self, name: str, run_at: str) -> bool:
+        """
+        Claim one run of a scheduled task for this process.
+
+        Workers sharing JOB_STORE_PATH all see the same tick; only the first
+        to claim it gets True. Without a store every caller gets True.
+
+        Args:
+            name: Task name
+            run_at: The tick being claimed (e.g., its ISO time)
+        """
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return True
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO claims (name, run_at, claimed_at) VALUES (?, ?, ?)",
+                (name, run_at, time.time())
+            )
+            conn.commit()
+            return cursor.rowcount == 1
+
+    def report(self, job: Job, prices: List[dict] = (), errors: List[str] = ()) -> None:
+        """Record partial prices and errors for a running job"""
+        job.prices.extend(prices)
+        job.errors.extend(errors)
+        now = time.monotonic()
+        saved_at = self._saved_at.get(job.id)
+        if saved_at is None or now - saved_at >= REPORT_SAVE_INTERVAL:
+            self._saved_at[job.id] = now
+            self._save(job)
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            job_id = await self._queue.get()
+            job = self._jobs.get(job_id)
+            try:
+                if job is not None and job.status == QUEUED:
+                    await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job) -> None:
+        job.status = RUNNING
+        job.started_at = time.time()
+        self._save(job)
+        logger.info(f"⚙️ Job {job.id} running: {job.key}")
+
+        try:
+            job.result = await self._handlers[job.kind](job, job.params)
+            job.status = DONE
+        except asyncio.CancelledError:
+            # Shutdown: leave the job stored as running so it resumes
+            raise
+        except Exception as e:
+            logger.error(f"❌ Job {job.id} failed: {e}", exc_info=True)
+            job.error = str(e)
+            job.status = FAILED
+
+        job.finished_at = time.time()
+        if self._active.get(job.key) == job.id:
+            del self._active[job.key]
+        self._saved_at.pop(job.id, None)
+        self._save(job)
+        logger.info(f"✅ Job {job.id} {job.status} in {job.finished_at - job.started_at:.1f}s")
+        if self._purged_at is None or time.monotonic() - self._purged_at >= PURGE_INTERVAL:
+            self._purge()
+
+    # Storage
+
+    def _save(self, job: Job) -> None:
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return
+            conn.execute(
+                "INSERT OR REPLACE INTO jobs (id, status, created_at, finished_at, payload) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (job.id, job.status, job.created_at, job.finished_at, json.dumps(job.__dict__))
+            )
+            conn.commit()
+
+    def _load(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return None
+            row = conn.execute("SELECT payload FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job(**json.loads(row[0])) if row else None
+
+    def _load_all(self) -> List[Job]:
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return []
+            rows = conn.execute("SELECT payload FROM jobs ORDER BY created_at").fetchall()
+        return [Job(**json.loads(row[0])) for row in rows]
+
+    def _purge(self) -> None:
+        """Forget finished jobs older than `retention` seconds"""
+        self._purged_at = time.monotonic()
+        cutoff = time.time() - self.retention
+        for job_id in [j.id for j in self._jobs.values() if j.finished_at and j.finished_at < cutoff]:
+            del self._jobs[job_id]
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return
+            conn.execute("DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?", (cutoff,))
+            conn.execute("DELETE FROM claims WHERE claimed_at < ?", (cutoff,))
+            conn.commit()
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        if not self.path:
+            return None
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, status TEXT NOT NULL, created_at REAL NOT NULL, "
+                "finished_at REAL, payload TEXT NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS claims ("
+                "name TEXT NOT NULL, run_at TEXT NOT NULL, claimed_at REAL NOT NULL, "
+                "PRIMARY KEY (name, run_at))"
+            )
+            self._conn.commit()
+        return self._conn
+
+
+job_queue = JobQueue(
+    path=settings.JOB_STORE_PATH,
+    workers=settings.JOB_WORKERS,
+    retention=settings.JOB_RETENTION
+)
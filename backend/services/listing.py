@@ -0,0 +1,117 @@
+"""
+List queries for WealthHub Backend
+Filtering, keyset pagination, field projection and ETags for the /assets
+and /history endpoints
+"""
+
+import base64
+import hashlib
+import json
+import logging
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidCursor(ValueError):
+    """The cursor wasn't issued by this API"""
+
+
+class Listing:
+    """
+    Helpers shared by the list endpoints.
+
+    Pages are keyset-paginated: the cursor carries the sort key of the last
+    item returned (an asset's position in the document, a history row's
+    (month, assetId)), so the next page starts right after it even if rows
+    were added or removed in between, and with the history store it maps
+    straight onto an index range.
+    """
+
+    @staticmethod
+    def encode_cursor(key: Iterable) -> str:
+        return base64.urlsafe_b64encode(json.dumps(list(key)).encode()).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str, size: int) -> tuple:
+        """Sort key of `size` parts from a cursor, or InvalidCursor"""
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            key = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        except (ValueError, TypeError) as e:
+            raise InvalidCursor(f"Invalid cursor: {cursor}") from e
+        if not isinstance(key, list) or len(key) != size:
+            raise InvalidCursor(f"Invalid cursor: {cursor}")
+        return tuple(key)
+
+    @staticmethod
+    def page(
+        items: List[Any],
+        key: Callable[[Any], tuple],
+        after: Optional[tuple],
+        limit: Optional[int]
+    ) -> Tuple[List[Any], Optional[tuple]]:
+        """
+        One page of `items` in `key` order, starting after `after`.
+
+        Returns:
+            (items, key of the last item if more follow, else None)
+        """
+        ordered = sorted(items, key=key)
+        if after is not None:
+            ordered = [item for item in ordered if key(item) > after]
+        if limit is None or len(ordered) <= limit:
+            return ordered, None
+        return ordered[:limit], key(ordered[limit - 1])
+
+    @staticmethod
+    def filter_assets(
+        assets: List[dict],
+        category: Optional[str] = None,
+        archived: Optional[bool] = None
+    ) -> List[Tuple[int, dict]]:
+        """
+        (position, asset) pairs for the assets passing the filters, like
+        HistoryStore.assets_page: positions are taken before filtering, so
+        they match the document whatever the filters are
+        """
+        return [
+            (position, a) for position, a in enumerate(assets)
+            if (category is None or a.get("category") == category)
+            and (archived is None or bool(a.get("archived")) == archived)
+        ]
+
+    @staticmethod
+    def filter_history(
+        history: List[dict],
+        asset_ids: Optional[List[str]] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None
+    ) -> List[dict]:
+        wanted = set(asset_ids) if asset_ids is not None else None
+        return [
+            h for h in history
+            if (wanted is None or str(h.get("assetId")) in wanted)
+            and (start is None or str(h.get("month")) >= start)
+            and (end is None or str(h.get("month")) <= end)
+        ]
+
+    @staticmethod
+    def project(items: List[dict], fields: Optional[List[str]]) -> List[dict]:
+        """Keep only `fields` of every item (all of them when None)"""
+        if not fields:
+            return items
+        return [{f: item[f] for f in fields if f in item} for item in items]
+
+    @staticmethod
+    def etag(body) -> str:
+        """Strong ETag of a JSON-serializable response body"""
+        digest = hashlib.sha1(json.dumps(body, sort_keys=True, default=str).encode()).hexdigest()
+        return f'"{digest}"'
+
+    @staticmethod
+    def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+        if not if_none_match:
+            return False
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
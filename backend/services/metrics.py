@@ -0,0 +1,125 @@
+"""
+Portfolio metrics engine for WealthHub Backend
+Pivots the history into a month x asset matrix once and computes NAV,
+contributions, profit, ROI and allocation for every asset in bulk
+"""
+
+import logging
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+CASH_ASSET_NAME = "Cash"
+
+
+class PortfolioMetrics:
+    """
+    Same numbers as the Dashboard (WealthContext.tsx), computed server-side.
+
+    - Archived assets are ignored
+    - The asset named "Cash" is reported as `liquidez` and left out of
+      NAV, invested and profit
+    - An asset's NAV is its latest month's `nav`; invested is the sum of
+      all its `contribution` entries
+    - Assets without history count their `baseAmount` as both NAV and
+      invested amount
+    - Allocation is each asset's share of total NAV (in %), compared with
+      its `targetAllocation`
+    """
+
+    @staticmethod
+    def pivot(history: List[dict]) -> Dict[str, pd.DataFrame]:
+        """
+        Month x asset matrices of NAV and contributions.
+
+        Returns:
+            {"nav": DataFrame, "contribution": DataFrame}, both indexed by
+            month (sorted) with one column per assetId. Missing months are NaN
+            for nav and 0 for contributions.
+        """
+        if not history:
+            empty = pd.DataFrame(dtype="float64")
+            return {"nav": empty, "contribution": empty}
+
+        frame = pd.DataFrame.from_records(history, columns=["month", "assetId", "nav", "contribution"])
+        frame["nav"] = pd.to_numeric(frame["nav"], errors="coerce")
+        frame["contribution"] = pd.to_numeric(frame["contribution"], errors="coerce").fillna(0.0)
+
+        nav = frame.pivot_table(index="month", columns="assetId", values="nav", aggfunc="last").sort_index()
+        contribution = frame.pivot_table(
+            index="month", columns="assetId", values="contribution", aggfunc="sum", fill_value=0.0
+        ).sort_index()
+        return {"nav": nav, "contribution": contribution}
+
+    @staticmethod
+    def compute(assets: List[dict], history: List[dict]) -> dict:
+        """
+        Portfolio totals and per-asset metrics.
+
+        Args:
+            assets: Raw asset dicts as stored in GAS
+            history: Raw history entries as stored in GAS
+
+        Returns:
+            Dict with totalNAV, totalInv, totalProfit, roi, liquidez and an
+            `assets` list (one entry per active, non-cash asset)
+        """
+        active = [a for a in assets if not a.get("archived")]
+        cash = next((a for a in active if a.get("name") == CASH_ASSET_NAME), None)
+        invested_assets = [a for a in active if a.get("name") != CASH_ASSET_NAME]
+
+        matrices = PortfolioMetrics.pivot(history)
+        ids = [str(a.get("id")) for a in invested_assets]
+        nav_matrix = matrices["nav"].reindex(columns=ids)
+        contribution_matrix = matrices["contribution"].reindex(columns=ids, fill_value=0.0)
+
+        # Latest known NAV per asset: forward-fill down the months, take the last row
+        if len(nav_matrix.index):
+            last_nav = nav_matrix.ffill().iloc[-1].to_numpy(dtype="float64")
+            last_month = nav_matrix.apply(pd.Series.last_valid_index).to_numpy()
+        else:
+            last_nav = np.full(len(ids), np.nan)
+            last_month = np.full(len(ids), None, dtype=object)
+        invested = contribution_matrix.sum(axis=0).to_numpy(dtype="float64")
+
+        has_history = ~np.isnan(last_nav)
+        base = np.array([float(a.get("baseAmount") or 0.0) for a in invested_assets], dtype="float64")
+        nav = np.where(has_history, last_nav, base)
+        invested = np.where(has_history, invested, base)
+        profit = nav - invested
+        with np.errstate(divide="ignore", invalid="ignore"):
+            roi = np.where(invested > 0, profit / invested * 100, 0.0)
+
+        total_nav = float(nav.sum())
+        total_invested = float(invested.sum())
+        total_profit = total_nav - total_invested
+        allocation = nav / total_nav * 100 if total_nav > 0 else np.zeros(len(ids))
+
+        per_asset = []
+        for i, asset in enumerate(invested_assets):
+            target = asset.get("targetAllocation")
+            per_asset.append({
+                "assetId": ids[i],
+                "name": asset.get("name"),
+                "category": asset.get("category"),
+                "lastMonth": last_month[i] if has_history[i] else None,
+                "nav": round(float(nav[i]), 2),
+                "invested": round(float(invested[i]), 2),
+                "profit": round(float(profit[i]), 2),
+                "roi": round(float(roi[i]), 2),
+                "allocation": round(float(allocation[i]), 2),
+                "targetAllocation": target,
+                "allocationGap": round(float(allocation[i]) - float(target), 2) if target is not None else None,
+            })
+
+        return {
+            "totalNAV": round(total_nav, 2),
+            "totalInv": round(total_invested, 2),
+            "totalProfit": round(total_profit, 2),
+            "roi": round(total_profit / total_invested * 100, 2) if total_invested > 0 else 0.0,
+            "liquidez": float(cash.get("baseAmount") or 0.0) if cash else 0.0,
+            "assets": per_asset,
+        }
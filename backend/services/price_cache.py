@@ -0,0 +1,251 @@
+"""
+Price cache for WealthHub Backend
+Two-level cache (in-process LRU in front of an on-disk SQLite store)
+for prices keyed by (source, symbol, date)
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from config import settings
+from models import PriceData
+from utils import format_date
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, str, str]
+
+
+class PriceCache:
+    """
+    Cache of fetched prices.
+
+    Prices for dates that are already in the past can't change anymore, so
+    they are kept indefinitely. Prices for today (the open month) expire
+    after `open_ttl` seconds, unless today has been sealed after the
+    market close. The in-memory LRU holds at most `memory_size`
+    entries; the SQLite store holds at most `max_rows` entries and evicts
+    the least recently written ones beyond that.
+
+    The cache is shared by the fetch threads, so every operation is
+    guarded by a single lock.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        memory_size: int = 1024,
+        open_ttl: float = 900,
+        max_rows: int = 100000
+    ):
+        self.path = path
+        self.memory_size = memory_size
+        self.open_ttl = open_ttl
+        self.max_rows = max_rows
+        self.hits = 0
+        self.misses = 0
+        self._lru: "OrderedDict[CacheKey, Tuple[dict, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._writes = 0
+        self._sealed: set = set()
+
+    def get(self, source: str, symbol: str, date: datetime) -> Optional[PriceData]:
+        """
+        Look up a cached price.
+
+        Args:
+            source: Source name (e.g., "yfinance", "ft_markets")
+            symbol: Ticker or ISIN
+            date: Date the price was fetched for
+
+        Returns:
+            Cached PriceData, or None on a miss or expired entry
+        """
+        key = (source, symbol, format_date(date))
+        now = time.time()
+
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is None:
+                entry = self._load(key)
+                if entry is not None:
+                    self._remember(key, entry)
+            else:
+                self._lru.move_to_end(key)
+
+            if entry is not None and entry[1] is not None and entry[1] < now:
+                self._forget(key)
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            return PriceData(**entry[0])
+
+    def set(self, source: str, symbol: str, date: datetime, price: PriceData) -> None:
+        """
+        Store a fetched price.
+
+        Args:
+            source: Source name (e.g., "yfinance", "ft_markets")
+            symbol: Ticker or ISIN
+            date: Date the price was fetched for
+            price: Price to cache
+        """
+        key = (source, symbol, format_date(date))
+        expires_at = None if self._is_closed(date) else time.time() + self.open_ttl
+        entry = (price.model_dump(), expires_at)
+
+        with self._lock:
+            self._remember(key, entry)
+            self._store(key, entry)
+
+    def seal(self, date: datetime) -> None:
+        """
+        Treat prices stored for `date` from now on as final, even if it is
+        today. Used once the day's markets have closed.
+        """
+        with self._lock:
+            self._sealed.add(format_date(date))
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters and sizes"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRatio": round(self.hits / total, 4) if total else 0.0,
+                "memoryEntries": len(self._lru),
+                "diskEntries": self._count(),
+            }
+
+    def clear(self) -> None:
+        """Drop every cached price and reset the counters"""
+        with self._lock:
+            self._lru.clear()
+            self.hits = 0
+            self.misses = 0
+            conn = self._connection()
+            if conn is not None:
+                conn.execute("DELETE FROM prices")
+                conn.commit()
+
+    def purge_expired(self) -> int:
+        """Delete expired entries from disk, returning how many were removed"""
+        now = time.time()
+        with self._lock:
+            for key in [k for k, (_, exp) in self._lru.items() if exp is not None and exp < now]:
+                del self._lru[key]
+            conn = self._connection()
+            if conn is None:
+                return 0
+            cursor = conn.execute(
+                "DELETE FROM prices WHERE expires_at IS NOT NULL AND expires_at < ?", (now,)
+            )
+            conn.commit()
+            return cursor.rowcount
+
+    # Internal helpers (caller holds the lock)
+
+    def _is_closed(self, date: datetime) -> bool:
+        return date.date() < datetime.now().date() or format_date(date) in self._sealed
+
+    def _remember(self, key: CacheKey, entry: Tuple[dict, Optional[float]]) -> None:
+        self._lru[key] = entry
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.memory_size:
+            self._lru.popitem(last=False)
+
+    def _forget(self, key: CacheKey) -> None:
+        self._lru.pop(key, None)
+        conn = self._connection()
+        if conn is not None:
+            conn.execute(
+                "DELETE FROM prices WHERE source = ? AND symbol = ? AND date = ?", key
+            )
+            conn.commit()
+
+    def _load(self, key: CacheKey) -> Optional[Tuple[dict, Optional[float]]]:
+        conn = self._connection()
+        if conn is None:
+            return None
+        row = conn.execute(
+            "SELECT payload, expires_at FROM prices WHERE source = ? AND symbol = ? AND date = ?",
+            key
+        ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def _store(self, key: CacheKey, entry: Tuple[dict, Optional[float]]) -> None:
+        conn = self._connection()
+        if conn is None:
+            return
+        conn.execute(
+            "INSERT OR REPLACE INTO prices (source, symbol, date, payload, expires_at, stored_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (*key, json.dumps(entry[0]), entry[1], time.time())
+        )
+        conn.commit()
+
+        # Check the size bound every so often rather than on every write
+        self._writes += 1
+        if self._writes % 100 == 0:
+            self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        excess = self._count() - self.max_rows
+        if excess <= 0:
+            return
+        conn.execute(
+            "DELETE FROM prices WHERE rowid IN "
+            "(SELECT rowid FROM prices ORDER BY stored_at ASC LIMIT ?)",
+            (excess,)
+        )
+        conn.commit()
+        logger.info(f"🧹 Evicted {excess} cached prices")
+
+    def _count(self) -> int:
+        conn = self._connection()
+        if conn is None:
+            return 0
+        return conn.execute("SELECT COUNT(*) FROM prices").fetchone()[0]
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        if not self.path:
+            return None
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS prices ("
+                "source TEXT NOT NULL, symbol TEXT NOT NULL, date TEXT NOT NULL, "
+                "payload TEXT NOT NULL, expires_at REAL, stored_at REAL NOT NULL, "
+                "PRIMARY KEY (source, symbol, date))"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_prices_stored_at ON prices (stored_at)"
+            )
+            self._conn.commit()
+        return self._conn
+
+
+price_cache = PriceCache(
+    path=settings.PRICE_CACHE_PATH,
+    memory_size=settings.PRICE_CACHE_MEMORY_SIZE,
+    open_ttl=settings.PRICE_CACHE_OPEN_TTL,
+    max_rows=settings.PRICE_CACHE_MAX_ROWS
+)
@@ -1,14 +1,35 @@
-import yfinance as yf
-import pandas as pd
+import asyncio
+import json
 import requests
 from typing import Optional, Dict, List, Tuple
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta, timezone
+from urllib.parse import quote
 import logging
+from config import settings
 from models import PriceData
-from utils import format_datetime_iso
+from utils import crypto_base, format_datetime_iso, format_date
+from .http_client import http_clients
+from .instrumentation import instrumentation
+from .price_cache import price_cache
+from .resilience import (
+    RETRYABLE_STATUS, CircuitOpenError, call_with_retry, call_with_retry_sync, raise_for_retryable
+)
+from .series_store import DailySeriesStore, LOOKBACK_DAYS
+from .singleflight import price_flights
 
 logger = logging.getLogger(__name__)
 
+BINANCE_API = "https://api.binance.com/api/v3"
+YAHOO_CHART_API = "https://query2.finance.yahoo.com/v8/finance/chart"
+
+# Crypto prices are quoted in this currency on both Yahoo (BTC-EUR) and Binance (BTCEUR)
+CRYPTO_QUOTE = "EUR"
+# Binance quotes to 8 decimals; fewer would zero out sub-cent coins (SHIB, PEPE)
+CRYPTO_DECIMALS = 8
+
+# Errors from a Yahoo chart request that are worth retrying
+YAHOO_TRANSIENT_ERRORS = (ConnectionError, TimeoutError, requests.ConnectionError, requests.Timeout)
+
 class PriceFetcher:
     HEADERS = {
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36',
@@ -16,70 +37,371 @@ class PriceFetcher:
     }
 
     @staticmethod
-    def fetch_bitcoin_price(date: datetime) -> Optional[PriceData]:
-        # Intento 1: Yahoo Finance
-        try:
-            session = requests.Session()
-            session.headers.update(PriceFetcher.HEADERS)
-            btc_ticker = yf.Ticker("BTC-USD", session=session)
-            ticker = yf.Ticker("BTC-EUR", session=session)
-            hist = ticker.history(period="5d") # Pedimos 5 días para asegurar
-            btc_hist = btc_ticker.history(period="5d")
-
-            logger.info(f"📈 Historial de BTC-EUR: {hist.tail(2)}")
-            logger.info(f"📈 Historial de BTC-USD: {btc_hist.tail(2)}")
-            
-            if not hist.empty:
-                close_price = float(hist['Close'].iloc[-1])
-                return PriceData(
-                    assetId="btc",
-                    assetName="Bitcoin",
-                    ticker="BTC-EUR",
-                    price=round(close_price, 2),
-                    currency="EUR",
-                    fetchedAt=format_datetime_iso(datetime.now()),
-                    source="yfinance"
+    @instrumentation.timed("crypto_prices")
+    async def fetch_crypto_prices(
+        assets: List[dict],
+        dates: List[datetime],
+        errors: Optional[List[str]] = None
+    ) -> Dict[str, List[PriceData]]:
+        """
+        Fetch the EUR close on or before each date for every crypto asset.
+
+        Each coin is priced once however many assets hold it. Coins not in
+        the price cache are looked up in the Yahoo daily series (one chart
+        request per coin for the days it is missing); whatever Yahoo
+        doesn't return is asked to Binance, with a single multi-symbol call
+        for today's prices. Coins without a price are appended to `errors` when
+        provided.
+
+        Args:
+            assets: Crypto asset dicts (`id`, `name`, `ticker`)
+            dates: Dates to fetch prices for
+
+        Returns:
+            Dict of PriceData lists keyed by YYYY-MM-DD date, one entry per
+            asset with its own assetId and assetName
+        """
+        holders: Dict[str, List[dict]] = {}
+        for asset in assets:
+            base = crypto_base(asset.get("ticker"))
+            if base:
+                holders.setdefault(base, []).append(asset)
+
+        prices: Dict[Tuple[str, str], PriceData] = {}
+        missing: List[Tuple[str, datetime]] = []
+        for base in holders:
+            for date in dates:
+                cached = (
+                    price_cache.get("yfinance", f"{base}-{CRYPTO_QUOTE}", date)
+                    or price_cache.get("binance_api", f"{base}-{CRYPTO_QUOTE}", date)
                 )
-        except Exception as e:
-            logger.warning(f"⚠️ Yahoo falló para BTC: {e}. Intentando Binance...")
+                if cached:
+                    prices[(base, format_date(date))] = cached
+                else:
+                    missing.append((base, date))
 
-        # Intento 2: Fallback Binance API (Pública y sin bloqueos)
-        try:
-            res = requests.get("https://api.binance.com/api/v3/ticker/price?symbol=BTCEUR", timeout=10)
-            data = res.json()
+        if missing:
+            # Concurrent requests for the same coins and days share one fetch
+            key = ("crypto", tuple(sorted((base, format_date(date)) for base, date in missing)))
+            prices.update(await price_flights.do(key, lambda: PriceFetcher._fetch_crypto_uncached(missing)))
+
+        results: Dict[str, List[PriceData]] = {format_date(d): [] for d in dates}
+        for base, base_assets in holders.items():
+            for date in dates:
+                price_data = prices.get((base, format_date(date)))
+                if price_data is None:
+                    if errors is not None:
+                        suffix = f" on {format_date(date)}" if len(dates) > 1 else ""
+                        errors.extend(f"Failed to fetch price for {asset.get('name')} ({base}){suffix}" for asset in base_assets)
+                    continue
+                results[format_date(date)].extend(
+                    price_data.model_copy(update={"assetId": asset["id"], "assetName": asset["name"]})
+                    for asset in base_assets
+                )
+        return results
+
+    @staticmethod
+    async def _fetch_crypto_uncached(missing: List[Tuple[str, datetime]]) -> Dict[Tuple[str, str], PriceData]:
+        """Prices for (coin, date) pairs: Yahoo daily series first, Binance for the rest"""
+        prices: Dict[Tuple[str, str], PriceData] = {}
+        fetched_at = format_datetime_iso(datetime.now())
+
+        def price(base: str, close: float, source: str) -> PriceData:
             return PriceData(
-                assetId="btc",
-                assetName="Bitcoin",
-                ticker="BTC-EUR",
-                price=round(float(data['price']), 2),
-                currency="EUR",
-                fetchedAt=format_datetime_iso(datetime.now()),
-                source="binance_api"
+                assetId=base.lower(),
+                assetName=base,
+                ticker=f"{base}-{CRYPTO_QUOTE}",
+                price=round(close, CRYPTO_DECIMALS),
+                currency=CRYPTO_QUOTE,
+                fetchedAt=fetched_at,
+                source=source
+            )
+
+        # Intento 1: Yahoo Finance (series diarias, cierre en o antes de la fecha)
+        symbols = sorted({f"{base}-{CRYPTO_QUOTE}" for base, _ in missing})
+        dates = [date for _, date in missing]
+        try:
+            # Las descargas de Yahoo son bloqueantes: se ejecutan en un hilo
+            await asyncio.to_thread(
+                yahoo_series.ensure, symbols, min(dates) - timedelta(days=LOOKBACK_DAYS), max(dates)
             )
         except Exception as e:
-            logger.error(f"❌ Fallo total en BTC: {e}")
-            return None
+            logger.warning(f"⚠️ Yahoo falló para {', '.join(symbols)}: {e}. Intentando Binance...")
+
+        for base, date in missing:
+            close = yahoo_series.lookup(f"{base}-{CRYPTO_QUOTE}", date)
+            if close:
+                logger.info(f"📈 {base}-{CRYPTO_QUOTE} cierre {close[0]}: {close[1]}")
+                prices[(base, format_date(date))] = price(base, close[1], "yfinance")
+
+        # Intento 2: Fallback Binance API (Pública y sin bloqueos)
+        pending = [(base, date) for base, date in missing if (base, format_date(date)) not in prices]
+        if pending:
+            try:
+                closes = await PriceFetcher._binance_closes(pending)
+            except Exception as e:
+                logger.error(f"❌ Binance falló para {', '.join(sorted({base for base, _ in pending}))}: {e}")
+                closes = {}
+            for (base, day), close in closes.items():
+                prices[(base, day)] = price(base, close, "binance_api")
+
+        for base, date in missing:
+            price_data = prices.get((base, format_date(date)))
+            if price_data:
+                price_cache.set(price_data.source, f"{base}-{CRYPTO_QUOTE}", date, price_data)
+        return prices
 
     @staticmethod
-    def fetch_multiple_stocks(tickers: Dict[str, Tuple[str, str]], date: datetime) -> List[PriceData]:
-        prices = []
-        session = requests.Session()
-        session.headers.update(PriceFetcher.HEADERS)
-        
+    async def _binance_closes(pairs: List[Tuple[str, datetime]]) -> Dict[Tuple[str, str], float]:
+        """
+        Binance closes for (coin, date) pairs, keyed by (coin, YYYY-MM-DD).
+
+        Today's prices come from one `ticker/price?symbols=[...]` call.
+        Klines have no multi-symbol form, so past days are one call per
+        coin and day, run concurrently. Pairs Binance doesn't know are
+        left out.
+        """
+        client = http_clients.get(BINANCE_API)
+
+        async def get(path: str, params: dict):
+            res = await client.get(f"{BINANCE_API}/{path}", params=params, timeout=10)
+            return raise_for_retryable(res)
+
+        today = datetime.now().date()
+        live = sorted({base for base, date in pairs if date.date() >= today})
+        past = [(base, date) for base, date in pairs if date.date() < today]
+        closes: Dict[Tuple[str, str], float] = {}
+
+        async def tickers(params: dict) -> List[dict]:
+            res = await call_with_retry("binance_api", lambda: get("ticker/price", params))
+            body = res.json()
+            return body if isinstance(body, list) else [body]
+
+        if live:
+            symbols = {f"{base}{CRYPTO_QUOTE}": base for base in live}
+            found = await tickers({"symbols": json.dumps(sorted(symbols), separators=(",", ":"))})
+            if len(symbols) > 1 and not any(t.get("symbol") in symbols for t in found):
+                # One unknown symbol fails the whole batch (400); ask for each coin on its own
+                logger.warning(f"⚠️ Binance rechazó el lote {', '.join(symbols)}, consultando uno a uno")
+                batches = await asyncio.gather(*(tickers({"symbol": symbol}) for symbol in symbols))
+                found = [t for batch in batches for t in batch]
+            day = format_date(datetime.now())
+            for ticker in found:
+                if ticker.get("symbol") in symbols:
+                    closes[(symbols[ticker["symbol"]], day)] = float(ticker["price"])
+
+        async def kline(base: str, date: datetime) -> None:
+            day_start = int(datetime(date.year, date.month, date.day, tzinfo=timezone.utc).timestamp() * 1000)
+            params = {
+                "symbol": f"{base}{CRYPTO_QUOTE}",
+                "interval": "1d",
+                "startTime": day_start,
+                "endTime": day_start + 86400000 - 1,
+                "limit": 1
+            }
+            try:
+                res = await call_with_retry("binance_api", lambda: get("klines", params))
+                klines = res.json()
+                if klines:
+                    closes[(base, format_date(date))] = float(klines[0][4])  # [open time, open, high, low, close, ...]
+            except Exception as e:
+                logger.warning(f"⚠️ Binance sin cierre para {base} en {format_date(date)}: {e}")
+
+        await asyncio.gather(*(kline(base, date) for base, date in past))
+        return closes
+
+    @staticmethod
+    def fetch_multiple_stocks(
+        tickers: Dict[str, Tuple[str, str]],
+        date: datetime,
+        errors: Optional[List[str]] = None,
+        batch_size: Optional[int] = None
+    ) -> List[PriceData]:
+        """
+        Fetch the close on or before `date` for many tickers.
+
+        Cached closes are served from the price cache. The remaining
+        tickers are looked up in the daily series store, which downloads
+        only the days it doesn't have yet, `batch_size` tickers per loader
+        call. Tickers without a close are
+        appended to `errors` when provided.
+        """
+        return PriceFetcher.fetch_stock_range(tickers, [date], errors=errors, batch_size=batch_size)[format_date(date)]
+
+    @staticmethod
+    @instrumentation.timed("stock_prices")
+    def fetch_stock_range(
+        tickers: Dict[str, Tuple[str, str]],
+        dates: List[datetime],
+        errors: Optional[List[str]] = None,
+        batch_size: Optional[int] = None
+    ) -> Dict[str, List[PriceData]]:
+        """
+        Fetch the close on or before each date for many tickers.
+
+        The daily series of every ticker is extended once to cover all
+        requested dates, then each date is answered with a binary search.
+
+        Returns:
+            Dict of PriceData lists keyed by YYYY-MM-DD date
+        """
+        results: Dict[str, List[PriceData]] = {format_date(d): [] for d in dates}
+
+        # Serve what we can from the cache and remember which dates are missing
+        pending: Dict[str, List[datetime]] = {}
         for ticker_symbol, (name, asset_id) in tickers.items():
+            for date in dates:
+                cached = price_cache.get("yfinance", ticker_symbol, date)
+                if cached:
+                    results[format_date(date)].append(
+                        cached.model_copy(update={"assetId": asset_id, "assetName": name})
+                    )
+                else:
+                    pending.setdefault(ticker_symbol, []).append(date)
+        if not pending:
+            return results
+
+        # Tickers another thread is already fetching for the same date are
+        # waited for instead of downloaded twice
+        keys = {
+            ("yfinance", ticker_symbol, format_date(date)): (ticker_symbol, date)
+            for ticker_symbol, ticker_dates in pending.items() for date in ticker_dates
+        }
+        owned, waiting = price_flights.claim(keys)
+        try:
+            PriceFetcher._fetch_pending(
+                _group_by_ticker(keys[key] for key in owned), tickers, results, errors, len(dates) > 1, batch_size
+            )
+        finally:
+            price_flights.release(owned)
+
+        leftover = []
+        for key, event in waiting.items():
+            event.wait(settings.FETCH_DEADLINE)
+            ticker_symbol, date = keys[key]
+            cached = price_cache.get("yfinance", ticker_symbol, date)
+            if cached:
+                name, asset_id = tickers[ticker_symbol]
+                results[format_date(date)].append(
+                    cached.model_copy(update={"assetId": asset_id, "assetName": name})
+                )
+            else:
+                leftover.append(keys[key])
+        if leftover:
+            # The other fetch came back empty; the series store already has
+            # its window, so this only re-reads it (and reports the errors)
+            PriceFetcher._fetch_pending(
+                _group_by_ticker(leftover), tickers, results, errors, len(dates) > 1, batch_size
+            )
+        return results
+
+    @staticmethod
+    def _fetch_pending(
+        pending: Dict[str, List[datetime]],
+        tickers: Dict[str, Tuple[str, str]],
+        results: Dict[str, List[PriceData]],
+        errors: Optional[List[str]],
+        many_dates: bool,
+        batch_size: Optional[int]
+    ) -> None:
+        """Extend the daily series for the pending dates and add their closes to results"""
+        if not pending:
+            return
+
+        missing_dates = [d for ds in pending.values() for d in ds]
+        yahoo_series.ensure(
+            list(pending.keys()),
+            min(missing_dates) - timedelta(days=LOOKBACK_DAYS),
+            max(missing_dates),
+            batch_size=batch_size
+        )
+
+        fetched_at = format_datetime_iso(datetime.now())
+        for ticker_symbol, ticker_dates in pending.items():
+            name, asset_id = tickers[ticker_symbol]
+            for date in ticker_dates:
+                close = yahoo_series.lookup(ticker_symbol, date)
+                if close is None:
+                    logger.warning(f"Sin precio para {ticker_symbol} en {format_date(date)}")
+                    if errors is not None:
+                        suffix = f" on {format_date(date)}" if many_dates else ""
+                        errors.append(f"Failed to fetch price for {ticker_symbol}{suffix}")
+                    continue
+                price_data = PriceData(
+                    assetId=asset_id,
+                    assetName=name,
+                    ticker=ticker_symbol,
+                    price=round(close[1], 2),
+                    fetchedAt=fetched_at,
+                    source="yfinance"
+                )
+                price_cache.set("yfinance", ticker_symbol, date, price_data)
+                results[format_date(date)].append(price_data)
+
+    @staticmethod
+    def _download_closes(symbols: List[str], start: date, end: date) -> Dict[str, List[Tuple[date, float]]]:
+        """
+        Daily closes for several symbols from Yahoo's chart API.
+
+        The chart API has no multi-symbol form, so each symbol is its own
+        request on the pooled session and is retried on its own: a rate
+        limit on one ticker doesn't download the rest of the batch again.
+        Symbols that fail or that Yahoo doesn't know are left out.
+        """
+        session = http_clients.session()
+        params = {
+            "period1": int(datetime(start.year, start.month, start.day, tzinfo=timezone.utc).timestamp()),
+            "period2": int(datetime(end.year, end.month, end.day, tzinfo=timezone.utc).timestamp()) + 86400,
+            "interval": "1d",
+        }
+
+        series = {}
+        for symbol in symbols:
             try:
-                # Usamos download directamente que a veces es más estable que el objeto Ticker
-                data = yf.download(ticker_symbol, period="5d", session=session, progress=False)
-                if not data.empty:
-                    price = float(data['Close'].iloc[-1])
-                    prices.append(PriceData(
-                        assetId=asset_id,
-                        assetName=name,
-                        ticker=ticker_symbol,
-                        price=round(price, 2),
-                        fetchedAt=format_datetime_iso(datetime.now()),
-                        source="yfinance"
-                    ))
+                points = call_with_retry_sync(
+                    "yfinance",
+                    lambda: PriceFetcher._chart_closes(session, symbol, params),
+                    retryable=lambda e: isinstance(e, YAHOO_TRANSIENT_ERRORS)
+                )
+            except CircuitOpenError as e:
+                logger.warning(f"⚠️ Yahoo: {e}; {len(symbols) - len(series)} símbolos sin descargar")
+                break
             except Exception as e:
-                logger.warning(f"Error con {ticker_symbol}: {e}")
-        return prices
\ No newline at end of file
+                logger.warning(f"⚠️ Yahoo sin serie para {symbol}: {e}")
+                continue
+            series[symbol] = [(day, close) for day, close in points if start <= day <= end]
+        return series
+
+    @staticmethod
+    def _chart_closes(session: requests.Session, symbol: str, params: dict) -> List[Tuple[date, float]]:
+        """(day, close) pairs from one chart request, days in the exchange's time zone"""
+        res = session.get(
+            f"{YAHOO_CHART_API}/{quote(symbol)}", params=params,
+            headers=PriceFetcher.HEADERS, timeout=settings.TIMEOUT
+        )
+        if res.status_code in RETRYABLE_STATUS:
+            raise ConnectionError(f"{res.status_code} from Yahoo for {symbol}")
+        # Unknown symbols answer 404 with `result: null` and the reason in `error`
+        chart = res.json().get("chart") or {}
+        result = (chart.get("result") or [None])[0]
+        if not result:
+            error = chart.get("error") or {}
+            raise ValueError(error.get("description") or f"HTTP {res.status_code}")
+
+        offset = result.get("meta", {}).get("gmtoffset") or 0
+        quotes = (result.get("indicators", {}).get("quote") or [{}])[0]
+        return [
+            (datetime.fromtimestamp(ts + offset, tz=timezone.utc).date(), float(close))
+            for ts, close in zip(result.get("timestamp") or [], quotes.get("close") or [])
+            if close is not None
+        ]
+
+
+def _group_by_ticker(pairs) -> Dict[str, List[datetime]]:
+    grouped: Dict[str, List[datetime]] = {}
+    for ticker_symbol, date in pairs:
+        grouped.setdefault(ticker_symbol, []).append(date)
+    return grouped
+
+
+yahoo_series = DailySeriesStore(PriceFetcher._download_closes, batch_size=settings.STOCK_BATCH_SIZE)
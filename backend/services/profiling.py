@@ -0,0 +1,274 @@
+"""
+Per-request profiling for WealthHub Backend
+Opt-in breakdown of a single request: timed spans per phase plus a
+sampling profile of every thread, grouped by library
+"""
+
+import json
+import logging
+import os
+import re
+import secrets
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+MODES = ("inline", "save")
+
+BACKEND_DIR = str(Path(__file__).resolve().parent.parent)
+
+# First match walking from the innermost frame outwards names the sample
+LIBRARIES = (
+    ("pandas", ("/pandas/",)),
+    ("numpy", ("/numpy/",)),
+    ("bs4", ("/bs4/",)),
+    ("lxml", ("/lxml/",)),
+    ("pydantic", ("/pydantic/", "/pydantic_core/")),
+    ("network", ("/socket.py", "/ssl.py", "/httpx/", "/httpcore/", "/h11/", "/h2/",
+                 "/requests/", "/urllib3/", "/http/client.py")),
+    ("sqlite", ("/sqlite3/",)),
+    ("json", ("/json/",)),
+)
+
+# Innermost frames of a thread with nothing to do (pool workers, waiters)
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+}
+
+_NULL_SPAN = nullcontext()
+
+_current: ContextVar[Optional["RequestProfile"]] = ContextVar("request_profile", default=None)
+
+
+class _Sampler(threading.Thread):
+    """Snapshots the stack of every other thread each `interval` seconds"""
+
+    def __init__(self, interval: float):
+        super().__init__(name="profiler", daemon=True)
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.ticks = 0
+        self._done = threading.Event()
+
+    def run(self) -> None:
+        own = threading.get_ident()
+        names = {}
+        while not self._done.wait(self.interval):
+            self.ticks += 1
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                if ident not in names:
+                    names.update({t.ident: re.sub(r"_\d+$", "", t.name) for t in threading.enumerate()})
+                    names.setdefault(ident, str(ident))
+                self.stacks[(names[ident], _stack(frame))] += 1
+
+    def stop(self) -> None:
+        self._done.set()
+        self.join()
+
+
+class RequestProfile:
+    """Spans and stack samples recorded while one request runs"""
+
+    def __init__(self, label: str, interval: float):
+        self.label = label
+        self.started_at = datetime.now()
+        self.wall = 0.0
+        self.spans: List[Tuple[str, float, float]] = []  # (name, start offset, duration)
+        self._started = time.perf_counter()
+        self._sampler = _Sampler(interval)
+
+    def start(self) -> None:
+        self._sampler.start()
+
+    def stop(self) -> None:
+        self._sampler.stop()
+        self.wall = time.perf_counter() - self._started
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            # list.append is atomic, spans may close on any thread or task
+            self.spans.append((name, started - self._started, time.perf_counter() - started))
+
+    def report(self, top: int = 25) -> dict:
+        """Breakdown as a JSON-serializable dict"""
+        by_span: Dict[str, dict] = {}
+        for name, offset, duration in self.spans:
+            entry = by_span.setdefault(name, {"name": name, "count": 0, "totalMs": 0.0, "maxMs": 0.0, "startMs": offset * 1000})
+            entry["count"] += 1
+            entry["totalMs"] += duration * 1000
+            entry["maxMs"] = max(entry["maxMs"], duration * 1000)
+            entry["startMs"] = min(entry["startMs"], offset * 1000)
+
+        libraries: Counter = Counter()
+        own: Counter = Counter()
+        cumulative: Counter = Counter()
+        idle = 0
+        for (_, stack), count in self._sampler.stacks.items():
+            if not stack or (os.path.basename(stack[-1][0]), stack[-1][1]) in IDLE_FRAMES:
+                idle += count
+                continue
+            libraries[_library(stack)] += count
+            own[_function(stack[-1])] += count
+            for function in {_function(frame) for frame in stack}:
+                cumulative[function] += count
+
+        busy = sum(libraries.values())
+        return {
+            "label": self.label,
+            "startedAt": self.started_at.isoformat(timespec="seconds"),
+            "wallMs": round(self.wall * 1000, 1),
+            "spans": [
+                {**entry, "totalMs": round(entry["totalMs"], 1), "maxMs": round(entry["maxMs"], 1), "startMs": round(entry["startMs"], 1)}
+                for entry in sorted(by_span.values(), key=lambda e: e["startMs"])
+            ],
+            "sampling": {
+                "intervalMs": self._sampler.interval * 1000,
+                "ticks": self._sampler.ticks,
+                "busySamples": busy,
+                "idleSamples": idle,
+                "libraries": {
+                    name: {"samples": count, "share": round(count / busy, 3)}
+                    for name, count in libraries.most_common()
+                },
+                "topFunctions": [
+                    {"function": name, "self": count, "total": cumulative[name]}
+                    for name, count in own.most_common(top)
+                ],
+            },
+        }
+
+    def folded(self) -> str:
+        """Samples as collapsed stacks (`thread;outer;...;inner count`), for flame graph tools"""
+        lines = []
+        for (thread, stack), count in sorted(self._sampler.stacks.items(), key=lambda item: -item[1]):
+            lines.append(";".join([thread, *(_function(frame) for frame in stack)]) + f" {count}")
+        return "\n".join(lines) + "\n"
+
+
+class Profiler:
+    """
+    Opt-in profiling of single requests, for admins only.
+
+    A request asks for it with `?profile=inline|save` (or the `X-Profile`
+    header) and the PROFILING_TOKEN in `X-Admin-Token`. While it runs, a
+    sampler thread snapshots every thread's stack each
+    PROFILE_SAMPLE_INTERVAL seconds and `span()` records the phases the
+    request goes through. Samples are process-wide, so other requests
+    running at the same time show up in them too.
+
+    Without a profile in progress `span()` returns a shared no-op context
+    manager, and nothing else runs.
+    """
+
+    @property
+    def enabled(self) -> bool:
+        return bool(settings.PROFILING_TOKEN)
+
+    def authorize(self, mode: Optional[str], token: Optional[str]) -> Optional[str]:
+        """
+        Check a profiling request.
+
+        Returns:
+            The mode to use, or None when profiling wasn't asked for
+
+        Raises:
+            PermissionError: Profiling is disabled or the token doesn't match
+            ValueError: Unknown mode
+        """
+        if not mode:
+            return None
+        if mode not in MODES:
+            raise ValueError(f"profile must be one of: {', '.join(MODES)}")
+        if not self.enabled:
+            raise PermissionError("Profiling is disabled")
+        if not token or not secrets.compare_digest(token.encode(), settings.PROFILING_TOKEN.encode()):
+            raise PermissionError("Invalid admin token")
+        return mode
+
+    @contextmanager
+    def profile(self, label: str) -> Iterator[RequestProfile]:
+        """Profile the code run inside the block (and the tasks it starts)"""
+        run = RequestProfile(label, settings.PROFILE_SAMPLE_INTERVAL)
+        token = _current.set(run)
+        run.start()
+        try:
+            yield run
+        finally:
+            run.stop()
+            _current.reset(token)
+            logger.info(f"🔬 Profiled {label} in {run.wall * 1000:.0f} ms")
+
+    def span(self, name: str):
+        """Time a phase of the request being profiled (no-op otherwise)"""
+        run = _current.get()
+        return run.span(name) if run is not None else _NULL_SPAN
+
+    def save(self, run: RequestProfile) -> str:
+        """
+        Write a profile to PROFILE_DIR as `<id>.json` and `<id>.folded`.
+
+        Returns:
+            The profile id
+        """
+        directory = Path(settings.PROFILE_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9]+", "-", run.label).strip("-")
+        profile_id = f"{run.started_at:%Y%m%d-%H%M%S}-{slug}-{secrets.token_hex(3)}"
+        (directory / f"{profile_id}.json").write_text(json.dumps(run.report(), indent=2), encoding="utf-8")
+        (directory / f"{profile_id}.folded").write_text(run.folded(), encoding="utf-8")
+        logger.info(f"🔬 Profile saved to {directory / profile_id}.json")
+        return profile_id
+
+
+def _stack(frame) -> tuple:
+    """(filename, function) pairs from the outermost frame to `frame`"""
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        frames.append((code.co_filename, code.co_name))
+        frame = frame.f_back
+    return tuple(reversed(frames))
+
+
+def _function(frame: Tuple[str, str]) -> str:
+    filename, name = frame
+    if filename.startswith(BACKEND_DIR):
+        filename = os.path.relpath(filename, BACKEND_DIR)
+    else:
+        filename = os.path.basename(filename)
+    return f"{filename}:{name}"
+
+
+def _library(stack: tuple) -> str:
+    for filename, name in reversed(stack):
+        path = filename.replace("\\", "/")
+        if path.endswith("/selectors.py"):
+            return "event_loop_wait"
+        for library, markers in LIBRARIES:
+            if any(marker in path for marker in markers):
+                return library
+        if path.startswith(BACKEND_DIR.replace("\\", "/")) and "site-packages" not in path:
+            return "app"
+    return "other"
+
+
+profiler = Profiler()
@@ -0,0 +1,202 @@
+"""
+Monte Carlo projections for WealthHub Backend
+Simulates many portfolio paths month by month with NumPy, drawing monthly
+returns from the stored history, and reports percentile bands
+"""
+
+import logging
+import math
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+PERCENTILES = (5, 50, 95)
+
+# Fewer monthly returns than this and the history says too little about
+# the distribution; the normal model with the request's rates is used
+MIN_BOOTSTRAP_MONTHS = 12
+
+
+def simulate_batch(
+    returns: Optional[np.ndarray],
+    mean: float,
+    stdev: float,
+    initial: float,
+    contribution: float,
+    months: int,
+    paths: int,
+    seed: np.random.SeedSequence
+) -> Dict[str, np.ndarray]:
+    """
+    Simulate one batch of paths.
+
+    Every month is one array operation over all paths: add the
+    contribution, then apply that month's return. Returns are resampled
+    from `returns` (bootstrap) or drawn from a normal distribution when
+    `returns` is None.
+
+    Returns:
+        {"bands": (months x len(PERCENTILES)) percentiles of value,
+         "loss": fraction of paths ending below the invested capital}
+    """
+    rng = np.random.default_rng(seed)
+    values = np.full(paths, float(initial))
+    bands = np.empty((months, len(PERCENTILES)))
+    for month in range(months):
+        if returns is not None:
+            monthly = returns[rng.integers(0, len(returns), size=paths)]
+        else:
+            monthly = rng.normal(mean, stdev, size=paths)
+        values += contribution
+        values *= 1.0 + monthly
+        bands[month] = np.percentile(values, PERCENTILES)
+    invested = initial + contribution * months
+    return {"bands": bands, "loss": float(np.mean(values < invested))}
+
+
+class MonteCarloEngine:
+    """
+    Runs simulations in batches of `batch_paths` paths.
+
+    Batches run in-process, or on a process pool when `workers` > 0 and
+    the request is larger than `process_threshold` paths. Batches are
+    started until `latency_budget` seconds have passed; any left unstarted
+    are dropped and the response says how many paths actually ran.
+
+    Each batch reports its own percentiles and the results are averaged
+    across batches (weighted by size). With batches of thousands of paths
+    this is indistinguishable from percentiles over all paths, and it
+    keeps memory flat regardless of the path count.
+    """
+
+    def __init__(
+        self,
+        batch_paths: int = 10000,
+        workers: int = 0,
+        process_threshold: int = 200000,
+        latency_budget: float = 2.0
+    ):
+        self.batch_paths = batch_paths
+        self.workers = workers
+        self.process_threshold = process_threshold
+        self.latency_budget = latency_budget
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def simulate(
+        self,
+        history_returns: Sequence[float],
+        initial: float,
+        contribution: float,
+        months: int,
+        paths: int,
+        annual_rate: float,
+        annual_volatility: float,
+        seed: Optional[int] = None
+    ) -> dict:
+        """
+        Project the portfolio `months` months ahead.
+
+        Args:
+            history_returns: Monthly portfolio returns (fractions) to bootstrap from
+            initial: Starting value
+            contribution: Amount added at the start of every month
+            months: Months to project
+            paths: Paths requested
+            annual_rate: Expected annual return (%) if history is too short
+            annual_volatility: Annual volatility (%) if history is too short
+            seed: Seed for reproducible results
+
+        Returns:
+            Dict with the method used, paths run, monthly bands and the
+            final-month summary
+        """
+        started = time.perf_counter()
+        returns = np.asarray([r for r in history_returns if np.isfinite(r)], dtype="float64")
+        bootstrap = len(returns) >= MIN_BOOTSTRAP_MONTHS
+        mean = (1 + annual_rate / 100) ** (1 / 12) - 1
+        stdev = annual_volatility / 100 / math.sqrt(12)
+
+        sizes = [self.batch_paths] * (paths // self.batch_paths)
+        if paths % self.batch_paths:
+            sizes.append(paths % self.batch_paths)
+        seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+        args = [
+            (returns if bootstrap else None, mean, stdev, initial, contribution, months, size, batch_seed)
+            for size, batch_seed in zip(sizes, seeds)
+        ]
+
+        deadline = started + self.latency_budget
+        if self.workers > 0 and paths > self.process_threshold:
+            results = self._run_pool(args, deadline)
+        else:
+            results = self._run_local(args, deadline)
+
+        ran = sum(size for size, _ in results)
+        weights = np.array([size for size, _ in results], dtype="float64") / ran
+        bands = sum(w * r["bands"] for w, (_, r) in zip(weights, results))
+        loss = float(sum(w * r["loss"] for w, (_, r) in zip(weights, results)))
+        elapsed = time.perf_counter() - started
+        if ran < paths:
+            logger.warning(f"⏱️ Projection budget reached: {ran}/{paths} paths in {elapsed:.2f}s")
+
+        return {
+            "method": "bootstrap" if bootstrap else "normal",
+            "historyMonths": int(len(returns)),
+            "requestedPaths": paths,
+            "paths": ran,
+            "truncated": ran < paths,
+            "elapsedMs": round(elapsed * 1000, 1),
+            "bands": [
+                {
+                    "monthIndex": month + 1,
+                    "invested": round(initial + contribution * (month + 1), 2),
+                    **{f"p{p}": round(float(bands[month, i]), 2) for i, p in enumerate(PERCENTILES)},
+                }
+                for month in range(months)
+            ],
+            "probabilityOfLoss": round(loss * 100, 2),
+        }
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _run_local(self, args: List[tuple], deadline: float) -> List[tuple]:
+        results = []
+        for batch in args:
+            # The first batch always runs so there is something to return
+            if results and time.perf_counter() >= deadline:
+                break
+            results.append((batch[6], simulate_batch(*batch)))
+        return results
+
+    def _run_pool(self, args: List[tuple], deadline: float) -> List[tuple]:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        futures = {self._pool.submit(simulate_batch, *batch): batch[6] for batch in args}
+        results = []
+        pending = set(futures)
+        while pending:
+            timeout = max(0.0, deadline - time.perf_counter())
+            if results and timeout == 0:
+                break
+            done, pending = wait(pending, timeout=timeout if results else None, return_when=FIRST_COMPLETED)
+            results.extend((futures[f], f.result()) for f in done)
+        for future in pending:
+            future.cancel()
+        return results
+
+
+projection_engine = MonteCarloEngine(
+    batch_paths=settings.PROJECTION_BATCH_PATHS,
+    workers=settings.PROJECTION_WORKERS,
+    process_threshold=settings.PROJECTION_PROCESS_THRESHOLD,
+    latency_budget=settings.PROJECTION_LATENCY_BUDGET
+)
@@ -0,0 +1,121 @@
+"""
+Service registry for WealthHub Backend
+Heavy backends (pandas, NumPy, lxml/bs4) are imported on first
+use instead of at startup, so a worker can answer /health right away
+"""
+
+import importlib
+import logging
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class LazyService:
+    """
+    Stand-in for a registered service object. Any attribute access imports
+    the module behind it and forwards to the real object, so call sites
+    (`PriceFetcher.fetch_crypto_prices(...)`) don't change.
+    """
+
+    __slots__ = ("_registry", "_name")
+
+    def __init__(self, registry: "ServiceRegistry", name: str):
+        self._registry = registry
+        self._name = name
+
+    def __getattr__(self, attr: str):
+        return getattr(self._registry.get(self._name), attr)
+
+    def __setattr__(self, attr: str, value) -> None:
+        if attr in LazyService.__slots__:
+            object.__setattr__(self, attr, value)
+        else:
+            setattr(self._registry.get(self._name), attr, value)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._registry.is_loaded(self._name) else "not loaded"
+        return f"<LazyService {self._name} ({state})>"
+
+
+class ServiceRegistry:
+    """
+    Named services resolved from `module:attribute` on first use.
+
+    Importing a module is done once (under a lock, so concurrent first
+    calls from the fetch threads wait for the same import) and its
+    duration is kept for /services/status.
+    """
+
+    def __init__(self):
+        self._specs: Dict[str, Tuple[str, str]] = {}
+        self._services: Dict[str, object] = {}
+        self._load_times: Dict[str, float] = {}
+        self._lock = threading.RLock()
+
+    def register(self, name: str, module: str, attr: str) -> None:
+        self._specs[name] = (module, attr)
+
+    def lazy(self, name: str) -> LazyService:
+        """Proxy for a registered service"""
+        if name not in self._specs:
+            raise KeyError(f"Unknown service: {name}")
+        return LazyService(self, name)
+
+    def get(self, name: str):
+        """The service object, importing its module if needed"""
+        service = self._services.get(name)
+        if service is not None:
+            return service
+        with self._lock:
+            if name not in self._services:
+                module, attr = self._specs[name]
+                started = time.perf_counter()
+                self._services[name] = getattr(importlib.import_module(module), attr)
+                self._load_times[name] = time.perf_counter() - started
+                logger.info(f"📦 Loaded {name} in {self._load_times[name] * 1000:.0f} ms")
+            return self._services[name]
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._services
+
+    def warm_up(self, names: Optional[Iterable[str]] = None) -> Dict[str, float]:
+        """
+        Import services ahead of their first request.
+
+        Args:
+            names: Services to load (all registered ones when None)
+
+        Returns:
+            Seconds spent per service (0 for those already loaded)
+        """
+        timings = {}
+        for name in names if names is not None else list(self._specs):
+            if name not in self._specs:
+                logger.warning(f"⚠️ Unknown service in warm-up list: {name}")
+                continue
+            loaded = self.is_loaded(name)
+            self.get(name)
+            timings[name] = 0.0 if loaded else self._load_times[name]
+        return timings
+
+    def status(self) -> List[dict]:
+        return [
+            {
+                "name": name,
+                "module": module,
+                "loaded": self.is_loaded(name),
+                "loadMs": round(self._load_times[name] * 1000, 1) if name in self._load_times else None,
+            }
+            for name, (module, _) in self._specs.items()
+        ]
+
+
+service_registry = ServiceRegistry()
+service_registry.register("price_fetcher", "services.price_fetcher", "PriceFetcher")
+service_registry.register("fund_scraper", "services.fund_scraper", "FundScraper")
+service_registry.register("portfolio_metrics", "services.metrics", "PortfolioMetrics")
+service_registry.register("performance_analytics", "services.analytics", "performance_analytics")
+service_registry.register("projection_engine", "services.projections", "projection_engine")
@@ -0,0 +1,262 @@
+"""
+Resilience layer for WealthHub Backend
+Retries with exponential backoff and jitter, plus a circuit breaker per
+upstream source so a source that is down fails fast
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+import httpx
+
+from config import settings
+from .instrumentation import instrumentation
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a source whose breaker is open"""
+
+    def __init__(self, source: str, retry_in: float):
+        super().__init__(f"Circuit open for {source}, retry in {retry_in:.0f}s")
+        self.source = source
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """
+    Per-source circuit breaker.
+
+    - closed: calls go through; `failure_threshold` consecutive failures
+      open the circuit
+    - open: calls fail immediately with CircuitOpenError until
+      `reset_timeout` seconds have passed
+    - half_open: a single probe call is let through; success closes the
+      circuit, failure opens it again. A probe that is cancelled releases
+      its slot, and one that never reports back is considered lost after
+      `reset_timeout` seconds
+
+    Used from the event loop and from the Yahoo worker threads, so
+    state changes are guarded by a lock.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, source: str, failure_threshold: int = 5, reset_timeout: float = 60):
+        self.source = source
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._probe_started = 0.0
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError if the call must not go through"""
+        with self._lock:
+            if self._state == self.OPEN:
+                elapsed = time.monotonic() - self._opened_at
+                if elapsed < self.reset_timeout:
+                    raise CircuitOpenError(self.source, self.reset_timeout - elapsed)
+                self._state = self.HALF_OPEN
+                self._probing = False
+            if self._state == self.HALF_OPEN:
+                probe_age = time.monotonic() - self._probe_started
+                if self._probing and probe_age < self.reset_timeout:
+                    raise CircuitOpenError(self.source, self.reset_timeout - probe_age)
+                self._probing = True
+                self._probe_started = time.monotonic()
+
+    @property
+    def is_open(self) -> bool:
+        with self._lock:
+            return self._state == self.OPEN
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info(f"🟢 Circuit closed for {self.source}")
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def release_probe(self) -> None:
+        """Give up a half-open probe without an outcome (e.g. the call was cancelled)"""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.warning(f"🔴 Circuit opened for {self.source} after {self._failures} failures")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def snapshot(self) -> Dict[str, object]:
+        """Current state for status endpoints"""
+        with self._lock:
+            retry_in = 0.0
+            if self._state == self.OPEN:
+                retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+            return {
+                "state": self._state,
+                "consecutiveFailures": self._failures,
+                "retryIn": round(retry_in, 1),
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(source: str) -> CircuitBreaker:
+    """Breaker for a source, created on first use"""
+    with _breakers_lock:
+        breaker = _breakers.get(source)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                source,
+                failure_threshold=settings.BREAKER_FAILURE_THRESHOLD,
+                reset_timeout=settings.BREAKER_RESET_TIMEOUT
+            )
+            _breakers[source] = breaker
+        return breaker
+
+
+def breaker_states() -> Dict[str, Dict[str, object]]:
+    """Snapshot of every breaker, keyed by source"""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.source: breaker.snapshot() for breaker in breakers}
+
+
+def raise_for_retryable(response: httpx.Response) -> httpx.Response:
+    """Raise for 429/5xx so they are retried; other statuses are returned as-is"""
+    if response.status_code in RETRYABLE_STATUS:
+        raise httpx.HTTPStatusError(
+            f"{response.status_code} from {response.request.url.host}",
+            request=response.request,
+            response=response
+        )
+    return response
+
+
+def is_retryable(error: Exception) -> bool:
+    """Timeouts, connection errors and 429/5xx responses are worth retrying"""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRYABLE_STATUS
+    return isinstance(error, (httpx.TransportError, ConnectionError, TimeoutError))
+
+
+def backoff_delay(attempt: int, error: Optional[Exception] = None) -> float:
+    """
+    Delay before retry number `attempt` (0-based).
+
+    Exponential backoff with full jitter, capped at RETRY_BACKOFF_MAX.
+    A Retry-After header on a 429/503 is honoured within the same cap.
+    """
+    cap = settings.RETRY_BACKOFF_MAX
+    if isinstance(error, httpx.HTTPStatusError):
+        retry_after = error.response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return min(cap, float(retry_after))
+    return random.uniform(0, min(cap, settings.RETRY_BACKOFF_BASE * (2 ** attempt)))
+
+
+async def call_with_retry(
+    source: str,
+    call: Callable[[], Awaitable[T]],
+    retries: Optional[int] = None,
+    retryable: Callable[[Exception], bool] = is_retryable
+) -> T:
+    """
+    Await `call` through the source's breaker, retrying transient errors.
+
+    Args:
+        source: Source name used for the breaker (e.g., "ft_markets")
+        call: Zero-argument coroutine factory, invoked once per attempt
+        retries: Extra attempts after the first (settings.RETRIES by default)
+        retryable: Predicate deciding whether an error is worth retrying
+
+    Raises:
+        CircuitOpenError: If the breaker is open
+        Exception: The last error once retries are exhausted
+    """
+    breaker = get_breaker(source)
+    retries = settings.RETRIES if retries is None else retries
+
+    with instrumentation.source_call(source):
+        for attempt in range(retries + 1):
+            breaker.before_call()
+            try:
+                result = await call()
+            except Exception as e:
+                if not retryable(e):
+                    breaker.record_success()  # The source answered; the request was bad
+                    raise
+                breaker.record_failure()
+                if attempt >= retries or breaker.is_open:
+                    raise
+                delay = backoff_delay(attempt, e)
+                logger.warning(f"🔁 {source} falló ({e}), reintento {attempt + 1}/{retries} en {delay:.1f}s")
+                await asyncio.sleep(delay)
+            except BaseException:
+                # Cancelled by the fetch deadline or a client disconnect
+                breaker.release_probe()
+                raise
+            else:
+                breaker.record_success()
+                return result
+
+
+def call_with_retry_sync(
+    source: str,
+    call: Callable[[], T],
+    retries: Optional[int] = None,
+    retryable: Callable[[Exception], bool] = lambda e: True
+) -> T:
+    """
+    Blocking counterpart of call_with_retry for worker threads (Yahoo).
+
+    Every error is retried by default; pass `retryable` to narrow it.
+    """
+    breaker = get_breaker(source)
+    retries = settings.RETRIES if retries is None else retries
+
+    with instrumentation.source_call(source):
+        for attempt in range(retries + 1):
+            breaker.before_call()
+            try:
+                result = call()
+            except Exception as e:
+                if not retryable(e):
+                    breaker.record_success()
+                    raise
+                breaker.record_failure()
+                if attempt >= retries or breaker.is_open:
+                    raise
+                delay = backoff_delay(attempt, e)
+                logger.warning(f"🔁 {source} falló ({e}), reintento {attempt + 1}/{retries} en {delay:.1f}s")
+                time.sleep(delay)
+            except BaseException:
+                breaker.release_probe()
+                raise
+            else:
+                breaker.record_success()
+                return result
@@ -0,0 +1,179 @@
+"""
+Scheduler for WealthHub Backend
+Runs periodic tasks on cron-like schedules inside the app's event loop
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from utils import format_datetime_iso
+
+logger = logging.getLogger(__name__)
+
+# (name, lowest, highest) for each of the five cron fields
+CRON_FIELDS = (
+    ("minute", 0, 59),
+    ("hour", 0, 23),
+    ("day", 1, 31),
+    ("month", 1, 12),
+    ("weekday", 0, 6),
+)
+
+
+class CronSchedule:
+    """
+    Five-field cron expression: minute hour day month weekday.
+
+    Each field accepts `*`, numbers, ranges (`1-5`), steps (`*/15`,
+    `0-30/10`) and comma-separated lists. Weekdays go from 0 (Sunday) to
+    6, with 7 also meaning Sunday. As in cron, when both day and weekday
+    are restricted a time matches if either of them does.
+    """
+
+    def __init__(self, expression: str):
+        parts = expression.split()
+        if len(parts) != len(CRON_FIELDS):
+            raise ValueError(f"Cron expression needs 5 fields, got {len(parts)}: {expression!r}")
+        self.expression = expression
+        self._fields: List[Set[int]] = [
+            self._parse_field(part, name, low, high)
+            for part, (name, low, high) in zip(parts, CRON_FIELDS)
+        ]
+        self._any_day = parts[2] == "*"
+        self._any_weekday = parts[4] == "*"
+
+    def matches(self, moment: datetime) -> bool:
+        minutes, hours = self._fields[0], self._fields[1]
+        return moment.minute in minutes and moment.hour in hours and self._day_matches(moment)
+
+    def next_after(self, moment: datetime) -> datetime:
+        """First matching minute strictly after `moment`"""
+        minutes, hours = sorted(self._fields[0]), sorted(self._fields[1])
+        start = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        day = start.replace(hour=0, minute=0)
+        for _ in range(366 * 5):  # Long enough for 29 February
+            if self._day_matches(day):
+                for hour in hours:
+                    for minute in minutes:
+                        candidate = day.replace(hour=hour, minute=minute)
+                        if candidate >= start:
+                            return candidate
+            day += timedelta(days=1)
+        raise ValueError(f"Cron expression never matches: {self.expression!r}")
+
+    def _day_matches(self, moment: datetime) -> bool:
+        days, months, weekdays = self._fields[2], self._fields[3], self._fields[4]
+        if moment.month not in months:
+            return False
+        day_ok = moment.day in days
+        weekday_ok = (moment.weekday() + 1) % 7 in weekdays
+        if self._any_day or self._any_weekday:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok
+
+    @staticmethod
+    def _parse_field(part: str, name: str, low: int, high: int) -> Set[int]:
+        if name == "weekday":
+            high = 7  # 7 is Sunday too
+        values: Set[int] = set()
+        for item in part.split(","):
+            spec, _, step_text = item.partition("/")
+            step = int(step_text) if step_text else 1
+            if spec == "*":
+                start, end = low, high
+            elif "-" in spec:
+                start_text, end_text = spec.split("-", 1)
+                start, end = int(start_text), int(end_text)
+            else:
+                start = int(spec)
+                end = high if step_text else start
+            if not (low <= start <= end <= high) or step < 1:
+                raise ValueError(f"Cron {name} out of range: {item!r}")
+            values.update(range(start, end + 1, step))
+        if name == "weekday" and 7 in values:
+            values.discard(7)
+            values.add(0)
+        return values
+
+
+class Scheduler:
+    """
+    Runs async tasks on cron schedules for the life of the app.
+
+    Times are evaluated in the server's local time (set TZ in Docker).
+    Runs of the same task never overlap: times that pass while it is
+    still running are skipped.
+
+    Every worker process runs its own scheduler. With `claim` (name, ISO
+    time) -> bool, a tick only runs in the worker that claims it first.
+    """
+
+    def __init__(self, claim: Optional[Callable[[str, str], bool]] = None):
+        self._tasks: Dict[str, dict] = {}
+        self._runners: List[asyncio.Task] = []
+        self._claim = claim
+
+    def add(self, name: str, schedule: CronSchedule, task: Callable[[], Awaitable[Optional[str]]]) -> None:
+        """
+        Register a task. `task` may return a short summary shown in status().
+        """
+        self._tasks[name] = {
+            "schedule": schedule,
+            "task": task,
+            "nextRun": None,
+            "lastRun": None,
+            "lastResult": None,
+            "running": False,
+        }
+
+    def start(self) -> None:
+        for name in self._tasks:
+            self._runners.append(asyncio.create_task(self._loop(name)))
+            logger.info(f"⏰ Scheduled {name}: {self._tasks[name]['schedule'].expression}")
+
+    async def stop(self) -> None:
+        for runner in self._runners:
+            runner.cancel()
+        await asyncio.gather(*self._runners, return_exceptions=True)
+        self._runners = []
+
+    def status(self) -> Dict[str, dict]:
+        """Schedule, next and last run of every task"""
+        return {
+            name: {
+                "schedule": entry["schedule"].expression,
+                "nextRun": _iso(entry["nextRun"]),
+                "lastRun": _iso(entry["lastRun"]),
+                "lastResult": entry["lastResult"],
+                "running": entry["running"],
+            }
+            for name, entry in self._tasks.items()
+        }
+
+    async def _loop(self, name: str) -> None:
+        entry = self._tasks[name]
+        while True:
+            next_run = entry["schedule"].next_after(datetime.now())
+            entry["nextRun"] = next_run
+            # Sleep in short steps so clock changes (suspend, DST) are noticed
+            while datetime.now() < next_run:
+                await asyncio.sleep(min(60.0, max(0.0, (next_run - datetime.now()).total_seconds())))
+            if self._claim is not None and not self._claim(name, next_run.isoformat()):
+                logger.info(f"⏭️ {name} at {_iso(next_run)} runs in another worker")
+                entry["lastResult"] = "claimed by another worker"
+                continue
+            entry["running"] = True
+            entry["lastRun"] = datetime.now()
+            try:
+                entry["lastResult"] = await entry["task"]()
+            except Exception as e:
+                logger.error(f"❌ Scheduled task {name} failed: {e}", exc_info=True)
+                entry["lastResult"] = f"failed: {e}"
+            finally:
+                entry["running"] = False
+
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return format_datetime_iso(value) if value else None
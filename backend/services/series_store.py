@@ -0,0 +1,153 @@
+"""
+Daily series store for WealthHub Backend
+Keeps one sorted daily close series per symbol, extends it incrementally
+and answers "close on or before date D" with a binary search
+"""
+
+import logging
+import threading
+from bisect import bisect_right
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utils import chunk_list
+
+logger = logging.getLogger(__name__)
+
+# loader(symbols, start, end) -> {symbol: [(day, close), ...]}, start/end inclusive
+SeriesLoader = Callable[[List[str], date, date], Dict[str, List[Tuple[date, float]]]]
+
+# Days before the requested date that must be covered so weekends and
+# market holidays still have a previous close
+LOOKBACK_DAYS = 10
+
+
+class DailySeriesStore:
+    """
+    Per-symbol daily close series.
+
+    Each symbol remembers the window of days it has already been fetched
+    for (only windows that returned data count). Requests only download
+    the part of the window that is missing (normally just the tail since
+    the last fetch), and symbols that miss the same window are downloaded
+    together in batches. Today is never marked as covered, since its
+    close isn't final until the market shuts.
+    """
+
+    def __init__(self, loader: SeriesLoader, batch_size: int = 50):
+        self.loader = loader
+        self.batch_size = batch_size
+        self._days: Dict[str, List[date]] = {}
+        self._closes: Dict[str, List[float]] = {}
+        self._coverage: Dict[str, Tuple[date, date]] = {}
+        self._lock = threading.Lock()
+
+    def ensure(
+        self,
+        symbols: List[str],
+        start: datetime,
+        end: datetime,
+        batch_size: Optional[int] = None
+    ) -> None:
+        """
+        Make sure every symbol is covered from `start` to `end`.
+
+        Args:
+            symbols: Symbols to cover
+            start: First day needed
+            end: Last day needed (capped at today)
+            batch_size: Symbols per loader call (defaults to the store's)
+        """
+        start_day = _as_day(start)
+        end_day = min(_as_day(end), date.today())
+        if start_day > end_day:
+            return
+
+        windows: Dict[Tuple[date, date], List[str]] = {}
+        with self._lock:
+            for symbol in symbols:
+                for window in self._missing(symbol, start_day, end_day):
+                    windows.setdefault(window, []).append(symbol)
+
+        for (window_start, window_end), window_symbols in windows.items():
+            for batch in chunk_list(window_symbols, batch_size or self.batch_size):
+                try:
+                    series = self.loader(batch, window_start, window_end)
+                except Exception as e:
+                    logger.warning(f"Error descargando serie {batch} {window_start}→{window_end}: {e}")
+                    continue
+                with self._lock:
+                    for symbol in batch:
+                        self._merge(symbol, series.get(symbol, []), window_start, window_end)
+
+    def close_on_or_before(self, symbol: str, day: datetime) -> Optional[Tuple[date, float]]:
+        """
+        Last known close on or before `day`, fetching missing data first.
+
+        Args:
+            symbol: Symbol to look up
+            day: Target date
+
+        Returns:
+            Tuple of (date of the close, close), or None if unavailable
+            or older than LOOKBACK_DAYS before `day`
+        """
+        self.ensure([symbol], _as_day(day) - timedelta(days=LOOKBACK_DAYS), day)
+        return self.lookup(symbol, day)
+
+    def lookup(self, symbol: str, day: datetime) -> Optional[Tuple[date, float]]:
+        """Like close_on_or_before but never fetches"""
+        with self._lock:
+            days = self._days.get(symbol)
+            if not days:
+                return None
+            target = _as_day(day)
+            idx = bisect_right(days, target) - 1
+            # A close older than the lookback window is a gap, not a price
+            if idx < 0 or days[idx] < target - timedelta(days=LOOKBACK_DAYS):
+                return None
+            return days[idx], self._closes[symbol][idx]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._days.clear()
+            self._closes.clear()
+            self._coverage.clear()
+
+    # Internal helpers (caller holds the lock)
+
+    def _missing(self, symbol: str, start: date, end: date) -> List[Tuple[date, date]]:
+        coverage = self._coverage.get(symbol)
+        if coverage is None:
+            return [(start, end)]
+        covered_from, covered_to = coverage
+        windows = []
+        if start < covered_from:
+            windows.append((start, covered_from - timedelta(days=1)))
+        if end > covered_to:
+            windows.append((covered_to + timedelta(days=1), end))
+        return windows
+
+    def _merge(self, symbol: str, points: List[Tuple[date, float]], start: date, end: date) -> None:
+        if not points:
+            # Errors, delisted tickers and open breakers come back empty;
+            # leave the window uncovered so the next request tries again
+            return
+        merged = dict(zip(self._days.get(symbol, []), self._closes.get(symbol, [])))
+        merged.update(points)
+        days = sorted(merged)
+        self._days[symbol] = days
+        self._closes[symbol] = [merged[d] for d in days]
+
+        # Today's close isn't final, so leave it out of the covered window
+        covered_to = min(end, date.today() - timedelta(days=1))
+        coverage = self._coverage.get(symbol)
+        if coverage is not None:
+            start = min(start, coverage[0])
+            covered_to = max(covered_to, coverage[1])
+        if covered_to >= start:
+            self._coverage[symbol] = (start, covered_to)
+
+
+def _as_day(value) -> date:
+    return value.date() if isinstance(value, datetime) else value
@@ -0,0 +1,113 @@
+"""
+Request coalescing for WealthHub Backend
+Concurrent lookups of the same (source, symbol, date) share one upstream
+call instead of each making their own
+"""
+
+import asyncio
+import logging
+import threading
+from typing import Awaitable, Callable, Dict, Hashable, Iterable, List, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Single-flight deduplication of in-flight calls.
+
+    `do` is for coroutines on the event loop: the first caller for a key
+    runs the call and every caller arriving while it runs awaits the same
+    result (or error). If the leading call is cancelled (e.g. by the fetch
+    deadline), a waiting caller takes over and runs it again.
+
+    `claim`/`release` are for the blocking Yahoo threads, which look up
+    many keys per call: a thread only fetches the keys nobody else is
+    fetching and waits for the rest.
+    """
+
+    def __init__(self):
+        self.leaders = 0
+        self.shared = 0
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self._events: Dict[Hashable, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run `call` unless an identical call is already in flight.
+
+        Args:
+            key: Identity of the call, e.g. ("ft_markets", isin, "2024-02-29")
+            call: Zero-argument coroutine factory
+
+        Returns:
+            The result of whichever call ran for `key`
+        """
+        while key in self._calls:
+            future = self._calls[key]
+            self.shared += 1
+            await asyncio.wait({future})
+            if not future.cancelled():
+                return future.result()
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        self.leaders += 1
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Nobody may be waiting; don't log it as unretrieved
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._calls.pop(key, None)
+
+    def claim(self, keys: Iterable[Hashable]) -> Tuple[List[Hashable], Dict[Hashable, threading.Event]]:
+        """
+        Claim keys for a blocking fetch.
+
+        Returns:
+            Tuple of (keys this caller must fetch and later release,
+            events for keys another thread is already fetching)
+        """
+        owned: List[Hashable] = []
+        waiting: Dict[Hashable, threading.Event] = {}
+        with self._lock:
+            for key in keys:
+                event = self._events.get(key)
+                if event is None:
+                    self._events[key] = threading.Event()
+                    owned.append(key)
+                else:
+                    waiting[key] = event
+            self.leaders += len(owned)
+            self.shared += len(waiting)
+        return owned, waiting
+
+    def release(self, keys: Iterable[Hashable]) -> None:
+        """Mark claimed keys as done and wake the threads waiting on them"""
+        with self._lock:
+            events = [self._events.pop(key, None) for key in keys]
+        for event in events:
+            if event is not None:
+                event.set()
+
+    def stats(self) -> Dict[str, int]:
+        """Calls made vs. calls that joined one already in flight"""
+        return {
+            "leaders": self.leaders,
+            "shared": self.shared,
+            "inFlight": len(self._calls) + len(self._events),
+        }
+
+
+price_flights = SingleFlight()
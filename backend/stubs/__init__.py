@@ -0,0 +1,4 @@
+"""
+Local stand-ins for the upstream services used by WealthHub Backend
+Used to exercise the backend without reaching Google, Yahoo, FT or Binance
+"""
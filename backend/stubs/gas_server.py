@@ -0,0 +1,145 @@
+"""
+Stand-in for the Google Apps Script endpoint
+Implements the doGet/doPost contract from SETUP.md (including
+upsertHistory and the version counter) and counts bytes transferred
+
+Run standalone:
+    python -m stubs.gas_server --port 8001
+Then point the backend at it with GAS_URL=http://localhost:8001/exec
+"""
+
+import argparse
+import json
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from typing import Optional, Tuple
+
+from utils import HistoryIndex
+
+
+class GasStub:
+    """
+    In-memory GAS document.
+
+    With `legacy=True` it behaves like the original script: no version
+    counter and no upsertHistory, so the backend falls back to full
+    history writes.
+    """
+
+    def __init__(self, data: Optional[dict] = None, legacy: bool = False):
+        self.data = data if data is not None else {"assets": [], "history": []}
+        self.legacy = legacy
+        if not legacy:
+            self.data.setdefault("version", 0)
+        self.gets = 0
+        self.posts = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.lock = threading.Lock()
+
+    def handle_get(self, if_version: Optional[int] = None) -> dict:
+        with self.lock:
+            self.gets += 1
+            if not self.legacy and if_version is not None and if_version == self.data["version"]:
+                return {"success": True, "notModified": True, "version": if_version}
+            return {
+                "success": True,
+                "data": self.data,
+                "timestamp": datetime.utcnow().isoformat() + "Z"
+            }
+
+    def handle_post(self, payload: dict) -> dict:
+        with self.lock:
+            self.posts += 1
+            action = payload.get("action")
+
+            if action == "upsertHistory" and not self.legacy:
+                base = payload.get("baseVersion")
+                if base is not None and base != self.data["version"]:
+                    return {"success": False, "conflict": True, "version": self.data["version"]}
+                HistoryIndex(self.data["history"]).upsert(payload.get("entries", []))
+                self.data["version"] += 1
+            elif action == "updateHistory":
+                self.data["history"] = payload.get("history", [])
+                self._bump()
+            elif action == "updateAssets":
+                self.data["assets"] = payload.get("assets", [])
+                self._bump()
+            else:
+                self.data.update(payload)
+                self._bump()
+
+            response = {"success": True, "message": "Data updated"}
+            if not self.legacy:
+                response["version"] = self.data["version"]
+            return response
+
+    def _bump(self) -> None:
+        if not self.legacy:
+            self.data["version"] += 1
+
+
+def make_handler(stub: GasStub):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            query = parse_qs(urlsplit(self.path).query)
+            if_version = query.get("ifVersion", [None])[0]
+            self._reply(stub.handle_get(int(if_version) if if_version and if_version.isdigit() else None))
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length)
+            with stub.lock:
+                stub.bytes_in += len(raw)
+            try:
+                payload = json.loads(raw or b"{}")
+            except ValueError as e:
+                self._reply({"success": False, "error": str(e)})
+                return
+            self._reply(stub.handle_post(payload))
+
+        def _reply(self, body: dict):
+            raw = json.dumps(body).encode()
+            with stub.lock:
+                stub.bytes_out += len(raw)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(raw)))
+            self.end_headers()
+            self.wfile.write(raw)
+
+    return Handler
+
+
+def start_in_thread(stub: GasStub, port: int = 0) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Serve the stub on a background thread.
+
+    Returns:
+        Tuple of (server, exec URL); call server.shutdown() when done
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(stub))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/exec"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the GAS endpoint")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--legacy", action="store_true", help="Behave like the original script")
+    parser.add_argument("--data", help="JSON file with the initial document")
+    args = parser.parse_args()
+
+    initial = None
+    if args.data:
+        with open(args.data) as f:
+            initial = json.load(f)
+
+    server = ThreadingHTTPServer(("0.0.0.0", args.port), make_handler(GasStub(initial, legacy=args.legacy)))
+    print(f"GAS stub listening on http://localhost:{args.port}/exec")
+    server.serve_forever()
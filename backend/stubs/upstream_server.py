@@ -0,0 +1,204 @@
+"""
+Stand-in for the price sources: Yahoo Finance (chart API and crumb),
+FT Markets tearsheets and the Binance REST API, with configurable latency
+and error rate. Prices are deterministic per symbol and day.
+
+The backend reaches it through UPSTREAM_OVERRIDE_URL, which sends
+`https://<host>/<path>` to `<override>/<host>/<path>`.
+
+Run standalone:
+    python -m stubs.upstream_server --port 8002 --latency 80 --error-rate 0.02
+Then start the backend with UPSTREAM_OVERRIDE_URL=http://localhost:8002
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+FT_TEMPLATE = Path(__file__).resolve().parent.parent / "benchmarks" / "fixtures" / "ft_tearsheet_price.html"
+FT_PLACEHOLDER = "1,234.56"
+
+
+def stub_price(symbol: str, day) -> float:
+    """Deterministic price for a symbol on a day, between 10 and 1010"""
+    digest = hashlib.sha1(f"{symbol}:{day}".encode()).digest()
+    return round(10 + int.from_bytes(digest[:4], "big") / 2 ** 32 * 1000, 2)
+
+
+class UpstreamStub:
+    """
+    Configuration and counters shared by the request handlers.
+
+    Every request waits `latency` ms (+/- `jitter` ms, uniformly) before
+    answering, and fails with a 503 with probability `error_rate`.
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0, seed: Optional[int] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.requests = 0
+        self.errors = 0
+        self.lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._ft_template = FT_TEMPLATE.read_text(encoding="utf-8")
+
+    def delay(self) -> float:
+        with self.lock:
+            spread = self._random.uniform(-self.jitter, self.jitter) if self.jitter else 0.0
+        return max(0.0, self.latency + spread) / 1000
+
+    def should_fail(self) -> bool:
+        with self.lock:
+            self.requests += 1
+            failed = self.error_rate > 0 and self._random.random() < self.error_rate
+            if failed:
+                self.errors += 1
+            return failed
+
+    # Sources
+
+    def yahoo_chart(self, symbol: str, query: dict) -> dict:
+        period1 = int(query.get("period1", [0])[0])
+        period2 = int(query.get("period2", [time.time()])[0])
+        start = datetime.fromtimestamp(period1, tz=timezone.utc).date()
+        end = datetime.fromtimestamp(period2, tz=timezone.utc).date()
+        timestamps, closes = [], []
+        day = start
+        while day < end:
+            if day.weekday() < 5 or symbol.endswith("-EUR"):  # Crypto trades every day
+                timestamps.append(int(datetime(day.year, day.month, day.day, 14, 30, tzinfo=timezone.utc).timestamp()))
+                closes.append(stub_price(symbol, day))
+            day += timedelta(days=1)
+        return {"chart": {"result": [{
+            "meta": {
+                "currency": "EUR" if symbol.endswith("-EUR") else "USD",
+                "symbol": symbol,
+                "exchangeName": "STUB",
+                "instrumentType": "CRYPTOCURRENCY" if symbol.endswith("-EUR") else "EQUITY",
+                "firstTradeDate": 0,
+                "regularMarketTime": int(time.time()),
+                "gmtoffset": 0,
+                "timezone": "UTC",
+                "exchangeTimezoneName": "UTC",
+                "priceHint": 2,
+                "dataGranularity": "1d",
+                "range": "",
+                "validRanges": ["1d", "5d", "1mo", "3mo", "6mo", "1y", "2y", "5y", "10y", "ytd", "max"],
+            },
+            "timestamp": timestamps,
+            "indicators": {
+                "quote": [{"open": closes, "high": closes, "low": closes, "close": closes, "volume": [1000] * len(closes)}],
+                "adjclose": [{"adjclose": closes}],
+            },
+        }], "error": None}}
+
+    def ft_tearsheet(self, query: dict) -> str:
+        isin = query.get("s", [""])[0].split(":")[0]
+        price = stub_price(isin, datetime.now(timezone.utc).date())
+        return self._ft_template.replace(FT_PLACEHOLDER, f"{price:,.2f}", 1)
+
+    def binance(self, endpoint: str, query: dict):
+        today = datetime.now(timezone.utc).date()
+        if endpoint == "ticker/price" and "symbols" in query:
+            return [{"symbol": s, "price": str(stub_price(s, today))} for s in json.loads(query["symbols"][0])]
+        symbol = query.get("symbol", ["BTCEUR"])[0]
+        if endpoint == "ticker/price":
+            return {"symbol": symbol, "price": str(stub_price(symbol, today))}
+        start = int(query.get("startTime", [0])[0]) // 1000
+        day = datetime.fromtimestamp(start, tz=timezone.utc).date()
+        close = str(stub_price(symbol, day))
+        return [[start * 1000, close, close, close, close, "1.0", start * 1000 + 86399999, "0", 1, "0", "0", "0"]]
+
+
+def make_handler(stub: UpstreamStub):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # Keep-alive, like the real hosts
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            time.sleep(stub.delay())
+            parts = urlsplit(self.path)
+            host, _, path = parts.path.lstrip("/").partition("/")
+            query = parse_qs(parts.query)
+            if stub.should_fail():
+                self._reply(503, "text/plain", b"stub error")
+                return
+
+            if host.endswith("yahoo.com"):
+                if path.startswith("v8/finance/chart/"):
+                    symbol = path.rsplit("/", 1)[-1]
+                    self._json(stub.yahoo_chart(symbol, query))
+                elif path.endswith("getcrumb"):
+                    self._reply(200, "text/plain", b"stubcrumb")
+                else:
+                    self._reply(200, "text/html", b"<html></html>", {"Set-Cookie": "A3=stub; Path=/"})
+            elif host.endswith("ft.com"):
+                self._reply(200, "text/html; charset=utf-8", stub.ft_tearsheet(query).encode())
+            elif host.endswith("binance.com"):
+                self._json(stub.binance(path.removeprefix("api/v3/"), query))
+            else:
+                self._reply(404, "text/plain", b"unknown host")
+
+        def _json(self, body) -> None:
+            self._reply(200, "application/json", json.dumps(body).encode())
+
+        def _reply(self, status: int, content_type: str, raw: bytes, headers: Optional[dict] = None) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(raw)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(raw)
+
+    return Handler
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients dropping connections at a deadline is expected under load
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def start_in_thread(stub: UpstreamStub, port: int = 0) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Serve the stub on a background thread.
+
+    Returns:
+        Tuple of (server, base URL for UPSTREAM_OVERRIDE_URL); call
+        server.shutdown() when done
+    """
+    server = _Server(("127.0.0.1", port), make_handler(stub))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for Yahoo, FT and Binance")
+    parser.add_argument("--port", type=int, default=8002)
+    parser.add_argument("--latency", type=float, default=0.0, help="Milliseconds per request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- milliseconds around the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    args = parser.parse_args()
+
+    server = _Server(
+        ("0.0.0.0", args.port),
+        make_handler(UpstreamStub(args.latency, args.jitter, args.error_rate))
+    )
+    print(f"Upstream stub listening on http://localhost:{args.port}")
+    server.serve_forever()
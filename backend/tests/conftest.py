@@ -0,0 +1,8 @@
+"""
+Shared fixtures for the backend tests (run from backend/: python -m pytest)
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from services.analytics import PerformanceAnalytics, _xirr
+from services.metrics import PortfolioMetrics
+
+
+def _row(month: str, asset_id: str, nav: float, contribution: float = 0.0) -> dict:
+    return {"month": month, "assetId": asset_id, "nav": nav, "contribution": contribution}
+
+
+ASSETS = [
+    {"id": "a", "name": "Fund A", "category": "Funds"},
+    {"id": "old", "name": "Sold", "category": "Stocks", "archived": True},
+    {"id": "cash", "name": "Cash", "category": "Cash"},
+]
+
+
+def test_returns_are_measured_from_the_opening_nav():
+    history = [
+        _row("2024-01", "a", 1000, 800),  # opening value, bought for less long ago
+        _row("2024-02", "a", 1100),
+        _row("2024-03", "a", 1320, 100),
+    ]
+    result = PerformanceAnalytics().compute(ASSETS, history)
+    stats = result["assets"][0]
+
+    assert stats["months"] == 2
+    assert [m["return"] for m in stats["series"]] == [None, 10.0, 10.0]
+    assert stats["twr"] == 21.0
+
+
+def test_archived_and_cash_assets_are_left_out_like_metrics():
+    history = [
+        _row("2024-01", "a", 100, 100),
+        _row("2024-02", "a", 110),
+        _row("2024-01", "old", 500, 500),
+        _row("2024-02", "old", 250),
+        _row("2024-01", "cash", 50, 50),
+        _row("2024-02", "cash", 50),
+    ]
+    analytics = PerformanceAnalytics().compute(ASSETS, history)
+    metrics = PortfolioMetrics.compute(ASSETS, history)
+
+    assert [s["assetId"] for s in analytics["assets"]] == [a["assetId"] for a in metrics["assets"]] == ["a"]
+    assert analytics["portfolio"]["twr"] == 10.0
+
+
+def test_unchanged_assets_are_served_from_the_cache():
+    analytics = PerformanceAnalytics()
+    history = [_row("2024-01", "a", 100, 100), _row("2024-02", "a", 110)]
+    analytics.compute(ASSETS, history)
+    analytics.compute(ASSETS, history)
+    assert analytics.computed == 2 and analytics.reused == 1
+
+
+
+def test_contributions_do_not_move_the_twr():
+    # +10% in February; March only adds money, at an unchanged price
+    history = [
+        _row("2024-01", "a", 1000, 1000),
+        _row("2024-02", "a", 1100),
+        _row("2024-03", "a", 6100, 5000),
+    ]
+    stats = PerformanceAnalytics().compute(ASSETS, history)["assets"][0]
+
+    assert stats["twr"] == 10.0
+    assert [m["return"] for m in stats["series"]] == [None, 10.0, 0.0]
+    assert stats["maxDrawdown"] == 0.0
+
+
+def test_drawdown_and_rolling_returns_on_the_growth_index():
+    navs = [100, 120, 90, 108]
+    history = [_row(f"2024-{i + 1:02d}", "a", nav, 100 if i == 0 else 0) for i, nav in enumerate(navs)]
+    stats = PerformanceAnalytics().compute(ASSETS, history, window=2)["assets"][0]
+
+    assert stats["maxDrawdown"] == -25.0
+    assert stats["currentDrawdown"] == -10.0
+    assert stats["rolling"] == {"window": 2, "latest": -10.0, "best": -10.0, "worst": -10.0}
+
+
+def test_xirr_of_a_doubling_over_a_year():
+    flows = np.zeros((12, 1))
+    flows[0, 0] = 100
+    nav = np.full((12, 1), 200.0)
+
+    rate = _xirr(flows, nav, np.ones((12, 1), dtype=bool))
+
+    assert rate[0] == pytest.approx(1.0, abs=1e-6)
+
+
+def test_xirr_without_a_sign_change_is_undefined():
+    flows = np.zeros((3, 1))
+    rate = _xirr(flows, np.full((3, 1), 50.0), np.ones((3, 1), dtype=bool))
+    assert np.isnan(rate[0])
@@ -0,0 +1,30 @@
+import asyncio
+from datetime import date, datetime
+
+import pytest
+
+from services import price_fetcher
+from services.price_fetcher import PriceFetcher
+
+
+@pytest.fixture
+def no_cache(monkeypatch):
+    monkeypatch.setattr(price_fetcher.price_cache, "get", lambda *args: None)
+    monkeypatch.setattr(price_fetcher.price_cache, "set", lambda *args: None)
+
+
+def test_sub_cent_coin_keeps_its_precision(monkeypatch, no_cache):
+    closes = {"SHIB-EUR": 0.0000123456, "ADA-EUR": 0.3456789}
+    monkeypatch.setattr(price_fetcher.yahoo_series, "ensure", lambda *args, **kwargs: None)
+    monkeypatch.setattr(
+        price_fetcher.yahoo_series, "lookup", lambda symbol, day: (date(2024, 3, 28), closes[symbol])
+    )
+    assets = [
+        {"id": "shib", "name": "Shiba Inu", "category": "Crypto", "ticker": "SHIB-EUR"},
+        {"id": "ada", "name": "Cardano", "category": "Crypto", "ticker": "ADAEUR"},
+    ]
+
+    results = asyncio.run(PriceFetcher.fetch_crypto_prices(assets, [datetime(2024, 3, 29)]))
+
+    prices = {p.assetId: p.price for p in results["2024-03-29"]}
+    assert prices == {"shib": 0.00001235, "ada": 0.3456789}
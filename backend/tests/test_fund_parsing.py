@@ -0,0 +1,36 @@
+from pathlib import Path
+
+import pytest
+
+from services.fund_scraper import FundScraper, _extract_price_streaming
+
+FIXTURES = Path(__file__).resolve().parent.parent / "benchmarks" / "fixtures"
+
+
+@pytest.mark.parametrize("name", ["ft_tearsheet_price", "ft_tearsheet_meta_only", "ft_tearsheet_not_found"])
+def test_streaming_parser_agrees_with_soup(name):
+    html = (FIXTURES / f"{name}.html").read_text(encoding="utf-8")
+    assert _extract_price_streaming(html) == FundScraper._extract_price_soup(html)
+
+
+def test_tearsheet_price_is_read_without_thousands_separator():
+    html = (FIXTURES / "ft_tearsheet_price.html").read_text(encoding="utf-8")
+    assert FundScraper._extract_price(html) == "1234.56"
+
+
+def test_span_wins_over_an_earlier_meta_price():
+    html = (
+        '<html><head><meta itemprop="price" content="9.99"></head><body>'
+        '<span class="mod-ui-data-list__value"> 1,<span>234</span>.50 </span>'
+        '<span class="mod-ui-data-list__value">7.00</span></body></html>'
+    )
+    assert _extract_price_streaming(html) == FundScraper._extract_price_soup(html) == "1234.50"
+
+
+def test_price_split_across_chunks():
+    html = '<html><body>' + "<p>x</p>" * 50 + '<span class="other mod-ui-data-list__value">42.10</span></body></html>'
+    assert _extract_price_streaming(html, chunk_size=7) == "42.10"
+
+
+def test_no_price_anywhere():
+    assert _extract_price_streaming("<html><body><span>1.00</span></body></html>") is None
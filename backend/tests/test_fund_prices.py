@@ -0,0 +1,34 @@
+import asyncio
+from datetime import datetime
+
+from services import fund_scraper
+from services.fund_scraper import FundScraper
+from services.price_cache import PriceCache
+
+ISIN = "LU0996182563"
+
+
+def test_past_month_is_not_cached_with_todays_nav(monkeypatch):
+    cache = PriceCache()
+    monkeypatch.setattr(fund_scraper, "price_cache", cache)
+    scrapes = []
+
+    async def scrape(isin, asset_name, asset_id):
+        scrapes.append(isin)
+        return FundScraper._create_price_data(asset_id, asset_name, isin, "123.4567")
+
+    monkeypatch.setattr(FundScraper, "_scrape_fund_price", staticmethod(scrape))
+    past = datetime(2023, 1, 31)
+
+    async def scenario():
+        first = await FundScraper.fetch_fund_price(ISIN, "World Index", "fund-1", date=past)
+        again = await FundScraper.fetch_fund_price(ISIN, "World Index", "fund-2", date=past)
+        return first, again
+
+    first, again = asyncio.run(scenario())
+
+    assert first.price == again.price == 123.4567
+    assert again.assetId == "fund-2"
+    assert scrapes == [ISIN]  # the second call is served from today's entry
+    assert cache.get("ft_markets", ISIN, past) is None
+    assert cache.get("ft_markets", ISIN, datetime.now()) is not None
@@ -0,0 +1,129 @@
+import asyncio
+
+import pytest
+
+from config import settings
+from services.gas_client import GasClient
+from services.http_client import http_clients
+from stubs import gas_server
+
+
+def _entry(month: str, asset_id: str, price: float) -> dict:
+    return {"month": month, "assetId": asset_id, "price": price}
+
+
+@pytest.fixture
+def serve(monkeypatch):
+    """Start a GasStub and point GAS_URL at it"""
+    servers = []
+
+    def start(stub: gas_server.GasStub) -> gas_server.GasStub:
+        server, url = gas_server.start_in_thread(stub)
+        servers.append(server)
+        monkeypatch.setattr(settings, "GAS_URL", url)
+        monkeypatch.setattr(settings, "GAS_DELTA_WRITES", True)
+        return stub
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def _run(scenario):
+    async def wrapped():
+        try:
+            return await scenario()
+        finally:
+            # Pooled clients are bound to this event loop
+            await http_clients.aclose()
+
+    return asyncio.run(wrapped())
+
+
+def test_delta_write_sends_only_the_changed_entries(serve):
+    stub = serve(gas_server.GasStub({"assets": [], "history": [_entry("2024-01", "a", 1.0)]}))
+    client = GasClient()
+
+    async def scenario():
+        await client.load()
+        await client.write_history([_entry("2024-02", "a", 2.0)])
+
+    _run(scenario)
+
+    assert client.supports_delta is True
+    assert client.version == stub.data["version"] == 1
+    assert stub.data["history"] == [_entry("2024-01", "a", 1.0), _entry("2024-02", "a", 2.0)]
+    # The write didn't invalidate our snapshot, so nothing was reloaded
+    assert stub.gets == 1
+
+
+def test_conflict_is_retried_once_on_the_new_version(serve):
+    stub = serve(gas_server.GasStub({"assets": [], "history": []}))
+    client = GasClient()
+
+    async def scenario():
+        await client.load()
+        # Someone else writes between our load and our write
+        stub.handle_post({"action": "upsertHistory", "entries": [_entry("2024-01", "b", 5.0)], "baseVersion": 0})
+        await client.write_history([_entry("2024-01", "a", 1.0)])
+
+    _run(scenario)
+
+    assert stub.posts == 3  # theirs, our conflicted write, our retry
+    assert client.version == stub.data["version"] == 2
+    assert {(e["assetId"], e["price"]) for e in stub.data["history"]} == {("a", 1.0), ("b", 5.0)}
+
+
+def test_conflict_leaves_keys_the_other_writer_changed(serve):
+    stub = serve(gas_server.GasStub({"assets": [], "history": [_entry("2024-01", "a", 1.0)]}))
+    client = GasClient()
+
+    async def scenario():
+        await client.load()
+        # Someone else edits the same (month, assetId) before our write lands
+        stub.handle_post({"action": "upsertHistory", "entries": [_entry("2024-01", "a", 9.0)], "baseVersion": 0})
+        await client.write_history([_entry("2024-01", "a", 1.5), _entry("2024-02", "a", 2.0)])
+
+    _run(scenario)
+
+    assert stub.data["history"] == [_entry("2024-01", "a", 9.0), _entry("2024-02", "a", 2.0)]
+    assert client.version == stub.data["version"] == 2
+
+
+def test_legacy_script_falls_back_to_a_full_replace_on_fresh_data(serve):
+    stub = serve(gas_server.GasStub({"assets": [], "history": [_entry("2024-01", "a", 1.0)]}, legacy=True))
+    client = GasClient()
+
+    async def scenario():
+        await client.load()
+        # Edited from the frontend after our snapshot was taken
+        stub.data["history"].append(_entry("2024-01", "b", 5.0))
+        await client.write_history([_entry("2024-02", "a", 2.0)])
+
+    _run(scenario)
+
+    assert client.supports_delta is False
+    assert "version" not in stub.data
+    assert stub.gets == 2  # the full replace reloads first
+    assert {(e["month"], e["assetId"]) for e in stub.data["history"]} == {
+        ("2024-01", "a"), ("2024-01", "b"), ("2024-02", "a")
+    }
+
+
+def test_unchanged_snapshot_is_revalidated_without_a_reload(serve):
+    stub = serve(gas_server.GasStub({"assets": [], "history": [_entry("2024-01", "a", 1.0)]}))
+    client = GasClient()
+
+    async def scenario():
+        first = await client.load()
+        second = await client.load(max_age=0)
+        stub.handle_post({"action": "upsertHistory", "entries": [_entry("2024-02", "a", 2.0)], "baseVersion": 0})
+        third = await client.load(max_age=0)
+        return first, second, third
+
+    first, second, third = _run(scenario)
+
+    assert second is first
+    assert client.loads == 2 and client.revalidations == 1
+    assert len(third["history"]) == 2
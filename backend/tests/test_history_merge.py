@@ -0,0 +1,49 @@
+import random
+
+from utils import HistoryIndex, merge_price_updates
+
+
+def _entry(month: str, asset_id: str, nav: float) -> dict:
+    return {"month": month, "assetId": asset_id, "nav": nav}
+
+
+def test_upsert_updates_in_place_and_appends_new_keys():
+    history = [_entry("2024-01", "a", 1.0), _entry("2024-01", "b", 2.0)]
+    index = HistoryIndex(history)
+
+    assert index.upsert([_entry("2024-01", "b", 3.0), _entry("2024-02", "a", 4.0)]) == (1, 1)
+    assert history == [_entry("2024-01", "a", 1.0), _entry("2024-01", "b", 3.0), _entry("2024-02", "a", 4.0)]
+    assert index.get("2024-02", "a") == _entry("2024-02", "a", 4.0)
+    assert index.get("2024-03", "a") is None
+
+
+def test_repeated_key_in_one_batch_keeps_the_last_entry():
+    index = HistoryIndex([])
+    assert index.upsert([_entry("2024-01", "a", 1.0), _entry("2024-01", "a", 2.0)]) == (1, 1)
+    assert index.history == [_entry("2024-01", "a", 2.0)]
+
+
+def test_merge_leaves_the_existing_list_untouched():
+    existing = [_entry("2024-01", "a", 1.0)]
+    merged = merge_price_updates(existing, [_entry("2024-01", "a", 5.0), _entry("2024-01", "c", 6.0)])
+
+    assert existing == [_entry("2024-01", "a", 1.0)]
+    assert merged == [_entry("2024-01", "a", 5.0), _entry("2024-01", "c", 6.0)]
+
+
+def test_merge_matches_the_quadratic_merge_on_random_updates():
+    rng = random.Random(7)
+    keys = [(f"2024-{m:02d}", f"asset-{a}") for m in range(1, 13) for a in range(20)]
+    existing = [_entry(month, asset, rng.random()) for month, asset in rng.sample(keys, 150)]
+    updates = [_entry(month, asset, rng.random()) for month, asset in rng.sample(keys, 80)]
+
+    expected = [dict(e) for e in existing]
+    for update in updates:
+        match = next((i for i, e in enumerate(expected)
+                      if (e["month"], e["assetId"]) == (update["month"], update["assetId"])), None)
+        if match is None:
+            expected.append(update)
+        else:
+            expected[match] = update
+
+    assert merge_price_updates(existing, updates) == expected
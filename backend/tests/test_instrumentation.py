@@ -0,0 +1,40 @@
+import asyncio
+
+from services.instrumentation import Instrumentation
+
+
+def _outcomes(metrics: Instrumentation, operation: str) -> dict:
+    lines = [line for line in metrics.render().splitlines() if line.startswith("wealthhub_operations_total{")]
+    return {
+        line.split('outcome="')[1].split('"')[0]: float(line.rsplit(" ", 1)[1])
+        for line in lines if f'operation="{operation}"' in line
+    }
+
+
+def test_none_result_counts_as_failure():
+    metrics = Instrumentation()
+
+    @metrics.timed("fund_price", failed=lambda price: price is None)
+    async def fetch(price):
+        return price
+
+    asyncio.run(fetch(1.5))
+    asyncio.run(fetch(None))
+    asyncio.run(fetch(None))
+
+    assert _outcomes(metrics, "fund_price") == {"success": 1, "failure": 2}
+
+
+def test_raising_still_counts_as_failure():
+    metrics = Instrumentation()
+
+    @metrics.timed("stock_prices")
+    def fetch():
+        raise ValueError("boom")
+
+    try:
+        fetch()
+    except ValueError:
+        pass
+
+    assert _outcomes(metrics, "stock_prices") == {"failure": 1}
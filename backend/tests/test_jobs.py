@@ -0,0 +1,49 @@
+import asyncio
+
+from services import jobs
+from services.jobs import JobQueue
+
+
+def test_a_scheduled_tick_is_claimed_by_one_worker(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    first, second = JobQueue(path=path), JobQueue(path=path)
+
+    assert first.claim("prewarm", "2024-03-29T22:30:00")
+    assert not second.claim("prewarm", "2024-03-29T22:30:00")
+    assert second.claim("prewarm", "2024-04-01T22:30:00")
+
+
+def test_without_a_store_every_worker_runs():
+    queue = JobQueue(path="")
+    assert queue.claim("prewarm", "2024-03-29T22:30:00")
+    assert queue.claim("prewarm", "2024-03-29T22:30:00")
+
+
+def test_progress_is_throttled_and_finished_jobs_are_purged(monkeypatch):
+    queue = JobQueue(path="", retention=0)
+
+    async def handler(job, params):
+        queue.report(job, [{"price": 1.0}])
+        queue.report(job, [{"price": 2.0}])
+        return {"ok": True}
+
+    queue.register("noop", handler)
+    saves = []
+    monkeypatch.setattr(queue, "_save", lambda job: saves.append(job.status))
+
+    async def scenario():
+        await queue.start()
+        job = queue.submit("noop", {"n": 1})
+        await queue._queue.join()
+        monkeypatch.setattr(jobs, "PURGE_INTERVAL", 0)
+        queue.submit("noop", {"n": 2})
+        await queue._queue.join()
+        await queue.stop()
+        return job
+
+    job = asyncio.run(scenario())
+
+    assert job.status == "done" and len(job.prices) == 2
+    # Per job: the running save plus one of its two progress reports
+    assert saves.count("running") == 4
+    assert queue.get(job.id) is None
@@ -0,0 +1,106 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from services.listing import InvalidCursor, Listing
+
+
+def _assets(n: int) -> list:
+    return [{"id": f"a{i}", "name": f"Asset {i}", "category": "Stocks"} for i in range(n)]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    assets = _assets(5)
+
+    async def load():
+        return assets
+
+    monkeypatch.setattr(main.settings, "GAS_URL", "http://gas.invalid/exec")
+    monkeypatch.setattr(main.history_store, "path", None)
+    monkeypatch.setattr(main, "_load_assets_from_gas", load)
+    return TestClient(main.app), assets
+
+
+def test_assets_page_survives_archiving_between_pages(client):
+    http, assets = client
+    first = http.get("/assets", params={"archived": False, "limit": 2}).json()
+    assert [a["id"] for a in first["assets"]] == ["a0", "a1"]
+
+    # An asset on the first page is archived and one is added at the end
+    assets[0]["archived"] = True
+    assets.append({"id": "a5", "name": "Asset 5", "category": "Stocks"})
+
+    second = http.get("/assets", params={"archived": False, "limit": 2, "cursor": first["nextCursor"]}).json()
+    third = http.get("/assets", params={"archived": False, "limit": 2, "cursor": second["nextCursor"]}).json()
+    assert [a["id"] for a in second["assets"] + third["assets"]] == ["a2", "a3", "a4", "a5"]
+    assert third["nextCursor"] is None
+
+
+def test_assets_etag_answers_304_when_unchanged(client):
+    http, _ = client
+    first = http.get("/assets")
+    again = http.get("/assets", headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
+
+
+def test_history_filters_projection_and_pages(client, monkeypatch):
+    http, _ = client
+    history = [
+        {"month": f"2024-{m:02d}", "assetId": asset, "nav": m, "source": "stub"}
+        for m in range(1, 5) for asset in ("b", "a", "c")
+    ]
+
+    async def load():
+        return {"history": history}
+
+    monkeypatch.setattr(main, "_load_data_from_gas", load)
+    params = {"assetId": ["a", "b"], "start": "2024-02", "end": "2024-03", "fields": "month,assetId", "limit": 3}
+
+    first = http.get("/history", params=params).json()
+    second = http.get("/history", params={**params, "cursor": first["nextCursor"]}).json()
+
+    rows = first["history"] + second["history"]
+    assert rows == [
+        {"month": "2024-02", "assetId": "a"}, {"month": "2024-02", "assetId": "b"},
+        {"month": "2024-03", "assetId": "a"}, {"month": "2024-03", "assetId": "b"},
+    ]
+    assert second["nextCursor"] is None
+
+
+def test_bad_list_parameters_are_rejected(client):
+    http, _ = client
+    assert http.get("/assets", params={"cursor": "garbage"}).status_code == 400
+    assert http.get("/history", params={"start": "2024-05", "end": "2024-01"}).status_code == 400
+
+
+def test_etag_matching():
+    etag = Listing.etag({"success": True, "assets": []})
+    assert etag == Listing.etag({"assets": [], "success": True})  # key order doesn't matter
+    assert Listing.etag_matches(f'"other", W/{etag}', etag)
+    assert Listing.etag_matches("*", etag)
+    assert not Listing.etag_matches(None, etag)
+
+
+def test_history_page_is_keyed_by_month_and_asset():
+    history = [
+        {"month": "2024-02", "assetId": "b"},
+        {"month": "2024-01", "assetId": "b"},
+        {"month": "2024-01", "assetId": "a"},
+    ]
+    key = lambda row: (row["month"], row["assetId"])
+    page, next_key = Listing.page(history, key, None, 2)
+    assert [key(row) for row in page] == [("2024-01", "a"), ("2024-01", "b")]
+
+    history.insert(0, {"month": "2024-01", "assetId": "aa"})  # sorts before the cursor
+    rest, last = Listing.page(history, key, next_key, 2)
+    assert [key(row) for row in rest] == [("2024-02", "b")] and last is None
+
+
+def test_cursor_round_trip_and_tampering():
+    cursor = Listing.encode_cursor(("2024-01", "a"))
+    assert Listing.decode_cursor(cursor, 2) == ("2024-01", "a")
+    with pytest.raises(InvalidCursor):
+        Listing.decode_cursor(cursor, 1)
+    with pytest.raises(InvalidCursor):
+        Listing.decode_cursor("not a cursor!", 2)
@@ -0,0 +1,51 @@
+from services.metrics import PortfolioMetrics
+
+ASSETS = [
+    {"id": "a", "name": "Fund A", "category": "Funds", "targetAllocation": 50},
+    {"id": "b", "name": "Stock B", "category": "Stocks"},
+    {"id": "new", "name": "Not priced yet", "category": "Stocks", "baseAmount": 100},
+    {"id": "old", "name": "Sold", "category": "Stocks", "archived": True},
+    {"id": "cash", "name": "Cash", "category": "Cash", "baseAmount": 250},
+]
+
+HISTORY = [
+    {"month": "2024-01", "assetId": "a", "nav": 1000, "contribution": 1000},
+    {"month": "2024-02", "assetId": "a", "nav": 1200, "contribution": 100},
+    {"month": "2024-01", "assetId": "b", "nav": 500, "contribution": 600},
+    {"month": "2024-01", "assetId": "old", "nav": 9999, "contribution": 1},
+]
+
+
+def test_totals_match_the_dashboard_rules():
+    metrics = PortfolioMetrics.compute(ASSETS, HISTORY)
+
+    assert metrics["totalNAV"] == 1800.0  # 1200 + 500 + baseAmount 100
+    assert metrics["totalInv"] == 1800.0  # 1100 + 600 + 100
+    assert metrics["totalProfit"] == 0.0
+    assert metrics["liquidez"] == 250.0
+    assert [a["assetId"] for a in metrics["assets"]] == ["a", "b", "new"]
+
+
+def test_per_asset_figures():
+    by_id = {a["assetId"]: a for a in PortfolioMetrics.compute(ASSETS, HISTORY)["assets"]}
+
+    assert by_id["a"]["lastMonth"] == "2024-02"
+    assert by_id["a"]["roi"] == 9.09
+    assert by_id["a"]["allocation"] == 66.67
+    assert by_id["a"]["allocationGap"] == 16.67
+    assert by_id["b"]["profit"] == -100.0 and by_id["b"]["allocationGap"] is None
+    assert by_id["new"]["lastMonth"] is None and by_id["new"]["nav"] == 100.0
+
+
+def test_pivot_keeps_the_last_nav_and_sums_contributions():
+    rows = HISTORY + [{"month": "2024-02", "assetId": "a", "nav": "1300", "contribution": 50}]
+    matrices = PortfolioMetrics.pivot(rows)
+
+    assert matrices["nav"].loc["2024-02", "a"] == 1300
+    assert matrices["contribution"].loc["2024-02", "a"] == 150
+    assert list(matrices["nav"].index) == ["2024-01", "2024-02"]
+
+
+def test_empty_portfolio():
+    metrics = PortfolioMetrics.compute([], [])
+    assert metrics["totalNAV"] == 0.0 and metrics["roi"] == 0.0 and metrics["assets"] == []
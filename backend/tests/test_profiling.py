@@ -0,0 +1,56 @@
+import time
+
+import pytest
+
+from config import settings
+from services.profiling import Profiler
+
+TOKEN = "s3cret"
+
+
+@pytest.fixture
+def profiler(monkeypatch):
+    monkeypatch.setattr(settings, "PROFILING_TOKEN", TOKEN)
+    monkeypatch.setattr(settings, "PROFILE_SAMPLE_INTERVAL", 0.001)
+    return Profiler()
+
+
+def test_authorize(profiler, monkeypatch):
+    assert profiler.authorize(None, None) is None
+    assert profiler.authorize("save", TOKEN) == "save"
+    with pytest.raises(ValueError):
+        profiler.authorize("flame", TOKEN)
+    with pytest.raises(PermissionError):
+        profiler.authorize("inline", "wrong")
+    with pytest.raises(PermissionError):
+        profiler.authorize("inline", None)
+
+    monkeypatch.setattr(settings, "PROFILING_TOKEN", "")
+    with pytest.raises(PermissionError):
+        profiler.authorize("inline", TOKEN)
+
+
+def test_span_is_a_shared_no_op_outside_a_profile(profiler):
+    assert profiler.span("fetch") is profiler.span("other")
+    with profiler.span("fetch"):
+        pass
+
+
+def test_profile_records_spans_and_samples(profiler):
+    with profiler.profile("GET /fetch-month") as run:
+        with profiler.span("load"):
+            time.sleep(0.01)
+        for _ in range(2):
+            with profiler.span("fetch"):
+                time.sleep(0.01)
+
+    report = run.report()
+    spans = {span["name"]: span for span in report["spans"]}
+
+    assert [span["name"] for span in report["spans"]] == ["load", "fetch"]
+    assert spans["fetch"]["count"] == 2 and spans["fetch"]["totalMs"] >= 20
+    assert report["wallMs"] >= 30
+    assert report["sampling"]["ticks"] > 0
+    # Outside the block the profile is no longer current
+    assert profiler.span("load") is profiler.span("fetch")
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in run.folded().splitlines())
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from services.projections import MonteCarloEngine, simulate_batch
+
+
+def _simulate(engine: MonteCarloEngine, **overrides) -> dict:
+    params = dict(
+        history_returns=[], initial=1000.0, contribution=100.0, months=24, paths=4000,
+        annual_rate=7.0, annual_volatility=15.0, seed=42
+    )
+    params.update(overrides)
+    return engine.simulate(**params)
+
+
+def test_bands_are_ordered_and_widen_over_time():
+    result = _simulate(MonteCarloEngine(batch_paths=1000))
+
+    assert result["method"] == "normal" and result["paths"] == 4000
+    bands = result["bands"]
+    assert len(bands) == 24
+    assert all(b["p5"] <= b["p50"] <= b["p95"] for b in bands)
+    assert bands[-1]["p95"] - bands[-1]["p5"] > bands[0]["p95"] - bands[0]["p5"]
+    assert bands[-1]["invested"] == 1000.0 + 100.0 * 24
+
+
+def test_same_seed_gives_the_same_projection():
+    engine = MonteCarloEngine(batch_paths=1000)
+    first, again = _simulate(engine), _simulate(engine)
+    assert first["bands"] == again["bands"]
+
+
+def test_zero_volatility_compounds_the_rate():
+    result = _simulate(MonteCarloEngine(), contribution=0.0, months=12, paths=100, annual_volatility=0.0)
+    final = result["bands"][-1]
+    assert final["p5"] == final["p95"] == pytest.approx(1070.0, abs=0.01)
+    assert result["probabilityOfLoss"] == 0.0
+
+
+def test_bootstrap_only_resamples_history():
+    history = [0.01] * 6 + [-0.02] * 6
+    result = _simulate(MonteCarloEngine(), history_returns=history + [float("nan")], contribution=0.0, months=1)
+
+    assert result["method"] == "bootstrap" and result["historyMonths"] == 12
+    first = result["bands"][0]
+    assert first["p5"] == pytest.approx(980.0) and first["p95"] == pytest.approx(1010.0)
+
+
+def test_short_history_falls_back_to_the_normal_model():
+    assert _simulate(MonteCarloEngine(), history_returns=[0.01] * 11)["method"] == "normal"
+
+
+def test_budget_keeps_at_least_one_batch():
+    result = _simulate(MonteCarloEngine(batch_paths=500, latency_budget=0.0), paths=5000)
+    assert result["paths"] == 500 and result["truncated"]
+
+
+def test_simulate_batch_reports_loss_against_invested_capital():
+    returns = np.array([-0.5])
+    batch = simulate_batch(returns, 0.0, 0.0, 1000.0, 0.0, 3, 10, np.random.SeedSequence(1))
+    assert batch["loss"] == 1.0
+    assert batch["bands"][-1][1] == pytest.approx(125.0)
@@ -0,0 +1,66 @@
+import subprocess
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+from services.registry import LazyService, ServiceRegistry
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """Registry over a fake module that counts how often it is imported"""
+    imports = []
+
+    def import_module(name):
+        imports.append(name)
+        return types.SimpleNamespace(Service=types.SimpleNamespace(ping=lambda: "pong", value=1))
+
+    monkeypatch.setattr("services.registry.importlib.import_module", import_module)
+    registry = ServiceRegistry()
+    registry.register("fake", "fake_module", "Service")
+    registry.imports = imports
+    return registry
+
+
+def test_package_import_leaves_heavy_services_unloaded():
+    code = (
+        "import sys, services\n"
+        "heavy = ['pandas', 'numpy', 'bs4', 'services.price_fetcher', 'services.analytics']\n"
+        "print(','.join(m for m in heavy if m in sys.modules))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == ""
+
+
+def test_lazy_service_imports_on_first_attribute_access(registry):
+    service = registry.lazy("fake")
+
+    assert isinstance(service, LazyService)
+    assert registry.imports == [] and not registry.is_loaded("fake")
+    assert service.ping() == "pong"
+    service.value = 2
+
+    assert registry.imports == ["fake_module"]
+    assert registry.get("fake").value == 2
+    assert "loaded" in repr(service) and "not loaded" not in repr(service)
+
+
+def test_warm_up_times_only_new_imports(registry):
+    first = registry.warm_up()
+    again = registry.warm_up(["fake", "missing"])
+
+    assert list(first) == ["fake"] and first["fake"] >= 0
+    assert again == {"fake": 0.0}
+    assert registry.imports == ["fake_module"]
+    assert registry.status()[0]["loaded"] is True
+
+
+def test_unknown_service_is_rejected(registry):
+    with pytest.raises(KeyError):
+        registry.lazy("missing")
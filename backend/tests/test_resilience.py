@@ -0,0 +1,45 @@
+import asyncio
+import time
+
+import pytest
+
+from services.resilience import CircuitBreaker, CircuitOpenError, call_with_retry, get_breaker
+
+
+def _open(breaker: CircuitBreaker) -> None:
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+
+
+def test_cancelled_probe_releases_half_open_slot():
+    breaker = get_breaker("test_cancelled_probe")
+    breaker.reset_timeout = 0.01
+    _open(breaker)
+    time.sleep(0.02)
+
+    async def scenario():
+        probe = asyncio.create_task(call_with_retry("test_cancelled_probe", lambda: asyncio.sleep(10)))
+        await asyncio.sleep(0.01)
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+        async def ok():
+            return "ok"
+
+        return await call_with_retry("test_cancelled_probe", ok)
+
+    assert asyncio.run(scenario()) == "ok"
+    assert breaker.snapshot()["state"] == CircuitBreaker.CLOSED
+
+
+def test_lost_probe_expires_after_reset_timeout():
+    breaker = CircuitBreaker("test_lost_probe", failure_threshold=1, reset_timeout=0.05)
+    _open(breaker)
+    time.sleep(0.06)
+    breaker.before_call()  # Probe that never reports back
+
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    time.sleep(0.06)
+    breaker.before_call()
@@ -0,0 +1,36 @@
+from datetime import date, datetime, timedelta
+
+from services.series_store import LOOKBACK_DAYS, DailySeriesStore
+
+
+class _Loader:
+    def __init__(self, series):
+        self.series = series
+        self.calls = []
+
+    def __call__(self, symbols, start, end):
+        self.calls.append((tuple(symbols), start, end))
+        return {
+            symbol: [(day, close) for day, close in self.series.get(symbol, []) if start <= day <= end]
+            for symbol in symbols
+        }
+
+
+def test_empty_window_is_fetched_again():
+    loader = _Loader({})
+    store = DailySeriesStore(loader)
+    day = datetime(2024, 3, 15)
+
+    assert store.close_on_or_before("GONE", day) is None
+    loader.series["GONE"] = [(date(2024, 3, 14), 10.0)]
+    assert store.close_on_or_before("GONE", day) == (date(2024, 3, 14), 10.0)
+    assert len(loader.calls) == 2
+
+
+def test_close_older_than_lookback_is_not_returned():
+    old = date(2024, 1, 2)
+    store = DailySeriesStore(_Loader({"OLD": [(old, 5.0)]}))
+    store.ensure(["OLD"], old, old)
+
+    assert store.lookup("OLD", old + timedelta(days=LOOKBACK_DAYS)) == (old, 5.0)
+    assert store.lookup("OLD", old + timedelta(days=LOOKBACK_DAYS + 1)) is None
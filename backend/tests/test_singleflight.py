@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from services.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    flights = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return 42
+
+    async def scenario():
+        return await asyncio.gather(*(flights.do("key", fetch) for _ in range(5)))
+
+    assert asyncio.run(scenario()) == [42] * 5
+    assert len(calls) == 1
+    assert flights.stats() == {"leaders": 1, "shared": 4, "inFlight": 0}
+
+
+def test_waiters_get_the_leaders_error():
+    flights = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream down")
+
+    async def scenario():
+        return await asyncio.gather(flights.do("key", fail), flights.do("key", fail), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(r, ValueError) for r in results)
+    assert flights.leaders == 1
+
+
+def test_a_waiter_takes_over_when_the_leader_is_cancelled():
+    flights = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    async def scenario():
+        leader = asyncio.create_task(flights.do("key", fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flights.do("key", fetch))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(scenario()) == "ok"
+    assert len(calls) == 2
+
+
+def test_blocking_claims_split_keys_between_threads():
+    flights = SingleFlight()
+    owned, waiting = flights.claim(["a", "b"])
+    assert owned == ["a", "b"] and waiting == {}
+
+    owned, waiting = flights.claim(["b", "c"])
+    assert owned == ["c"] and list(waiting) == ["b"]
+    assert not waiting["b"].is_set()
+
+    flights.release(["a", "b"])
+    assert waiting["b"].is_set()
+    flights.release(["c"])
+    assert flights.stats()["inFlight"] == 0
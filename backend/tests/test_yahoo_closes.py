@@ -0,0 +1,55 @@
+from collections import Counter
+from datetime import date, datetime, timezone
+
+import pytest
+
+from config import settings
+from services import price_fetcher
+from services.price_fetcher import PriceFetcher
+
+
+class _Response:
+    def __init__(self, status_code: int, body: dict):
+        self.status_code = status_code
+        self._body = body
+
+    def json(self) -> dict:
+        return self._body
+
+
+class _Session:
+    """Chart API that answers 503 the first `flaky[symbol]` times"""
+
+    def __init__(self, flaky: dict):
+        self.flaky = flaky
+        self.calls = Counter()
+
+    def get(self, url: str, params: dict, **kwargs) -> _Response:
+        symbol = url.rsplit("/", 1)[-1]
+        self.calls[symbol] += 1
+        if self.calls[symbol] <= self.flaky.get(symbol, 0):
+            return _Response(503, {})
+        if symbol == "NOPE":
+            return _Response(404, {"chart": {"result": None, "error": {"description": "No data found"}}})
+        opened = int(datetime(2024, 3, 28, 14, 30, tzinfo=timezone.utc).timestamp())
+        return _Response(200, {"chart": {"result": [{
+            "meta": {"gmtoffset": -14400},
+            "timestamp": [opened - 86400, opened],
+            "indicators": {"quote": [{"close": [10.0, None]}]},
+        }], "error": None}})
+
+
+@pytest.fixture
+def session(monkeypatch):
+    monkeypatch.setattr(settings, "RETRY_BACKOFF_BASE", 0)
+    fake = _Session({"BBB": 1})
+    monkeypatch.setattr(price_fetcher.http_clients, "session", lambda: fake)
+    return fake
+
+
+def test_only_the_failing_ticker_is_requested_again(session):
+    series = PriceFetcher._download_closes(["AAA", "BBB", "NOPE"], date(2024, 3, 1), date(2024, 3, 28))
+
+    assert session.calls == {"AAA": 1, "BBB": 2, "NOPE": 1}
+    # Days are in the exchange's time zone; empty closes are dropped
+    assert series == {"AAA": [(date(2024, 3, 27), 10.0)], "BBB": [(date(2024, 3, 27), 10.0)]}
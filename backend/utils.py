@@ -73,6 +73,42 @@ def validate_month(year: int, month: int) -> bool:
     return True
 
 
+def parse_month(value: str) -> tuple:
+    """
+    Parse a YYYY-MM string.
+    
+    Args:
+        value: Month string (e.g., "2024-02")
+    
+    Returns:
+        Tuple of (year, month)
+    
+    Raises:
+        ValueError: If the string is not a valid YYYY-MM month
+    """
+    parsed = datetime.strptime(value, "%Y-%m")
+    return parsed.year, parsed.month
+
+
+def iter_months(start: tuple, end: tuple) -> list:
+    """
+    List every month between two months, both included.
+    
+    Args:
+        start: (year, month) of the first month
+        end: (year, month) of the last month
+    
+    Returns:
+        List of (year, month) tuples in chronological order
+    """
+    months = []
+    year, month = start
+    while (year, month) <= tuple(end):
+        months.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
 def format_date(dt: datetime) -> str:
     """
     Format datetime to ISO string without timezone info.
@@ -99,6 +135,55 @@ def format_datetime_iso(dt: datetime) -> str:
     return dt.isoformat() + "Z"
 
 
+class HistoryIndex:
+    """
+    Position index over a history list keyed by (month, assetId).
+    
+    Building the index is O(n) and each upsert is O(1), so merging m
+    entries into n rows costs O(n + m) instead of a linear scan per entry.
+    The index can be kept around for several bulk upserts on the same list.
+    
+    Example:
+        >>> index = HistoryIndex(history)
+        >>> index.upsert(new_entries)
+        (12, 28)  # 12 inserted, 28 updated
+    """
+    
+    def __init__(self, history: list):
+        self.history = history
+        self.positions = {}
+        for i, entry in enumerate(history):
+            self.positions[(entry.get("month"), entry.get("assetId"))] = i
+    
+    def upsert(self, entries: list) -> tuple:
+        """
+        Insert or replace entries in place.
+        
+        Args:
+            entries: History entries to upsert
+        
+        Returns:
+            Tuple of (inserted, updated) counts
+        """
+        inserted = updated = 0
+        for entry in entries:
+            key = (entry.get("month"), entry.get("assetId"))
+            position = self.positions.get(key)
+            if position is None:
+                self.positions[key] = len(self.history)
+                self.history.append(entry)
+                inserted += 1
+            else:
+                self.history[position] = entry
+                updated += 1
+        return inserted, updated
+    
+    def get(self, month: str, asset_id: str):
+        """Entry for (month, assetId), or None"""
+        position = self.positions.get((month, asset_id))
+        return None if position is None else self.history[position]
+
+
 def merge_price_updates(existing_data: list, new_prices: list) -> list:
     """
     Merge new price data with existing data, avoiding duplicates.
@@ -112,29 +197,44 @@ def merge_price_updates(existing_data: list, new_prices: list) -> list:
         new_prices: New prices from API
     
     Returns:
-        Merged price data
-    """
-    # Create a map of existing data by (month, assetId)
-    existing_map = {}
-    for entry in existing_data:
-        key = (entry.get("month"), entry.get("assetId"))
-        existing_map[key] = entry
-    
-    # Update or insert new prices
-    result = list(existing_data)
-    for new_price in new_prices:
-        key = (new_price.get("month"), new_price.get("assetId"))
-        if key in existing_map:
-            # Update existing entry
-            idx = result.index(existing_map[key])
-            result[idx] = new_price
-            logger.debug(f"Updated price for {new_price.get('assetId')} in {new_price.get('month')}")
-        else:
-            # Add new entry
-            result.append(new_price)
-            logger.debug(f"Added new price for {new_price.get('assetId')} in {new_price.get('month')}")
-    
-    return result
+        Merged price data (existing_data is not modified)
+    """
+    index = HistoryIndex(list(existing_data))
+    inserted, updated = index.upsert(new_prices)
+    logger.debug(f"Merged prices: {inserted} added, {updated} updated")
+    return index.history
+
+
+def chunk_list(items: list, size: int) -> list:
+    """
+    Split a list into consecutive chunks of at most `size` items.
+    
+    Args:
+        items: List to split
+        size: Maximum chunk size (values below 1 are treated as 1)
+    
+    Returns:
+        List of chunks
+    """
+    size = max(1, size)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def crypto_base(ticker) -> str:
+    """
+    Coin symbol of a crypto ticker.
+    
+    Args:
+        ticker: Ticker as stored on the asset ("BTC-USD", "ETH-EUR", "SOLEUR", "ADA")
+    
+    Returns:
+        Upper-case coin symbol ("BTC", "ETH", "SOL", "ADA"), or "" if empty
+    """
+    symbol = str(ticker or "").strip().upper().replace("/", "-").split("-")[0]
+    for quote in ("USDT", "USDC", "EUR", "USD"):
+        if symbol.endswith(quote) and len(symbol) > len(quote):
+            return symbol[:-len(quote)]
+    return symbol
 
 
 def extract_isin_from_string(text: str) -> list: